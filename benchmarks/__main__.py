@@ -0,0 +1,68 @@
+"""
+Runs the benchmark suite and prints the results as one JSON document.
+
+    python -m benchmarks [--quick] [--only tick,render,rows,history,search,report,bulk,schedules] [--output FILE]
+
+--quick skips the largest sizes (100k timers, 1 GB logs) for a run that takes
+seconds rather than minutes. Results carry the commit and interpreter they
+were measured on so files from different releases can be compared.
+"""
+import json
+import sys
+from . import bulk_ops, history_parse, history_search, render, render_rows, report, schedules, tick
+from .harness import environment
+
+MB = history_parse.MB
+
+SUITES = {
+    "tick": (lambda: tick.run(), lambda: tick.run(tick.SIZES[:-1])),
+    "render": (lambda: render.run(), lambda: render.run(render.ROWS[:3])),
+    "rows": (lambda: render_rows.run(), lambda: render_rows.run()),
+    "history": (lambda: history_parse.run(), lambda: history_parse.run((1 * MB, 10 * MB))),
+    "search": (lambda: history_search.run(), lambda: history_search.run(history_search.SIZES[:1])),
+    "report": (lambda: report.run(), lambda: report.run(10 * MB)),
+    "bulk": (lambda: [dict(items=n, **bulk_ops.run(n)) for n in bulk_ops.SIZES],
+             lambda: [dict(items=n, **bulk_ops.run(n)) for n in bulk_ops.SIZES[:-1]]),
+    "schedules": (lambda: schedules.run(), lambda: schedules.run(schedules.SIZES[:-1])),
+}
+
+USAGE = "usage: python -m benchmarks [--quick] [--only " + ",".join(SUITES) + "] [--output FILE]"
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    quick, only, output = False, list(SUITES), None
+    args = iter(argv)
+    try:
+        for arg in args:
+            if arg == "--quick":
+                quick = True
+            elif arg == "--only":
+                only = next(args).split(",")
+            elif arg == "--output":
+                output = next(args)
+            else:
+                raise ValueError(arg)
+    except (StopIteration, ValueError):
+        print(USAGE, file=sys.stderr)
+        return 2
+    unknown = [name for name in only if name not in SUITES]
+    if unknown:
+        print(f"Unknown suite: {', '.join(unknown)}\n{USAGE}", file=sys.stderr)
+        return 2
+
+    report = {"environment": environment(), "quick": quick, "results": {}}
+    for name in only:
+        print(f"running {name}...", file=sys.stderr)
+        full, short = SUITES[name]
+        report["results"][name] = short() if quick else full()
+
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""
+Bulk control throughput: TimeManager.bulk() over 1k..100k items.
+
+    python -m benchmarks.bulk_ops
+
+Reports nanoseconds per affected item for each action. Linear scaling shows
+up as a flat column as the fleet grows. The last row is the one-call-per-item
+loop that bulk pause replaces, for comparison.
+"""
+import time
+from src.clock import ManualClock
+from src.managers import TimeManager
+
+SIZES = (1_000, 10_000, 100_000)
+
+def build(n):
+    manager = TimeManager(clock=ManualClock())
+    for i in range(n):
+        manager.add_timer(600 + i % 300, f"job-{i}", tags=("even",) if i % 2 == 0 else ("odd",))
+    return manager
+
+def per_item_pause(manager):
+    for item in manager.select():
+        manager.pause(item)
+    return manager.item_count()
+
+def timed(call):
+    """ns per changed item for one call returning the number of changed items."""
+    start = time.perf_counter_ns()
+    changed = call()
+    return (time.perf_counter_ns() - start) / max(1, changed)
+
+def run(n):
+    """Returns {case: ns per affected item} for a fleet of n timers."""
+    manager = build(n)
+    results = {}
+    for name, call in (
+        ("pause all", lambda: manager.bulk("pause")),
+        ("resume all", lambda: manager.bulk("resume")),
+        ("extend by tag", lambda: manager.bulk("extend", 60, tag="even")),
+        ("reset by prefix", lambda: manager.bulk("reset", prefix="job-1")),
+        ("pause by state", lambda: manager.bulk("pause", state="RUNNING")),
+        ("delete by ids", lambda: manager.bulk("delete", ids=[t.id for t in manager.timers[::3]])),
+    ):
+        results[name] = timed(call)
+    fresh = build(n)
+    results["per-item pause"] = timed(lambda: per_item_pause(fresh))
+    return results
+
+def main():
+    table = {n: run(n) for n in SIZES}
+    cases = list(table[SIZES[0]])
+    print(f"{'ns/item':<18}" + "".join(f"{n:>12,}" for n in SIZES))
+    for case in cases:
+        print(f"{case:<18}" + "".join(f"{table[n][case]:>12,.0f}" for n in SIZES))
+
+if __name__ == "__main__":
+    main()
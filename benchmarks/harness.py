@@ -0,0 +1,41 @@
+"""
+Shared timing helpers for the benchmark suite.
+"""
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+def measure(call, repeat=5, setup=None):
+    """
+    Runs call() `repeat` times (after setup(), if given, each time, untimed)
+    and returns {"min", "median", "max"} in nanoseconds.
+    """
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter_ns()
+        call()
+        samples.append(time.perf_counter_ns() - start)
+    return {"min": min(samples), "median": int(statistics.median(samples)), "max": max(samples)}
+
+def environment() -> dict:
+    """What a result was measured on, so runs from different releases can be compared."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=root, capture_output=True,
+                                text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
@@ -0,0 +1,108 @@
+"""
+History parse throughput on synthetic event streams from 1 MB to 1 GB.
+
+    python -m benchmarks.history_parse
+
+"stream" reads the whole file backwards through HistoryStream, which is what
+`timer-cli history` and the Raw view do; "grouped" also parses every line
+and folds it into GroupedHistory, which is what the Grouped view does (up to
+100 MB, as it keeps every event in memory).
+Logs are written to a temporary directory and removed afterwards.
+"""
+import json
+import os
+import shutil
+import tempfile
+import time
+from src.history import HistoryStream, GroupedHistory, parse_event_json
+
+MB = 1024 * 1024
+SIZES = (1 * MB, 10 * MB, 100 * MB, 1024 * MB)
+# The grouped view holds every event in memory; past this only "stream" is measured
+GROUPED_MAX = 100 * MB
+# Sessions of activity in the synthetic log: every item's lifecycle, then a system line
+ITEMS_PER_SESSION = 20
+
+def _session_lines(session, wall):
+    """One burst of realistic events, as the log writer would produce them."""
+    lines = []
+    for i in range(ITEMS_PER_SESSION):
+        item_id = f"{session * ITEMS_PER_SESSION + i:08x}"
+        if i % 4 == 3:
+            lines.append(f'{{"mono":{wall:.6f},"cat":"Stopwatch","action":"Started","id":"{item_id}",'
+                         f'"name":"sw {i}","wall":{wall:.6f}}}')
+            for lap in range(3):
+                lines.append(f'{{"mono":{wall:.6f},"cat":"Stopwatch","action":"Lap","id":"{item_id}",'
+                             f'"lap":{12.5 + lap:.3f},"wall":{wall + lap:.6f}}}')
+        else:
+            lines.append(f'{{"mono":{wall:.6f},"cat":"Timer","action":"Started","id":"{item_id}",'
+                         f'"name":"timer {i}","duration":{60 * (i + 1)},"wall":{wall:.6f}}}')
+            lines.append(f'{{"mono":{wall:.6f},"cat":"Timer","action":"Pause","id":"{item_id}",'
+                         f'"wall":{wall + 5:.6f}}}')
+            lines.append(f'{{"mono":{wall:.6f},"cat":"Timer","action":"Resume","id":"{item_id}",'
+                         f'"wall":{wall + 9:.6f}}}')
+            lines.append(f'{{"mono":{wall:.6f},"cat":"Timer","action":"Finished","id":"{item_id}",'
+                         f'"wall":{wall + 60 * (i + 1):.6f}}}')
+        wall += 1
+    lines.append(f'{{"mono":{wall:.6f},"cat":"System","action":"Stats","text":"Wakeups/min: 4.0",'
+                 f'"wall":{wall:.6f}}}')
+    return lines
+
+def write_log(path, size):
+    """Writes at least `size` bytes of events; returns the number of lines."""
+    written = lines = session = 0
+    wall = 1.7e9
+    with open(path, "w", encoding="utf-8") as f:
+        while written < size:
+            block = _session_lines(session, wall)
+            text = "\n".join(block) + "\n"
+            f.write(text)
+            written += len(text)
+            lines += len(block)
+            session += 1
+            wall += 3600
+    return lines
+
+def read_all(path):
+    stream = HistoryStream(path)
+    try:
+        while not stream.exhausted:
+            stream.read_older()
+    finally:
+        stream.close()
+
+def group_all(path):
+    grouped = GroupedHistory(HistoryStream(path), parse=parse_event_json)
+    try:
+        while not grouped.stream.exhausted:
+            grouped.feed_older(grouped.stream.read_older())
+    finally:
+        grouped.stream.close()
+
+def run(sizes=SIZES):
+    results = []
+    directory = tempfile.mkdtemp(prefix="timer-cli-bench-")
+    try:
+        for size in sizes:
+            path = os.path.join(directory, "events.jsonl")
+            lines = write_log(path, size)
+            result = {"bytes": os.path.getsize(path), "lines": lines}
+            for case, call in (("stream", read_all), ("grouped", group_all)):
+                if case == "grouped" and size > GROUPED_MAX:
+                    continue
+                start = time.perf_counter_ns()
+                call(path)
+                elapsed = time.perf_counter_ns() - start
+                result[f"{case}_ns"] = elapsed
+                result[f"{case}_lines_per_sec"] = round(lines * 1e9 / elapsed)
+            results.append(result)
+            os.remove(path)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+def main():
+    print(json.dumps(run(), indent=2))
+
+if __name__ == "__main__":
+    main()
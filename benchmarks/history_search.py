@@ -0,0 +1,74 @@
+"""
+History search on synthetic event streams of 10 MB and 100 MB.
+
+    python -m benchmarks.history_search
+
+"index" streams the whole log into a SearchIndex. "first_page" is what the
+History view waits for after typing a query into a fresh index: streaming
+and matching until a screenful (40) of matches exists. "query_*" evaluates
+one query against the finished index, which is the cost of every keystroke
+once the log has been read.
+"""
+import json
+import os
+import shutil
+import tempfile
+import time
+from src.history_search import Query, SearchIndex, SearchResults
+from .harness import measure
+from .history_parse import MB, write_log
+
+SIZES = (10 * MB, 100 * MB)
+PAGE = 40
+QUERIES = {
+    "name": "timer 7",
+    "type_action": "type:stopwatch action:lap",
+    "id": "0000001",
+    "date": "date:2023-11-15",
+}
+
+def index_all(path) -> SearchIndex:
+    index = SearchIndex(path)
+    while not index.exhausted:
+        index.advance()
+    return index
+
+def first_page(path, text):
+    index = SearchIndex(path)
+    try:
+        results = SearchResults(index, Query(text))
+        while len(results) < PAGE and not results.complete:
+            index.advance()
+            results.update()
+    finally:
+        index.close()
+
+def run(sizes=SIZES, repeat=3):
+    results = []
+    directory = tempfile.mkdtemp(prefix="timer-cli-bench-")
+    try:
+        for size in sizes:
+            path = os.path.join(directory, "events.jsonl")
+            lines = write_log(path, size)
+            result = {"bytes": os.path.getsize(path), "lines": lines}
+            start = time.perf_counter_ns()
+            index = index_all(path)
+            result["index_ns"] = time.perf_counter_ns() - start
+            result["index_lines_per_sec"] = round(lines * 1e9 / result["index_ns"])
+            result["first_page_ns"] = measure(lambda: first_page(path, QUERIES["name"]), repeat)["median"]
+            for name, text in QUERIES.items():
+                query = Query(text)
+                result[f"query_{name}_ns"] = measure(lambda: index.match(query), repeat)["median"]
+                result[f"query_{name}_matches"] = len(index.match(query))
+            index.close()
+            results.append(result)
+            os.remove(path)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+def main():
+    print(json.dumps(run(), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Frame render time against the number of visible rows.
+
+    python -m benchmarks.render
+
+render_app draws into a FakeWindow that records addstr calls and the bytes
+they would send to the terminal. "full" is the first frame on a fresh
+screen; "steady" is a frame after the clock moved one second, which is
+what the dashboard draws most of the time.
+"""
+import curses
+import json
+from contextlib import contextmanager
+from src.clock import ManualClock
+from src.managers import TimeManager
+from src.app import Menu
+from src.ui import Screen, ListViewport, render_app
+from .harness import measure
+
+ROWS = (10, 25, 50, 100, 200)
+WIDTH = 120
+# Rows render_app keeps for the header, section title, menu and footer
+CHROME_ROWS = 8
+
+class FakeWindow:
+    """Just enough of a curses window for render_app, counting what gets written."""
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.reset_counts()
+
+    def reset_counts(self):
+        self.addstr_calls = 0
+        self.bytes = 0
+        self.refreshes = 0
+
+    def getmaxyx(self):
+        return self.height, self.width
+
+    def addstr(self, y, x, text, attr=0):
+        self.addstr_calls += 1
+        self.bytes += len(text.encode("utf-8"))
+
+    def move(self, y, x):
+        pass
+
+    def clrtoeol(self):
+        pass
+
+    def erase(self):
+        pass
+
+    def refresh(self):
+        self.refreshes += 1
+
+@contextmanager
+def headless_colors():
+    """curses.color_pair() needs a real terminal; fake distinct attributes instead."""
+    real = curses.color_pair
+    curses.color_pair = lambda n: n << 8
+    try:
+        yield
+    finally:
+        curses.color_pair = real
+
+def build(rows):
+    clock = ManualClock()
+    manager = TimeManager(clock=clock)
+    for i in range(rows + 10): # More than fit, so the viewport is full
+        manager.add_timer(3600 + i * 7, f"timer {i}")
+    return manager, clock
+
+def run(rows_list=ROWS, repeat=5):
+    results = []
+    with headless_colors():
+        for rows in rows_list:
+            manager, clock = build(rows)
+            menu = Menu(["New Timer", "New Stopwatch", "Control Active", "History", "Exit"])
+            window = FakeWindow(rows + CHROME_ROWS, WIDTH)
+            viewport = ListViewport()
+            state = {}
+
+            def fresh():
+                state["screen"] = Screen(window)
+                window.reset_counts()
+
+            def frame():
+                render_app(state["screen"], manager, menu, WIDTH, window.height, viewport=viewport)
+
+            full_ns = measure(frame, repeat, setup=fresh)
+            full = (window.addstr_calls, window.bytes)
+
+            def next_second():
+                clock.advance(1)
+                window.reset_counts()
+            steady_ns = measure(frame, repeat, setup=next_second)
+            results.append({
+                "rows": viewport.visible[1] - viewport.visible[0],
+                "full_ns": full_ns, "full_addstr": full[0], "full_bytes": full[1],
+                "steady_ns": steady_ns, "steady_addstr": window.addstr_calls, "steady_bytes": window.bytes,
+            })
+    return results
+
+def main():
+    print(json.dumps(run(), indent=2))
+
+if __name__ == "__main__":
+    main()
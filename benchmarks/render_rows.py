@@ -0,0 +1,89 @@
+"""
+Per-row render cost with 1,000 visible timer rows.
+
+    python -m benchmarks.render_rows
+
+"strings" times building one row's label, time column and progress bar
+from its remaining time:
+"uncached" is how render_app built them before the render caches (format
+the time, rebuild the label f-string, concatenate a new bar), "cached" goes
+through RENDER_CACHE and the memoized format_time. "frame" is a whole
+steady-state render_app frame divided by the rows drawn, with warm caches
+and with every cache emptied before the frame.
+"""
+import json
+from src.ui import (RENDER_CACHE, Screen, ListViewport, State, render_app, timer_label, padded_time,
+                    progress_bar_width)
+from src.utils import _format_whole
+from src.app import Menu
+from .harness import measure
+from .render import FakeWindow, headless_colors, build, CHROME_ROWS, WIDTH
+
+ROWS = 1_000
+
+def _uncached_format_time(seconds):
+    m, s = divmod(int(seconds), 60)
+    h, m = divmod(m, 60)
+    return f"{h:02}:{m:02}:{s:02}"
+
+def uncached_row(t, rem, width):
+    time_rem = _uncached_format_time(rem)
+    status_icon = "[||]" if t.state == State.PAUSED else "[>] "
+    if t.state == State.FINISHED: status_icon = "[V] "
+    label = f" {status_icon} {t.name:<15} ({t.original_duration_str})"
+    rem_str = f" {time_rem} "
+    bar_width = progress_bar_width(label, rem_str, width)
+    percent = max(0.0, min(1.0, 1.0 - rem / t.duration))
+    filled = int(bar_width * percent)
+    return label, rem_str, "█" * filled + "-" * (bar_width - filled)
+
+def cached_row(t, rem, width):
+    label = timer_label(t)
+    rem_str = padded_time(rem)
+    bar_width = progress_bar_width(label, rem_str, width)
+    percent = max(0.0, min(1.0, 1.0 - rem / t.duration))
+    return label, rem_str, RENDER_CACHE.bar(bar_width, int(bar_width * percent))
+
+def clear_caches():
+    RENDER_CACHE.labels.clear()
+    RENDER_CACHE.bars.clear()
+    _format_whole.cache_clear()
+
+def run(rows=ROWS, repeat=5):
+    with headless_colors():
+        manager, clock = build(rows)
+        timers = manager.timers[:rows]
+        remaining = [t.remaining_time for t in timers]
+        results = {"rows": rows}
+        for case, row in (("uncached", uncached_row), ("cached", cached_row)):
+            def all_rows():
+                for t, rem in zip(timers, remaining):
+                    row(t, rem, WIDTH)
+            all_rows() # Warm up (fills the caches for the cached case)
+            results[f"strings_{case}_ns_per_row"] = measure(all_rows, repeat)["median"] / rows
+
+        menu = Menu(["New Timer", "New Stopwatch", "Control Active", "History", "Exit"])
+        window = FakeWindow(rows + CHROME_ROWS, WIDTH)
+        screen = Screen(window)
+        viewport = ListViewport()
+
+        def frame():
+            render_app(screen, manager, menu, WIDTH, window.height, viewport=viewport)
+        frame()
+        drawn = viewport.visible[1] - viewport.visible[0]
+        warm = measure(frame, repeat, setup=lambda: clock.advance(1))
+        results["frame_warm_ns_per_row"] = warm["median"] / drawn
+
+        def cold():
+            clock.advance(1)
+            clear_caches()
+        results["frame_cold_ns_per_row"] = measure(frame, repeat, setup=cold)["median"] / drawn
+        results["strings_speedup"] = round(results["strings_uncached_ns_per_row"]
+                                           / results["strings_cached_ns_per_row"], 1)
+        return results
+
+def main():
+    print(json.dumps(run(), indent=2))
+
+if __name__ == "__main__":
+    main()
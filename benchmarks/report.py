@@ -0,0 +1,43 @@
+"""
+`timer-cli report` aggregation over a 100 MB synthetic event stream.
+
+    python -m benchmarks.report
+
+Times build_report() with one process and with one per CPU (at least two),
+on the same log, and checks that both produce the same tables.
+"""
+import json
+import os
+import shutil
+import tempfile
+import time
+from src.report import build_report
+from .history_parse import MB, write_log
+
+SIZE = 100 * MB
+
+def run(size=SIZE):
+    directory = tempfile.mkdtemp(prefix="timer-cli-bench-")
+    try:
+        path = os.path.join(directory, "events.jsonl")
+        lines = write_log(path, size)
+        result = {"bytes": os.path.getsize(path), "lines": lines}
+        reports = {}
+        for jobs in (1, max(2, os.cpu_count() or 1)):
+            start = time.perf_counter_ns()
+            reports[jobs] = build_report(path, jobs=jobs)
+            elapsed = time.perf_counter_ns() - start
+            result[f"jobs_{jobs}_ns"] = elapsed
+            result[f"jobs_{jobs}_lines_per_sec"] = round(lines * 1e9 / elapsed)
+        single, parallel = reports.values()
+        result["same_tables"] = (single.name_rows() == parallel.name_rows()
+                                 and single.day_rows() == parallel.day_rows())
+        return result
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+def main():
+    print(json.dumps(run(), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Scheduler cost and accuracy with many schedules.
+
+    python -m benchmarks.schedules
+
+"idle" is one TimeManager.update() where no schedule is due; "firing"
+advances the clock one second, which makes 1% of the interval schedules
+start a timer. "drift_ns" runs a 10 s interval and a 25/5 chain through a
+simulated day of irregular ticks and reports how far any start strayed
+from anchor + k * interval; it should be 0.
+"""
+import json
+import random
+from src.clock import ManualClock, NS_PER_SEC
+from src.managers import TimeManager
+from src.schedule import Schedule
+from .harness import measure
+
+SIZES = (100, 1_000, 10_000)
+
+def build(n):
+    clock = ManualClock()
+    manager = TimeManager(clock=clock)
+    anchor = clock.wall_ns()
+    for i in range(n):
+        # Intervals of 100 s with anchors a second apart: each second, 1% come due
+        manager.add_schedule(Schedule.interval(100, anchor + (i % 100) * NS_PER_SEC, name=f"s{i}"))
+    return manager, clock
+
+def drift(seconds=86_400, seed=1):
+    clock = ManualClock()
+    manager = TimeManager(clock=clock)
+    every = manager.add_schedule(Schedule.interval(10, clock.wall_ns(), duration=3))
+    chain = manager.add_schedule(Schedule.chain([25, 5], repeat=0))
+    origin = clock.monotonic_ns()
+    rng = random.Random(seed)
+    started = {} # Finished timers are pruned at the next fire, so note each one as it starts
+    while clock.monotonic_ns() - origin < seconds * NS_PER_SEC:
+        clock.advance(ns=rng.randint(1, 700_000_000)) # Frames anywhere from 1 ns to 0.7 s apart
+        manager.update()
+        for timer_id in every.timer_ids[-1:] + [chain.timer_id]:
+            if timer_id not in started:
+                started[timer_id] = manager.get(timer_id)
+    worst = 0
+    for timer in started.values():
+        offset = timer.start_ns - origin
+        period = 10 if timer.duration == 3 else 30
+        phase = 0 if timer.duration != 5 else 25
+        worst = max(worst, abs((offset - phase * NS_PER_SEC) % (period * NS_PER_SEC)))
+    return {"simulated_seconds": seconds, "interval_fires": every.fired, "chain_steps": chain.fired,
+            "drift_ns": worst, "timers_left": len(manager.timers)}
+
+def run(sizes=SIZES, repeat=5):
+    results = []
+    for n in sizes:
+        manager, clock = build(n)
+
+        def idle():
+            clock.advance(ns=1_000_000) # A 1 ms frame
+            manager.update()
+        idle_ns = measure(idle, repeat)
+
+        # Each sample starts on a fresh whole second, so a fresh 1% fire
+        firing_ns = measure(manager.update, repeat, setup=lambda: clock.advance(1))
+        results.append({"schedules": n, "idle_ns": idle_ns, "firing_ns": firing_ns})
+    return {"ticks": results, "accuracy": drift()}
+
+def main():
+    print(json.dumps(run(), indent=2))
+
+if __name__ == "__main__":
+    main()
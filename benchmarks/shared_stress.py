@@ -0,0 +1,119 @@
+"""
+Stress test of the shared timer table with many simultaneous writers.
+
+    python -m benchmarks.shared_stress [WRITERS] [SECONDS]
+
+Each writer process runs a SharedManager on one table and, as fast as it
+can, creates timers and stopwatches, pauses and resumes random ones, takes
+laps and deletes them, including items other writers are working on. A
+reader process meanwhile copies records without taking the lock and checks
+that every copy is whole: a timer is always named after its duration, so a
+record mixing two writes shows up as a mismatch. At the end the table must
+hold exactly the items created minus those deleted, with no id twice.
+"""
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from src.models import Timer
+from src.shared import SharedTable, SharedManager, unpack
+
+WRITERS = 8
+SECONDS = 5.0
+# Live items each writer aims to keep around, so slots are reused constantly
+TARGET_ITEMS = 40
+
+def writer(path, seconds, seed, results):
+    rng = random.Random(seed)
+    manager = SharedManager(SharedTable(path))
+    created = deleted = ops = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        manager.update()
+        items = manager.timers + manager.stopwatches
+        roll = rng.random()
+        if roll < 0.25 or len(items) < TARGET_ITEMS:
+            if rng.random() < 0.7:
+                duration = rng.randint(60, 100_000)
+                manager.add_timer(duration, f"t{duration}")
+            else:
+                manager.add_stopwatch("s")
+            created += 1
+        elif roll < 0.45:
+            with manager.table.locked(): # Count only deletes that found the item still there
+                item = manager._fresh(rng.choice(items))
+                if item is not None:
+                    (manager.remove_timer if isinstance(item, Timer) else manager.remove_stopwatch)(item)
+                    deleted += 1
+        elif roll < 0.6 and manager.stopwatches:
+            manager.lap(rng.choice(manager.stopwatches))
+        else:
+            item = rng.choice(items)
+            (manager.pause if rng.random() < 0.5 else manager.resume)(item)
+        ops += 1
+    manager.close()
+    results.put({"created": created, "deleted": deleted, "ops": ops})
+
+def reader(path, stop, results):
+    table = SharedTable(path)
+    reads = torn = 0
+    while not stop.is_set():
+        for slot in range(table.slots):
+            state = unpack(table.read(slot))
+            reads += 1
+            if state is not None and state["kind"] == "timer" and state["name"] != f"t{int(state['duration'])}":
+                torn += 1
+    table.close()
+    results.put({"reads": reads, "torn": torn})
+
+def run(writers=WRITERS, seconds=SECONDS):
+    directory = tempfile.mkdtemp(prefix="timer-cli-bench-")
+    try:
+        path = os.path.join(directory, "shared.tbl")
+        SharedTable(path).close()
+        results = multiprocessing.Queue()
+        stop = multiprocessing.Event()
+        procs = [multiprocessing.Process(target=writer, args=(path, seconds, seed, results))
+                 for seed in range(writers)]
+        check = multiprocessing.Process(target=reader, args=(path, stop, results))
+        check.start()
+        start = time.perf_counter()
+        for proc in procs:
+            proc.start()
+        totals = [results.get() for _ in procs]
+        elapsed = time.perf_counter() - start
+        stop.set()
+        reads = results.get()
+        for proc in procs + [check]:
+            proc.join()
+
+        table = SharedTable(path)
+        live = [state for state in (unpack(table.read(slot)) for slot in range(table.slots)) if state]
+        table.close()
+        created = sum(t["created"] for t in totals)
+        deleted = sum(t["deleted"] for t in totals)
+        ops = sum(t["ops"] for t in totals)
+        return {
+            "writers": writers, "seconds": round(elapsed, 2), "ops": ops,
+            "ops_per_sec": round(ops / elapsed), "created": created, "deleted": deleted,
+            "live": len(live), "consistent": len(live) == created - deleted
+                                              and len({s["id"] for s in live}) == len(live),
+            "unlocked_reads": reads["reads"], "torn_reads": reads["torn"],
+        }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+def main():
+    args = sys.argv[1:]
+    writers = int(args[0]) if args else WRITERS
+    seconds = float(args[1]) if len(args) > 1 else SECONDS
+    result = run(writers, seconds)
+    print(json.dumps(result, indent=2))
+    return 0 if result["consistent"] and not result["torn_reads"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,599 @@
+import curses
+import os
+import signal
+import sys
+from .managers import TimeManager
+from .ui import Screen, ListViewport, render_app
+from .logging_setup import (setup_logging, shutdown_logging, log_action, get_log_path, EVENTS_FILENAME,
+                            set_write_observer)
+from .config import load_config
+from .utils import format_time
+from .paths import get_lap_spill_dir
+from .models import State, Timer, Stopwatch
+from .history import HistoryStream, GroupedHistory, parse_event_json
+from .history_index import HistoryIndex, IndexedGroupedHistory
+from .history_search import Query, SearchIndex, SearchResults, QUERY_HELP
+from .persistence import SessionJournal
+from .notify import build_notifier
+from .sound import TerminalBell, set_ui_bell
+from .client import DaemonClient, DaemonUnavailable
+from .remote import RemoteManager
+from .shared import (SharedManager, SharedTable, SharedStateUnavailable, SHARED_POLL,
+                     SHARED_TABLE_FILENAME)
+from .loop import WakeupCounter, next_frame_delay, wait_for_key
+from .perf import FrameStats, start_profiler, write_profile
+
+class Menu:
+    def __init__(self, items):
+        self.items = items
+        self.selected_index = 0
+
+    def next(self):
+        self.selected_index = (self.selected_index + 1) % len(self.items)
+
+    def prev(self):
+        self.selected_index = (self.selected_index - 1) % len(self.items)
+    
+    @property
+    def current_item(self):
+        return self.items[self.selected_index]
+
+class App:
+    def __init__(self, manager=None, perf=None):
+        self.manager = manager or TimeManager()
+        self.menu = Menu(["New Timer", "New Stopwatch", "Control Active", "History", "Exit"])
+        self.running = True
+        self.list_index = -1 # -1 means focus is on the bottom menu
+        self.wakeups = WakeupCounter()
+        self.screen = None
+        self.viewport = ListViewport()
+        # Frame instrumentation; None (and free) until the overlay is shown, unless profiling
+        self.perf = perf
+        self.profiling = perf is not None
+
+    def render(self, stdscr, prompt=None):
+        perf = self.perf
+        target = stdscr if perf is None else perf.wrap(stdscr)
+        if self.screen is None or self.screen.stdscr is not target:
+            self.screen = Screen(target)
+        height, width = stdscr.getmaxyx()
+        overlay = None
+        if perf is not None and perf.visible:
+            overlay = perf.summary()
+            notifier = getattr(self.manager, "notifier", None) # Remote managers leave alerts to the daemon
+            if notifier is not None:
+                overlay += notifier.summary()
+        render_app(self.screen, self.manager, self.menu, width, height, self.list_index,
+                   prompt, self.viewport, overlay)
+        return width
+
+    def toggle_perf_overlay(self):
+        if self.perf is None:
+            self.perf = FrameStats()
+            set_write_observer(self.perf.observe_log_writes)
+            self.perf.visible = True
+        elif self.perf.visible and not self.profiling:
+            set_write_observer(None) # Back to an uninstrumented loop
+            self.perf = None
+        else:
+            self.perf.visible = not self.perf.visible
+
+    def selected_item(self):
+        """The focused timer or stopwatch, or None when the menu has focus."""
+        if 0 <= self.list_index < self.manager.item_count():
+            return self.manager.item_at(self.list_index)
+        return None
+
+    def handle_input(self, key, stdscr):
+        item_count = self.manager.item_count()
+        
+        if key == curses.KEY_RIGHT:
+            self.menu.next()
+        elif key == curses.KEY_LEFT:
+            self.menu.prev()
+            
+        elif key == curses.KEY_UP:
+            if self.list_index == -1: # From menu to last item of list
+                if item_count:
+                    self.list_index = item_count - 1
+            else:
+                self.list_index -= 1 # Move up in list, -1 will go to menu
+                
+        elif key == curses.KEY_DOWN:
+            if self.list_index < item_count - 1:
+                self.list_index += 1
+            else:
+                self.list_index = -1 # Go back to menu
+                
+        elif key in [10, 13, curses.KEY_ENTER, 459]: # Enter
+            if self.list_index == -1:
+                self.execute_menu_action(stdscr)
+            else:
+                # Toggle pause/resume on the selected item
+                self.toggle_selected_item()
+                
+        elif key == ord('s') or key == ord('S'): # Split / Lap
+            self.lap_selected_item()
+        elif key == ord('r') or key == ord('R'): # Reset
+            self.reset_selected_item()
+        elif key == ord('d') or key == ord('D'): # Delete / Remove
+            self.remove_selected_item()
+        elif key == ord('i') or key == ord('I'): # Lap details
+            item = self.selected_item()
+            if isinstance(item, Stopwatch):
+                self.show_laps(stdscr, item)
+                if self.screen is not None:
+                    self.screen.invalidate() # The detail view drew over the dashboard
+        elif key == ord('p') or key == ord('P'): # Performance overlay
+            self.toggle_perf_overlay()
+        elif key == ord('q'):
+            self.running = False
+
+    def toggle_selected_item(self):
+        item = self.selected_item()
+        if item is not None:
+            if item.state == State.PAUSED:
+                self.manager.resume(item)
+            else:
+                self.manager.pause(item)
+
+    def reset_selected_item(self):
+        item = self.selected_item()
+        if item is not None:
+            self.manager.reset(item)
+
+    def lap_selected_item(self):
+        item = self.selected_item()
+        if item is not None:
+            if isinstance(item, Stopwatch):
+                self.manager.lap(item)
+        else:
+            # Fallback to current behavior if nothing selected
+            self.manager.lap_active()
+
+    def remove_selected_item(self):
+        item = self.selected_item()
+        if item is not None:
+            if isinstance(item, Timer):
+                self.manager.remove_timer(item)
+            else:
+                self.manager.remove_stopwatch(item)
+            # Adjust index
+            if self.list_index >= self.manager.item_count():
+                self.list_index = self.manager.item_count() - 1
+
+    def execute_menu_action(self, stdscr):
+        action = self.menu.current_item
+        if action == "Exit":
+            self.running = False
+        elif action == "New Timer":
+            self.handle_new_timer(stdscr)
+        elif action == "New Stopwatch":
+            self.handle_new_stopwatch(stdscr)
+        elif action == "Control Active":
+            self.manager.toggle_all_pause()
+        elif action == "History":
+            self.show_history(stdscr)
+            if self.screen is not None:
+                self.screen.invalidate() # History drew over the dashboard
+
+    def get_user_input(self, stdscr, prompt):
+        """Helper to get non-blocking strings from user."""
+        input_str = ""
+        stdscr.nodelay(False)
+        try:
+            while True:
+                self.render(stdscr, prompt + input_str + "_")
+                
+                key = stdscr.getch()
+                if key in [10, 13, curses.KEY_ENTER, 459]:
+                    return input_str.strip()
+                elif key in [8, 127, curses.KEY_BACKSPACE]:
+                    input_str = input_str[:-1]
+                elif key == 27: # Esc
+                    return None
+                elif 32 <= key <= 126:
+                    if len(input_str) < 30: # Hard limit for input
+                        input_str += chr(key)
+        finally:
+            stdscr.nodelay(True)
+
+    def handle_new_timer(self, stdscr):
+        dur_str = self.get_user_input(stdscr, "Duration [HH MM SS] or [HH MM] or [MM]: ")
+        if dur_str is None: return
+        
+        # Try to parse duration immediately to see if it's valid
+        total_seconds = 0
+        try:
+            parts = dur_str.split()
+            if len(parts) == 3: # HH MM SS
+                h, m, s = map(int, parts)
+                total_seconds = h*3600 + m*60 + s
+            elif len(parts) == 2: # HH MM
+                h, m = map(int, parts)
+                total_seconds = h*3600 + m*60
+            elif len(parts) == 1: # MM
+                m = int(parts[0])
+                total_seconds = m*60
+        except ValueError:
+            return
+
+        if total_seconds <= 0: return
+
+        name = self.get_user_input(stdscr, "Name (optional, max 15 char): ")
+        if name is None: return # Cancelled
+        
+        self.manager.add_timer(total_seconds, name)
+
+    def handle_new_stopwatch(self, stdscr):
+        name = self.get_user_input(stdscr, "Name (optional, max 15 char): ")
+        if name is None: return # Cancelled
+        
+        self.manager.add_stopwatch(name)
+
+    def show_laps(self, stdscr, sw):
+        # Blocking detail view for one stopwatch: split statistics, then every
+        # reachable lap newest first. Spilled laps are read from disk per page.
+        def fmt(value):
+            return "-" if value is None else f"{value:.3f}s"
+
+        offset = 0
+        stdscr.timeout(1000) # Keep the numbers live while laps are being taken
+        while True:
+            h, w = stdscr.getmaxyx()
+            laps = sw.laps
+            stats = laps.stats
+            total = len(laps)
+            first = laps.first
+
+            summary = [
+                f"Laps {total}   Elapsed {format_time(sw.elapsed_time)}",
+                f"Split  mean {fmt(stats.mean if stats.count else None)}  min {fmt(stats.min)}  max {fmt(stats.max)}",
+                f"       p50 {fmt(stats.quantile(0.5))}  p95 {fmt(stats.quantile(0.95))}  p99 {fmt(stats.quantile(0.99))}",
+                "",
+            ]
+            if first > 0:
+                summary.insert(3, f"Laps 1-{first} are no longer kept (set lap_spill to keep them)")
+            max_lines = max(0, h - 2 - len(summary))
+            shown = total - first
+            offset = max(0, min(offset, shown - max_lines))
+
+            # Newest first: display row i is lap index total - 1 - (offset + i)
+            end = total - offset
+            start = max(first, end - max_lines)
+            rows = []
+            if start < end:
+                values = laps.read(max(first, start - 1), end - max(first, start - 1))
+                if start > first:
+                    previous, values = values[0], values[1:]
+                else:
+                    previous = 0.0 if start == 0 else None
+                for index, value in enumerate(values, start):
+                    split = None if previous is None else value - previous
+                    rows.append(f"Lap {index + 1:>7}  split {fmt(split):>12}  at {format_time(value)}")
+                    previous = value
+                rows.reverse()
+
+            stdscr.erase()
+            title = f" LAPS - {sw.name} - [q] Back "
+            stdscr.attron(curses.color_pair(1))
+            stdscr.addstr(0, 0, title.center(w)[:w - 1])
+            stdscr.attroff(curses.color_pair(1))
+            for i, line in enumerate(summary + rows):
+                if i + 1 >= h:
+                    break
+                stdscr.addstr(i + 1, 1, line[:w - 2], curses.A_BOLD if i < len(summary) else curses.A_NORMAL)
+            stdscr.refresh()
+
+            k = stdscr.getch()
+            if k == ord('q') or k == 27: break
+            elif k == curses.KEY_UP:
+                offset = max(0, offset - 1)
+            elif k == curses.KEY_DOWN:
+                offset += 1
+            elif k == curses.KEY_PPAGE: # Page Up
+                offset = max(0, offset - max_lines)
+            elif k == curses.KEY_NPAGE: # Page Down
+                offset += max_lines
+
+    def show_history(self, stdscr):
+        # Blocking view for history: Raw streams the text log from its end,
+        # Grouped is served from the structured event stream
+        stream = HistoryStream(get_log_path())
+        events_path = get_log_path(EVENTS_FILENAME)
+        grouped = None
+        try:
+            # The index covers the live file; archived segments are chained after it
+            index = HistoryIndex(events_path)
+            index.update()
+            grouped = IndexedGroupedHistory(index)
+        except OSError:
+            pass
+        if grouped is None:
+            # The index may not be writable: group while streaming instead,
+            # decompressing archived segments only as the view scrolls back to them
+            grouped = GroupedHistory(HistoryStream(events_path), parse=parse_event_json)
+
+        view_mode = "Grouped"
+        offset = 0
+        redraw = True
+        # Search: the index is built on the first [/] and kept while the view is open
+        index = None
+        results = None
+        editing = None # Query text while the [/] prompt is open
+        error = None
+        cursor = 0
+
+        def apply_query(text):
+            nonlocal results, error, cursor, offset
+            try:
+                query = Query(text)
+            except ValueError as e:
+                error = str(e)
+                return
+            error = None
+            results = None if query.empty else SearchResults(index, query)
+            if results is not None:
+                results.update()
+            cursor = offset = 0
+
+        try:
+            while True:
+                h, w = stdscr.getmaxyx()
+                max_lines = h - 2
+
+                # Index a slice of older events per pass, so matches appear as they are found
+                indexing = results is not None and not results.complete
+                if indexing:
+                    index.advance()
+                    results.update()
+                    redraw = True
+                stdscr.timeout(0 if indexing else 1000) # Otherwise wake up to tail appended lines
+
+                # Only parse as far as the viewport (plus a page of lookahead) reaches
+                if results is not None:
+                    total = len(results)
+                elif view_mode == "Grouped":
+                    grouped.ensure(offset + 2 * max_lines)
+                    total = grouped.size
+                else:
+                    stream.ensure(offset + 2 * max_lines)
+                    total = len(stream) + 1
+
+                if redraw:
+                    stdscr.erase()
+
+                    # Header
+                    if results is not None:
+                        status = f"{len(results)} matches" + (f", indexing ({len(index)} events)" if indexing else "")
+                        title = f" SEARCH: {results.query.text} - {status} - [n/N] Next/Prev | [/] Edit | [Esc] Clear "
+                    else:
+                        title = f" HISTORY ({view_mode}) - [TAB] Toggle | [/] Search | [q] Back "
+                    stdscr.attron(curses.color_pair(1))
+                    stdscr.addstr(0, 0, title.center(w)[:w - 1])
+                    stdscr.attroff(curses.color_pair(1))
+
+                    # Rendering
+                    if results is not None:
+                        for i in range(offset, min(offset + max_lines, total)):
+                            attr = curses.A_REVERSE if i == cursor else curses.A_NORMAL
+                            stdscr.addstr(i - offset + 1, 1, index.format(results[i])[:w - 2], attr)
+                        if not total and not indexing:
+                            stdscr.addstr(1, 1, "No matches."[:w - 2])
+                    else:
+                        if view_mode == "Grouped":
+                            view_content = grouped.render(w, offset, max_lines)
+                        elif stream.missing:
+                            view_content = ["", "No logs found."][offset:offset + max_lines]
+                        else:
+                            view_content = ([""] if offset == 0 else []) + \
+                                stream.lines(max(0, offset - 1), max_lines - (1 if offset == 0 else 0))
+                        for i, line in enumerate(view_content):
+                            if line.startswith("["): # Category headers
+                                stdscr.attron(curses.A_BOLD | curses.color_pair(2))
+                                stdscr.addstr(i+1, 1, line[:w-2])
+                                stdscr.attroff(curses.A_BOLD | curses.color_pair(2))
+                            else:
+                                stdscr.addstr(i+1, 1, line[:w-2])
+
+                    # Query prompt
+                    if editing is not None:
+                        hint = error or ("" if editing else QUERY_HELP)
+                        stdscr.addstr(h - 1, 0, f"/{editing}_  {hint}"[:w - 1], curses.A_BOLD)
+                    stdscr.refresh()
+
+                # Input
+                k = stdscr.getch()
+                redraw = True
+
+                if k == -1:
+                    # Timeout: fold in anything appended since the last look
+                    added = len(stream.poll())
+                    redraw = grouped.sync() > 0 or added > 0 or indexing
+                    if index is not None and index.sync() and results is not None:
+                        results.update()
+                    if added and view_mode == "Raw" and offset > 0 and results is None:
+                        offset += added # Keep the lines being read in place
+                elif editing is not None:
+                    if k in [10, 13, curses.KEY_ENTER, 459]:
+                        editing = None
+                    elif k == 27: # Esc: drop the search
+                        editing = error = results = None
+                        offset = 0
+                    elif k in [8, 127, curses.KEY_BACKSPACE]:
+                        editing = editing[:-1]
+                        apply_query(editing)
+                    elif 32 <= k <= 126 and len(editing) < 80:
+                        editing += chr(k)
+                        apply_query(editing)
+                elif k == ord('/'):
+                    if index is None:
+                        index = SearchIndex(events_path)
+                    editing = results.query.text if results is not None else ""
+                elif k == ord('q'): break
+                elif k == 27:
+                    if results is None: break
+                    results = None
+                    offset = 0
+                elif k == ord('\t'):
+                    view_mode = "Raw" if view_mode == "Grouped" else "Grouped"
+                    results = None
+                    offset = 0
+                elif results is not None:
+                    # Matches are a flat list: moving the cursor only scrolls, nothing is re-read
+                    if k in (ord('n'), curses.KEY_DOWN):
+                        cursor = min(total - 1, cursor + 1) if total else 0
+                    elif k in (ord('N'), curses.KEY_UP):
+                        cursor = max(0, cursor - 1)
+                    elif k == curses.KEY_NPAGE:
+                        cursor = min(total - 1, cursor + max_lines) if total else 0
+                    elif k == curses.KEY_PPAGE:
+                        cursor = max(0, cursor - max_lines)
+                    if cursor < offset:
+                        offset = cursor
+                    elif cursor >= offset + max_lines:
+                        offset = cursor - max_lines + 1
+                elif k == curses.KEY_UP:
+                    offset = max(0, offset - 1)
+                elif k == curses.KEY_DOWN:
+                    offset = min(total - max_lines, offset + 1) if total > max_lines else offset
+                elif k == curses.KEY_PPAGE: # Page Up
+                    offset = max(0, offset - max_lines)
+                elif k == curses.KEY_NPAGE: # Page Down
+                    offset = min(total - max_lines, offset + max_lines) if total > max_lines else offset
+        finally:
+            stream.close()
+            if isinstance(grouped, GroupedHistory):
+                grouped.stream.close()
+            else:
+                grouped.close()
+            if index is not None:
+                index.close()
+
+
+def run_tui(profile_path=None):
+    """
+    The interactive dashboard: attached to the daemon if one runs, standalone
+    otherwise. With profile_path the session runs under cProfile and a report
+    is printed on exit.
+    """
+    config = load_config()
+    setup_logging(flush_interval=config["log_flush_interval"], rotate_bytes=config["log_rotate_bytes"],
+                  rotate_age=config["log_rotate_days"] * 86400)
+    # Turn SIGTERM into a normal exit so the log writer gets drained
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+
+    journal = None
+    try:
+        # A running daemon owns the timers; this session becomes a view onto them
+        manager = RemoteManager(DaemonClient())
+    except DaemonUnavailable:
+        manager = None
+        if config["shared_state"]:
+            # Every dashboard maps the same table; it persists itself, so no journal
+            try:
+                manager = SharedManager(SharedTable(get_log_path(SHARED_TABLE_FILENAME)),
+                                        notifier=build_notifier(config))
+            except SharedStateUnavailable as e:
+                print(f"{e}; running standalone.", file=sys.stderr)
+    if manager is None:
+        manager = TimeManager(notifier=build_notifier(config),
+                              lap_spill_dir=get_lap_spill_dir() if config["lap_spill"] else None)
+        if config["session_persistence"]:
+            journal = SessionJournal(os.path.dirname(get_log_path()))
+            if journal.acquire():
+                manager.restore(*journal.load())
+                manager.journal = journal
+                journal.start()
+            else:
+                journal = None # Another session owns the saved timers; this one isn't saved
+
+    perf = profiler = None
+    if profile_path:
+        perf = FrameStats()
+        profiler = start_profiler()
+    try:
+        # Wrapper handles initialization and cleanup safely
+        curses.wrapper(run_app, manager, config["visual_bell"], perf)
+    except DaemonUnavailable as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if profiler is not None:
+            print(write_profile(profiler, profile_path, perf), file=sys.stderr)
+        if journal is not None:
+            manager.checkpoint()
+            journal.close()
+        if isinstance(manager, RemoteManager):
+            manager.close()
+        else:
+            manager.notifier.close()
+            if isinstance(manager, SharedManager):
+                manager.close()
+        shutdown_logging()
+
+def run_app(stdscr, manager=None, visual_bell=False, perf=None):
+    # Setup colors
+    curses.curs_set(0) # Hide cursor
+    curses.start_color()
+    curses.init_pair(1, curses.COLOR_WHITE, curses.COLOR_BLUE)  # Header
+    curses.init_pair(2, curses.COLOR_GREEN, curses.COLOR_BLACK) # Progress Bar
+    curses.init_pair(3, curses.COLOR_BLACK, curses.COLOR_CYAN)  # Selected Menu
+    curses.init_pair(4, curses.COLOR_WHITE, curses.COLOR_BLACK) # Normal text
+    curses.init_pair(5, curses.COLOR_WHITE, curses.COLOR_BLUE)   # Footer / Status Bar (Blue/White)
+
+    app = App(manager, perf)
+    if perf is not None:
+        set_write_observer(perf.observe_log_writes)
+    stdscr.keypad(True) # Ensure special keys are handled
+    # Bell rings requested by notification threads are made here, on the UI thread
+    bell = TerminalBell(visual=visual_bell)
+    set_ui_bell(bell)
+    # Sources that wake the loop besides keys. Attached to a daemon, the
+    # changes it pushes do; the bell's pipe doesn't exist on Windows.
+    sources = []
+    if isinstance(app.manager, RemoteManager):
+        sources.append(app.manager)
+    if bell.fileno() is not None:
+        sources.append(bell)
+    shared = isinstance(app.manager, SharedManager)
+
+    try:
+        while app.running:
+            perf = app.perf
+            if perf is not None:
+                perf.begin()
+
+            # Update
+            app.manager.update()
+            if perf is not None:
+                perf.mark("update")
+
+            # Render
+            width = app.render(stdscr)
+            bell.ring()
+            if perf is not None:
+                perf.mark("render")
+
+            # Sleep until the next visible change or a key, whichever comes first.
+            delay = next_frame_delay(app.manager, width, app.viewport)
+            if shared and (delay is None or delay > SHARED_POLL):
+                delay = SHARED_POLL # Other sessions' changes aren't pushed; look for them
+            try:
+                key = wait_for_key(stdscr, delay, *sources)
+            except:
+                key = -1
+            app.wakeups.record()
+            if perf is not None:
+                perf.mark("sleep", None if key != -1 else delay)
+
+            if key != -1:
+                app.handle_input(key, stdscr)
+            if perf is not None and perf is app.perf:
+                perf.end()
+    finally:
+        set_write_observer(None)
+        set_ui_bell(None)
+        bell.close()
+
+    log_action("System", "Stats", f"Wakeups/min: {app.wakeups.per_minute:.1f}")
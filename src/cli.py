@@ -0,0 +1,398 @@
+import json
+import os
+import sys
+import time
+from .utils import format_time
+from .client import DaemonClient, DaemonError, DaemonUnavailable
+
+# Scripts and prompt hooks call these thousands of times a day: keep the
+# module-level imports to what every command needs and load the rest lazily.
+
+USAGE = """\
+usage: timer-cli                                      open the dashboard
+       timer-cli --profile[=FILE]                     open it under cProfile; report on exit
+       timer-cli start DURATION [--name N] [--tag T]  start a timer (25m, 1h30m, 90s, 1:30:00, or minutes)
+       timer-cli stopwatch [--name N] [--tag T]       start a stopwatch
+       timer-cli list [--json]                        show timers and stopwatches
+       timer-cli lap|pause|resume|reset|delete ID     act on one item
+       timer-cli every INTERVAL [--for DURATION] [--from WHEN] [--name N] [--tag T]
+                                                      start a timer every INTERVAL, counted from WHEN
+       timer-cli cron "MIN HOUR DAY MONTH WEEKDAY" [--for DURATION] [--name N] [--tag T]
+                                                      start a timer at the times a cron expression matches
+       timer-cli chain DURATION... [--repeat N] [--name N] [--tag T]
+                                                      run timers back to back, N rounds (0: until stopped)
+       timer-cli schedules [--json]                   show schedules
+       timer-cli unschedule ID                        stop a schedule
+       timer-cli history [--since WHEN] [--json]      print logged events (WHEN: 2h, 3d, 1w, today, YYYY-MM-DD[ HH:MM])
+       timer-cli report [--since WHEN] [--until WHEN] [--format text|csv|json|columnar|parquet]
+                        [--table names|days] [--jobs N] [--output FILE]
+                                                      totals per name and lap splits per day
+       timer-cli daemon                               run the daemon in the foreground"""
+
+# How long to wait for an auto-started daemon to accept connections
+SPAWN_TIMEOUT = 3.0
+
+UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+class UsageError(Exception):
+    pass
+
+def parse_args(args, flags=(), options=()):
+    """Splits args into positionals, the set of flags given and {option: [values]}."""
+    positional, seen, values = [], set(), {}
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg in flags:
+            seen.add(arg)
+        elif arg in options:
+            if i + 1 >= len(args):
+                raise UsageError(f"{arg} needs a value")
+            values.setdefault(arg, []).append(args[i + 1])
+            i += 1
+        elif arg.startswith("--") and "=" in arg and arg.split("=", 1)[0] in options:
+            key, value = arg.split("=", 1)
+            values.setdefault(key, []).append(value)
+        elif arg.startswith("-") and arg != "-":
+            raise UsageError(f"Unknown option {arg}")
+        else:
+            positional.append(arg)
+        i += 1
+    return positional, seen, values
+
+def parse_duration(text) -> int:
+    """Seconds from 25m / 1h30m / 90s / 1:30:00 / 25:00, or a bare number of minutes."""
+    text = text.strip().lower()
+    try:
+        if ":" in text:
+            seconds = 0
+            for part in text.split(":"):
+                seconds = seconds * 60 + int(part)
+            return seconds
+        if text.isdigit():
+            return int(text) * 60 # Same as the dashboard's [MM] input
+        seconds, number = 0, ""
+        for ch in text.replace(" ", ""):
+            if ch.isdigit() or ch == ".":
+                number += ch
+            elif ch in UNITS and number:
+                seconds += float(number) * UNITS[ch]
+                number = ""
+            else:
+                raise ValueError
+        if number:
+            raise ValueError
+        return int(seconds)
+    except ValueError:
+        raise UsageError(f"Can't read duration {text!r}")
+
+def parse_since(text) -> float:
+    """Wall-clock timestamp from 2h / 3d / 1w / today / YYYY-MM-DD[ HH:MM[:SS]]."""
+    text = text.strip()
+    if text == "today":
+        now = time.localtime()
+        return time.mktime((now.tm_year, now.tm_mon, now.tm_mday, 0, 0, 0, 0, 0, -1))
+    unit = text[-1:].lower()
+    if unit in UNITS and text[:-1].replace(".", "", 1).isdigit():
+        return time.time() - float(text[:-1]) * UNITS[unit]
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return time.mktime(time.strptime(text, fmt))
+        except ValueError:
+            pass
+    raise UsageError(f"Can't read time {text!r}")
+
+# --- Talking to the daemon ---
+
+def spawn_daemon():
+    """Starts the daemon detached from this terminal."""
+    import subprocess
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return subprocess.Popen(
+        [sys.executable, "-m", f"{__package__}.daemon"], cwd=package_root,
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+def connect():
+    """A connection to the daemon, starting one if none is running."""
+    try:
+        return DaemonClient()
+    except DaemonUnavailable:
+        if sys.platform == "win32":
+            raise
+    proc = spawn_daemon()
+    deadline = time.monotonic() + SPAWN_TIMEOUT
+    while True:
+        time.sleep(0.02)
+        try:
+            return DaemonClient()
+        except DaemonUnavailable:
+            code = proc.poll()
+            if code is not None:
+                from .daemon import EXIT_SESSION_LOCKED
+                if code == EXIT_SESSION_LOCKED:
+                    raise DaemonUnavailable("The dashboard is running standalone and owns the timers; "
+                                            "close it (or run `timer-cli daemon` instead) first.")
+                raise DaemonUnavailable(f"The daemon exited with code {code}; run `timer-cli daemon` to see why.")
+            if time.monotonic() > deadline:
+                raise
+
+# --- Commands ---
+
+def item_seconds(state, now_ns) -> float:
+    """Remaining seconds for a timer, elapsed seconds for a stopwatch, as of now."""
+    elapsed = state["elapsed_ns"]
+    if state["state"] == "RUNNING":
+        elapsed += max(0, now_ns - state["wall_ns"])
+    if state["kind"] == "timer":
+        return max(0.0, state["duration"] - elapsed / 1e9)
+    return elapsed / 1e9
+
+def cmd_create(args, kind):
+    positional, _, values = parse_args(args, options=("--name", "--tag"))
+    request = {"kind": kind, "name": values.get("--name", [""])[-1], "tags": values.get("--tag", [])}
+    if kind == "timer":
+        if len(positional) != 1:
+            raise UsageError("start needs exactly one DURATION")
+        request["duration"] = parse_duration(positional[0])
+        if request["duration"] <= 0:
+            raise UsageError("Duration must be positive")
+    elif positional:
+        raise UsageError("stopwatch takes no positional arguments")
+    client = connect()
+    print(client.request("create", **request)["item"]["id"])
+    return 0
+
+def cmd_list(args):
+    positional, seen, _ = parse_args(args, flags=("--json",))
+    if positional:
+        raise UsageError("list takes no positional arguments")
+    items = connect().request("list")["items"]
+    now_ns = time.time_ns()
+    if "--json" in seen:
+        for state in items:
+            state["seconds"] = item_seconds(state, now_ns)
+            if state["kind"] == "timer" and state["state"] == "RUNNING" and state["seconds"] == 0:
+                state["state"] = "FINISHED"
+        print(json.dumps(items, indent=2))
+        return 0
+    if not items:
+        print("No timers or stopwatches.")
+        return 0
+    print(f"{'ID':<10}{'KIND':<11}{'NAME':<17}{'STATE':<10}TIME")
+    for state in items:
+        seconds = item_seconds(state, now_ns)
+        status = state["state"]
+        if state["kind"] == "timer":
+            if status == "RUNNING" and seconds == 0:
+                status = "FINISHED"
+            shown = f"{format_time(seconds)} left of {format_time(state['duration'])}"
+        else:
+            laps = len(state["laps"]) + state.get("laps_offset", 0)
+            shown = format_time(seconds) + (f" ({laps} laps)" if laps else "")
+        print(f"{state['id']:<10}{state['kind']:<11}{state['name']:<17}{status:<10}{shown}")
+    return 0
+
+def cmd_item(op, args):
+    positional, _, _ = parse_args(args)
+    if len(positional) != 1:
+        raise UsageError(f"{op} needs exactly one ID")
+    connect().request(op, id=positional[0])
+    return 0
+
+def cmd_schedule(args, rule):
+    positional, _, values = parse_args(args, options=("--for", "--from", "--repeat", "--name", "--tag"))
+    request = {"rule": rule, "name": values.get("--name", [""])[-1], "tags": values.get("--tag", [])}
+    if rule == "chain":
+        if not positional:
+            raise UsageError("chain needs one or more DURATIONs")
+        request["steps"] = [parse_duration(p) for p in positional]
+        if any(step <= 0 for step in request["steps"]):
+            raise UsageError("Durations must be positive")
+        try:
+            request["repeat"] = int(values.get("--repeat", ["1"])[-1])
+        except ValueError:
+            raise UsageError("--repeat needs a number")
+    else:
+        if len(positional) != 1:
+            raise UsageError(f"{rule} needs exactly one " + ("INTERVAL" if rule == "every" else "cron expression"))
+        request["duration"] = parse_duration(values["--for"][-1]) if "--for" in values else 0
+        if rule == "every":
+            from .schedule import MIN_INTERVAL
+            request["every"] = parse_duration(positional[0])
+            if request["every"] < MIN_INTERVAL:
+                raise UsageError(f"Interval must be at least {MIN_INTERVAL}s")
+            if "--from" in values:
+                request["anchor"] = parse_since(values["--from"][-1])
+        else:
+            request["cron"] = positional[0]
+    client = connect()
+    print(client.request("schedule", **request)["schedule"]["id"])
+    return 0
+
+def describe_schedule(state) -> str:
+    if state["rule"] == "chain":
+        steps = " > ".join(format_time(s) for s in state["steps"])
+        rounds = "until stopped" if not state["repeat"] else f"round {state['cycle'] + 1} of {state['repeat']}"
+        return f"{steps}, step {state['step'] + 1}, {rounds}"
+    rule = f"every {format_time(state['every'])}" if state["rule"] == "every" else state["cron"]
+    shown = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(state["next_ns"] / 1e9))
+    return rule + (f" for {format_time(state['duration'])}" if state["duration"] else "") + f", next {shown}"
+
+def cmd_schedules(args):
+    positional, seen, _ = parse_args(args, flags=("--json",))
+    if positional:
+        raise UsageError("schedules takes no positional arguments")
+    schedules = connect().request("list")["schedules"]
+    if "--json" in seen:
+        print(json.dumps(schedules, indent=2))
+        return 0
+    if not schedules:
+        print("No schedules.")
+        return 0
+    print(f"{'ID':<10}{'RULE':<7}{'NAME':<17}{'FIRED':<7}SCHEDULE")
+    for state in schedules:
+        print(f"{state['id']:<10}{state['rule']:<7}{state['name']:<17}{state['fired']:<7}{describe_schedule(state)}")
+    return 0
+
+def cmd_history(args):
+    positional, seen, values = parse_args(args, flags=("--json",), options=("--since",))
+    if positional:
+        raise UsageError("history takes no positional arguments")
+    since = parse_since(values["--since"][-1]) if "--since" in values else None
+    from .history import HistoryStream, parse_event_json
+    from .paths import get_log_path
+    stream = HistoryStream(get_log_path("events.jsonl"), since=since) # Skips archives older than since
+    selected = [] # Newest first
+    try:
+        while not stream.exhausted:
+            for line in stream.read_older():
+                try:
+                    wall = json.loads(line)["wall"]
+                except (ValueError, KeyError, TypeError):
+                    continue
+                if since is not None and wall < since:
+                    break
+                selected.append(line)
+            else:
+                continue
+            break # Reached events older than --since
+    finally:
+        stream.close()
+    for line in reversed(selected):
+        if "--json" in seen:
+            print(line)
+            continue
+        event = parse_event_json(line)
+        if event is None:
+            continue
+        ts, cat, action, obj_id, name, details = event
+        print(f"{ts}  {cat:<10} {action:<9} {obj_id or '':<9} {details}".rstrip())
+    return 0
+
+def _print_table(rows, columns, out):
+    if not rows:
+        print("(none)", file=out)
+        return
+    cells = [[("-" if row[c] is None else format_time(row[c]) if c == "timed_seconds" else str(row[c]))
+              for c in columns] for row in rows]
+    widths = [max(len(c), *(len(r[i]) for r in cells)) for i, c in enumerate(columns)]
+    print("  ".join(c.upper().ljust(w) for c, w in zip(columns, widths)).rstrip(), file=out)
+    for r in cells:
+        print("  ".join(v.ljust(w) for v, w in zip(r, widths)).rstrip(), file=out)
+
+def cmd_report(args):
+    from .report import build_report, to_columns, write_csv, write_parquet, FORMATS, TABLES
+    from .paths import get_log_path
+    positional, _, values = parse_args(args, options=("--since", "--until", "--format", "--table",
+                                                      "--jobs", "--output"))
+    if positional:
+        raise UsageError("report takes no positional arguments")
+    fmt = values.get("--format", ["text"])[-1]
+    if fmt not in FORMATS:
+        raise UsageError(f"Unknown format {fmt!r}")
+    table = values.get("--table", ["names"])[-1]
+    if table not in TABLES:
+        raise UsageError(f"Unknown table {table!r}")
+    output = values.get("--output", [None])[-1]
+    if fmt == "parquet" and not output:
+        raise UsageError("--format parquet needs --output FILE")
+    try:
+        jobs = int(values["--jobs"][-1]) if "--jobs" in values else None
+    except ValueError:
+        raise UsageError("--jobs needs a number")
+    since = parse_since(values["--since"][-1]) if "--since" in values else None
+    until = parse_since(values["--until"][-1]) if "--until" in values else None
+
+    report = build_report(get_log_path("events.jsonl"), since=since, until=until, jobs=jobs)
+    if fmt == "parquet":
+        try:
+            write_parquet(report.table(table), TABLES[table], output)
+        except ImportError:
+            print("timer-cli: --format parquet needs pyarrow (pip install pyarrow); "
+                  "--format columnar writes the same layout as JSON", file=sys.stderr)
+            return 1
+        return 0
+    out = open(output, "w", newline="", encoding="utf-8") if output else sys.stdout
+    try:
+        if fmt == "csv":
+            write_csv(report.table(table), TABLES[table], out)
+        elif fmt in ("json", "columnar"):
+            tables = {name: report.table(name) for name in TABLES}
+            if fmt == "columnar":
+                tables = {name: to_columns(rows, TABLES[name]) for name, rows in tables.items()}
+            json.dump(dict(tables, events=report.events, chunks=report.chunks), out, indent=2)
+            out.write("\n")
+        else:
+            print(f"{report.events} events", file=out)
+            for name in TABLES:
+                print(file=out)
+                _print_table(report.table(name), TABLES[name], out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+def cmd_daemon(args):
+    if args:
+        raise UsageError("daemon takes no arguments")
+    from .daemon import run_daemon
+    return run_daemon()
+
+def run(argv) -> int:
+    """Runs one subcommand and returns the process exit code."""
+    command, args = argv[0], argv[1:]
+    try:
+        if command in ("-h", "--help", "help"):
+            print(USAGE)
+            return 0
+        if command == "start":
+            return cmd_create(args, "timer")
+        if command == "stopwatch":
+            return cmd_create(args, "stopwatch")
+        if command == "list":
+            return cmd_list(args)
+        if command in ("lap", "pause", "resume", "reset", "delete", "unschedule"):
+            return cmd_item(command, args)
+        if command in ("every", "cron", "chain"):
+            return cmd_schedule(args, command)
+        if command == "schedules":
+            return cmd_schedules(args)
+        if command == "history":
+            return cmd_history(args)
+        if command == "report":
+            return cmd_report(args)
+        if command == "daemon":
+            return cmd_daemon(args)
+        raise UsageError(f"Unknown command {command!r}")
+    except UsageError as e:
+        print(f"timer-cli: {e}\n{USAGE}", file=sys.stderr)
+        return 2
+    except (DaemonError, DaemonUnavailable) as e:
+        print(f"timer-cli: {e}", file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        # Piped into something like `head` that stopped reading; don't fail again at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
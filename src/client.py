@@ -0,0 +1,91 @@
+import json
+import select
+import socket
+from .paths import get_log_path # Kept light: the CLI imports this module on every run
+
+SOCKET_FILENAME = "daemon.sock"
+
+def get_socket_path():
+    """Where the daemon listens: next to the log in ~/.timer_cli."""
+    return get_log_path(SOCKET_FILENAME)
+
+class DaemonError(Exception):
+    """A request the daemon refused; the message comes from the daemon."""
+
+class DaemonUnavailable(Exception):
+    """No daemon is listening, or the connection to it was lost."""
+
+class DaemonClient:
+    """
+    Blocking connection to the daemon speaking its line-oriented JSON.
+    Change entries that arrive between replies are handed to on_change.
+    """
+    def __init__(self, socket_path=None, timeout=5.0):
+        self.socket_path = socket_path or get_socket_path()
+        self.on_change = None
+        self._buffer = b""
+        self._next_req = 0
+        if not hasattr(socket, "AF_UNIX"):
+            raise DaemonUnavailable("Unix domain sockets are not available on this platform")
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        try:
+            self.sock.connect(self.socket_path)
+        except OSError as e:
+            self.sock.close()
+            raise DaemonUnavailable(f"No daemon at {self.socket_path}: {e}")
+
+    def fileno(self) -> int:
+        return self.sock.fileno()
+
+    def close(self):
+        self.sock.close()
+
+    def _fill(self):
+        try:
+            data = self.sock.recv(65536)
+        except OSError as e:
+            raise DaemonUnavailable(f"Lost connection to the daemon: {e}")
+        if not data:
+            raise DaemonUnavailable("The daemon closed the connection")
+        self._buffer += data
+
+    def _messages(self):
+        """Complete messages already received."""
+        *lines, self._buffer = self._buffer.split(b"\n")
+        return [json.loads(line) for line in lines if line]
+
+    def _dispatch(self, message) -> bool:
+        """Hands a change entry to on_change; returns False for replies."""
+        if "op" not in message:
+            return False
+        if self.on_change is not None:
+            self.on_change(message)
+        return True
+
+    def request(self, op, **args) -> dict:
+        """Sends one request and waits for its reply, applying changes that arrive first."""
+        self._next_req += 1
+        req = self._next_req
+        message = dict(args, op=op, req=req)
+        try:
+            self.sock.sendall((json.dumps(message, separators=(",", ":")) + "\n").encode("utf-8"))
+        except OSError as e:
+            raise DaemonUnavailable(f"Lost connection to the daemon: {e}")
+        while True:
+            for message in self._messages():
+                if self._dispatch(message) or message.get("req") != req:
+                    continue
+                if not message.get("ok"):
+                    raise DaemonError(message.get("error", "Request failed"))
+                return message
+            self._fill()
+
+    def poll(self) -> int:
+        """Applies whatever changes have arrived, without blocking. Returns how many."""
+        count = 0
+        while select.select([self.sock], [], [], 0)[0]:
+            self._fill()
+            for message in self._messages():
+                count += self._dispatch(message)
+        return count
@@ -0,0 +1,43 @@
+import time
+
+NS_PER_SEC = 1_000_000_000
+
+class Clock:
+    """
+    Time source for timers and stopwatches. Intervals are measured with
+    monotonic_ns(), which never jumps with NTP slews, manual clock changes or
+    suspend/resume; wall_ns() is only used for display, logging and carrying
+    state across restarts.
+    """
+    def monotonic_ns(self) -> int:
+        return time.monotonic_ns()
+
+    def wall_ns(self) -> int:
+        return time.time_ns()
+
+class ManualClock(Clock):
+    """Clock that only moves when told to, for driving the manager deterministically."""
+    def __init__(self, monotonic_ns=0, wall_ns=None):
+        self._mono = monotonic_ns
+        self._wall = time.time_ns() if wall_ns is None else wall_ns
+
+    def monotonic_ns(self) -> int:
+        return self._mono
+
+    def wall_ns(self) -> int:
+        return self._wall
+
+    def advance(self, seconds: float = 0.0, ns: int = 0):
+        """Moves both clocks forward together."""
+        step = ns + round(seconds * NS_PER_SEC)
+        self._mono += step
+        self._wall += step
+
+    def set_wall(self, wall_ns: int):
+        """Steps only the wall clock, like an NTP correction or a manual change."""
+        self._wall = wall_ns
+
+SYSTEM_CLOCK = Clock()
+
+def to_seconds(ns: int) -> float:
+    return ns / NS_PER_SEC
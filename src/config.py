@@ -0,0 +1,28 @@
+import json
+from .paths import get_log_path
+
+# Settings read from ~/.timer_cli/config.json; missing keys fall back to these
+DEFAULTS = {
+    "log_flush_interval": 0.5, # Seconds the log writer may hold records before writing
+    "log_rotate_bytes": 16 * 1024 * 1024, # Compress a log into an archived segment past this size (0: never)
+    "log_rotate_days": 0, # ...or once its oldest line is this many days old (0: never)
+    "session_persistence": True, # Restore timers and stopwatches on the next start
+    "shared_state": False, # Dashboards without a daemon share one table of timers (~/.timer_cli/shared.tbl)
+    "notifications": [{"type": "sound"}], # Sinks for finished timers (see notify.py)
+    "notify_workers": 4, # Threads shared by all notification sinks
+    "notify_debounce": 0.05, # Seconds to gather timers finishing together into one alert
+    "lap_spill": False, # Keep laps evicted from memory in ~/.timer_cli/laps instead of dropping them
+    "visual_bell": False, # The dashboard flashes instead of beeping for "bell" notifications
+}
+
+def load_config(config_filename="config.json"):
+    """Returns the user's settings merged over DEFAULTS. A broken file is ignored."""
+    config = dict(DEFAULTS)
+    try:
+        with open(get_log_path(config_filename), "r") as f:
+            user = json.load(f)
+        if isinstance(user, dict):
+            config.update(user)
+    except (OSError, ValueError):
+        pass
+    return config
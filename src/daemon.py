@@ -0,0 +1,343 @@
+import asyncio
+import json
+import math
+import os
+import signal
+import socket
+import sys
+from .managers import TimeManager
+from .models import Timer, Stopwatch
+from .schedule import Schedule, MIN_INTERVAL
+from .clock import NS_PER_SEC
+from .persistence import SessionJournal
+from .notify import build_notifier
+from .logging_setup import setup_logging, shutdown_logging, get_log_path, log_action
+from .config import load_config
+from .paths import get_lap_spill_dir
+from .client import get_socket_path, DaemonClient, DaemonError, DaemonUnavailable
+
+# Exit code when another session holds the saved timers (see SessionJournal.acquire)
+EXIT_SESSION_LOCKED = 3
+# A subscriber this far behind is dropped rather than buffered without bound
+MAX_CLIENT_BACKLOG = 1024 * 1024
+
+def encode(message) -> bytes:
+    return (json.dumps(message, separators=(",", ":")) + "\n").encode("utf-8")
+
+def _text(request, key, default=""):
+    """A string field of a request; anything else is refused before it reaches the manager."""
+    value = request.get(key, default)
+    if not isinstance(value, str):
+        raise DaemonError(f"\"{key}\" must be a string")
+    return value
+
+def _strings(request, key):
+    values = request.get(key, [])
+    if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+        raise DaemonError(f"\"{key}\" must be a list of strings")
+    return values
+
+class ChangeFeed:
+    """
+    Takes the session journal's place on the manager: every change is passed
+    on to the real journal (if any) and broadcast to subscribed clients as
+    the same entries the journal writes, so clients can fold them into their
+    own copy with persistence.apply_change().
+    """
+    def __init__(self, journal, broadcast):
+        self.journal = journal
+        self.broadcast = broadcast
+
+    def put(self, item):
+        if self.journal is not None: self.journal.put(item)
+        self.broadcast([{"op": "put", "state": item.to_state()}])
+
+    def touch(self, item):
+        if self.journal is not None: self.journal.touch(item)
+        self.broadcast([{"op": "update", "id": item.id, "fields": item.timing_state()}])
+
+    def lap(self, item, value):
+        if self.journal is not None: self.journal.lap(item, value)
+        self.broadcast([{"op": "lap", "id": item.id, "t": value}])
+
+    def delete(self, item_id):
+        if self.journal is not None: self.journal.delete(item_id)
+        self.broadcast([{"op": "del", "id": item_id}])
+
+    def counts(self, timers, stopwatches):
+        if self.journal is not None: self.journal.counts(timers, stopwatches)
+        self.broadcast([{"op": "counts", "counts": {"timers": timers, "stopwatches": stopwatches}}])
+
+    def record_many(self, puts=(), touches=(), deletes=()):
+        if self.journal is not None: self.journal.record_many(puts, touches, deletes)
+        entries = [{"op": "put", "state": item.to_state()} for item in puts]
+        entries.extend({"op": "update", "id": item.id, "fields": item.timing_state()} for item in touches)
+        entries.extend({"op": "del", "id": item_id} for item_id in deletes)
+        if entries:
+            self.broadcast(entries)
+
+class TimerDaemon:
+    """
+    Owns one TimeManager and serves it over a Unix domain socket.
+
+    The protocol is line-oriented JSON. Each request is an object with an
+    "op" and optional "req" tag that is echoed in the reply:
+
+        {"op": "create", "kind": "timer", "duration": 90, "name": "tea", "req": 1}
+        -> {"req": 1, "ok": true, "item": {...}}
+
+    Ops: create, pause, resume, lap, reset, delete (by "id"), toggle_all,
+    bulk (action, seconds and select() filters), schedule (rule "every"
+    with "every" seconds and optional "anchor" wall seconds, "cron" with a
+    "cron" expression, or "chain" with "steps" and "repeat"), unschedule
+    (by "id"), list and subscribe. After
+    subscribe the client also receives {"op": ...} change entries as they
+    happen; they are always sent before the reply to the request that
+    caused them. Timers expire on an asyncio timer armed for the next
+    deadline, so an idle daemon doesn't wake at all.
+    """
+    def __init__(self, manager: TimeManager, socket_path=None):
+        self.manager = manager
+        self.socket_path = socket_path or get_socket_path()
+        self.subscribers = set()
+        self.server = None
+        self._wake = None
+
+    # --- Change fan-out ---
+
+    def broadcast(self, entries):
+        data = b"".join(encode(entry) for entry in entries)
+        for writer in list(self.subscribers):
+            if writer.transport.get_write_buffer_size() > MAX_CLIENT_BACKLOG:
+                self.subscribers.discard(writer)
+                writer.close() # Too slow; it can reconnect and resubscribe
+                continue
+            writer.write(data)
+
+    # --- Requests ---
+
+    def _item(self, request, kind=None):
+        item = self.manager.get(_text(request, "id"))
+        if item is None or (kind is not None and not isinstance(item, kind)):
+            noun = kind.__name__.lower() if kind is not None else "item"
+            raise DaemonError(f"No such {noun}: {request.get('id')}")
+        return item
+
+    def _snapshot(self):
+        return {
+            "items": [item.to_state() for item in self.manager.select()],
+            "counts": {"timers": self.manager.timer_count, "stopwatches": self.manager.stopwatch_count},
+            "schedules": [schedule.to_state() for schedule in self.manager.scheduler],
+        }
+
+    def _schedule(self, request) -> Schedule:
+        rule = request.get("rule")
+        name, tags = _text(request, "name"), _strings(request, "tags")
+        if rule == "chain":
+            steps = request.get("steps")
+            if not isinstance(steps, list) or not all(isinstance(s, (int, float)) for s in steps):
+                raise DaemonError("A chain needs a list of step durations in seconds")
+            repeat = request.get("repeat", 1)
+            if not isinstance(repeat, int):
+                raise DaemonError("\"repeat\" must be a whole number")
+            return Schedule.chain(steps, repeat, name, tags)
+        duration = request.get("duration", 0)
+        if not isinstance(duration, (int, float)) or duration < 0:
+            raise DaemonError("Scheduled timer duration must be a number of seconds")
+        if rule == "every":
+            every = request.get("every")
+            if isinstance(every, bool) or not isinstance(every, (int, float)) or not math.isfinite(every):
+                raise DaemonError("An interval schedule needs \"every\" in seconds")
+            if every < MIN_INTERVAL:
+                raise DaemonError(f"\"every\" must be at least {MIN_INTERVAL} s")
+            anchor = request.get("anchor")
+            if anchor is not None and not isinstance(anchor, (int, float)):
+                raise DaemonError("\"anchor\" must be a wall-clock time in seconds")
+            anchor_ns = self.manager.clock.wall_ns() if anchor is None else round(anchor * NS_PER_SEC)
+            return Schedule.interval(every, anchor_ns, duration, name, tags)
+        if rule == "cron":
+            return Schedule.crontab(_text(request, "cron"), duration, name, tags)
+        raise DaemonError(f"Unknown schedule rule: {rule}")
+
+    def handle(self, request, writer) -> dict:
+        op = request.get("op")
+        manager = self.manager
+        if op == "create":
+            name, tags = _text(request, "name"), _strings(request, "tags")
+            if request.get("kind", "timer") == "timer":
+                duration = request.get("duration")
+                if not isinstance(duration, (int, float)) or duration <= 0:
+                    raise DaemonError("Timer duration must be a positive number of seconds")
+                item = manager.add_timer(duration, name, tags)
+            else:
+                item = manager.add_stopwatch(name, tags)
+            return {"item": item.to_state()}
+        if op in ("pause", "resume", "reset"):
+            item = self._item(request)
+            getattr(manager, op)(item)
+            return {"item": item.to_state()}
+        if op == "lap":
+            if not manager.lap(self._item(request, Stopwatch)):
+                raise DaemonError("Stopwatch is not running")
+            return {}
+        if op == "delete":
+            item = self._item(request)
+            if isinstance(item, Timer):
+                manager.remove_timer(item)
+            else:
+                manager.remove_stopwatch(item)
+            return {}
+        if op == "toggle_all":
+            manager.toggle_all_pause()
+            return {}
+        if op == "bulk":
+            selector = {k: _text(request, k) for k in ("prefix", "tag", "state") if k in request}
+            if "ids" in request:
+                selector["ids"] = _strings(request, "ids")
+            seconds = request.get("seconds", 0)
+            if isinstance(seconds, bool) or not isinstance(seconds, (int, float)) or not math.isfinite(seconds):
+                raise DaemonError("\"seconds\" must be a number")
+            return {"count": manager.bulk(_text(request, "action"), seconds, **selector)}
+        if op == "schedule":
+            return {"schedule": manager.add_schedule(self._schedule(request)).to_state()}
+        if op == "unschedule":
+            if not manager.remove_schedule(_text(request, "id")):
+                raise DaemonError(f"No such schedule: {request.get('id')}")
+            return {}
+        if op == "list":
+            return self._snapshot()
+        if op == "subscribe":
+            self.subscribers.add(writer)
+            return self._snapshot()
+        raise DaemonError(f"Unknown op: {op}")
+
+    async def serve_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = {}
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        request = {}
+                        raise DaemonError("Requests must be JSON objects")
+                    reply = self.handle(request, writer)
+                    reply["ok"] = True
+                except (ValueError, TypeError, DaemonError) as e:
+                    reply = {"ok": False, "error": str(e)}
+                except Exception as e: # A bug must cost one request, not the connection
+                    log_action("System", "Daemon", f"Request {request.get('op')!r} failed: {e!r}")
+                    reply = {"ok": False, "error": f"Internal error: {e}"}
+                if "req" in request:
+                    reply["req"] = request["req"]
+                writer.write(encode(reply))
+                self._wake.set() # The request may have moved the next deadline
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.subscribers.discard(writer)
+            writer.close()
+
+    # --- Expiry ---
+
+    async def expire_timers(self):
+        clock = self.manager.clock
+        while True:
+            self.manager.update()
+            deadline = self.manager.next_deadline()
+            timeout = None
+            if deadline is not None:
+                timeout = max(0.0, (deadline - clock.monotonic_ns()) / NS_PER_SEC)
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    # --- Lifecycle ---
+
+    def _claim_socket(self):
+        """Removes a stale socket file, refusing to start if another daemon answers on it."""
+        if not os.path.exists(self.socket_path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except OSError:
+            os.unlink(self.socket_path) # Left behind by a daemon that died
+        else:
+            raise DaemonError(f"A daemon is already listening on {self.socket_path}")
+        finally:
+            probe.close()
+
+    async def run(self):
+        self._wake = asyncio.Event()
+        self._claim_socket()
+        self.server = await asyncio.start_unix_server(self.serve_client, path=self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        stop = asyncio.get_running_loop().create_future()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            asyncio.get_running_loop().add_signal_handler(signum, lambda: stop.done() or stop.set_result(None))
+        log_action("System", "Daemon", f"Listening on {self.socket_path}")
+        expiry = asyncio.ensure_future(self.expire_timers())
+        try:
+            await stop
+        finally:
+            expiry.cancel()
+            self.server.close()
+            await self.server.wait_closed()
+            for writer in list(self.subscribers):
+                writer.close()
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+            log_action("System", "Daemon", "Stopped")
+
+def run_daemon(socket_path=None):
+    """Runs the daemon in the foreground until SIGTERM/SIGINT. Returns an exit code."""
+    if not hasattr(socket, "AF_UNIX") or sys.platform == "win32":
+        print("The daemon needs Unix domain sockets, which this platform doesn't provide.", file=sys.stderr)
+        return 1
+    try:
+        DaemonClient(socket_path).close()
+        print(f"A daemon is already listening on {socket_path or get_socket_path()}", file=sys.stderr)
+        return 1
+    except DaemonUnavailable:
+        pass
+    config = load_config()
+    setup_logging(flush_interval=config["log_flush_interval"], rotate_bytes=config["log_rotate_bytes"],
+                  rotate_age=config["log_rotate_days"] * 86400)
+    manager = TimeManager(notifier=build_notifier(config),
+                          lap_spill_dir=get_lap_spill_dir() if config["lap_spill"] else None)
+    journal = None
+    if config["session_persistence"]:
+        journal = SessionJournal(os.path.dirname(get_log_path()))
+        if not journal.acquire():
+            print("Another timer-cli session owns the saved timers; close it before starting the daemon.",
+                  file=sys.stderr)
+            shutdown_logging()
+            return EXIT_SESSION_LOCKED
+        manager.restore(*journal.load())
+        journal.start()
+    daemon = TimerDaemon(manager, socket_path)
+    manager.journal = ChangeFeed(journal, daemon.broadcast)
+    try:
+        asyncio.run(daemon.run())
+    except DaemonError as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        if journal is not None:
+            manager.journal = journal
+            manager.checkpoint()
+            journal.close()
+        manager.notifier.close()
+        shutdown_logging()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(run_daemon())
@@ -0,0 +1,474 @@
+import calendar
+import json
+import mmap
+import os
+import re
+import time
+from collections import OrderedDict, deque
+from typing import List, Optional, Tuple
+from .segments import segment_paths, read_header, read_segment, overlaps
+
+LINE_PATTERN = re.compile(r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) \[([A-Z]+)\] \[([^\]]+)\] ([^-]+)- (.*)')
+ID_PATTERN = re.compile(r'ID: ([a-f0-9]+)')
+NAME_PATTERN = re.compile(r'Name: ([^,]+)')
+DURATION_PATTERN = re.compile(r'Duration: (\d+)s')
+LAP_PATTERN = re.compile(r'Lap Time: ([0-9.eE+-]+)')
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+CHUNK_SIZE = 64 * 1024
+
+def parse_line(line):
+    """
+    Parses one log line into (ts, category, action, details), or None if the
+    line is not a structured action.
+    """
+    match = LINE_PATTERN.search(line)
+    if not match: return None
+    ts, level, cat, action, details = match.groups()
+    return ts, cat, action.strip(), details.strip()
+
+def clean_details(details):
+    return ID_PATTERN.sub('', details).strip().strip(',').strip()
+
+# Events are (ts, category, action, object id or None, name or None, display details)
+
+def parse_event_text(line):
+    """Event from a human-readable log line. Regex based; only used for legacy logs."""
+    parsed = parse_line(line)
+    if parsed is None: return None
+    ts, cat, action, details = parsed
+    if cat == "System":
+        return ts, cat, action, None, None, details
+    id_match = ID_PATTERN.search(details)
+    name_match = NAME_PATTERN.search(details)
+    return (ts, cat, action, id_match.group(1) if id_match else None,
+            name_match.group(1).strip() if name_match else None, clean_details(details))
+
+def event_details(record) -> str:
+    """Display details for a structured record, built from its typed fields."""
+    if "text" in record:
+        return record["text"]
+    parts = []
+    if record.get("name") is not None and record["action"] == "Started":
+        parts.append(f"Name: {record['name']}")
+    if record.get("duration") is not None:
+        parts.append(f"Duration: {record['duration']}s")
+    if record.get("lap") is not None:
+        parts.append(f"Lap Time: {record['lap']}")
+    return ", ".join(parts)
+
+def parse_event_json(line):
+    """Event from one line of the JSONL event stream."""
+    try:
+        record = json.loads(line)
+        ts = time.strftime(DATE_FORMAT, time.localtime(record["wall"]))
+        return (ts, record["cat"], record["action"], record.get("id"),
+                record.get("name"), event_details(record))
+    except (ValueError, KeyError, TypeError):
+        return None
+
+def legacy_event_record(line):
+    """Converts a human-readable log line into a JSONL record for the event stream."""
+    parsed = parse_line(line)
+    if parsed is None: return None
+    ts, cat, action, details = parsed
+    record = {"wall": time.mktime(time.strptime(ts, DATE_FORMAT)), "cat": cat, "action": action}
+    if cat == "System":
+        record["text"] = details
+        return record
+    for key, pattern, cast in (("id", ID_PATTERN, str), ("name", NAME_PATTERN, str),
+                               ("duration", DURATION_PATTERN, int), ("lap", LAP_PATTERN, float)):
+        match = pattern.search(details)
+        if match:
+            try:
+                record[key] = cast(match.group(1).strip())
+            except ValueError:
+                pass
+    return record
+
+def object_key(event):
+    """Returns (effective id, display id) used to group an event."""
+    ts, cat, action, obj_id, name, details = event
+    if obj_id:
+        return obj_id, obj_id
+    if action == "Started" and name:
+        return f"legacy_{name}", "Unknown"
+    return "Unknown", "Unknown"
+
+def ts_seconds(ts: str) -> int:
+    """Seconds for a "%Y-%m-%d %H:%M:%S" stamp; only differences are meaningful."""
+    return calendar.timegm((int(ts[0:4]), int(ts[5:7]), int(ts[8:10]),
+                            int(ts[11:13]), int(ts[14:16]), int(ts[17:19])))
+
+def format_delta(seconds: int) -> str:
+    h, rem = divmod(max(0, seconds), 3600)
+    m, s = divmod(rem, 60)
+    return f"+{h:02}:{m:02}:{s:02}"
+
+def format_group(group, width) -> List[str]:
+    """Display lines for one group: header, chronological events, separator."""
+    id_display = f" (ID: {group['id']})" if group['id'] != "Unknown" else ""
+    lines = [f"[{group['type']}] {group['name'] or 'Unknown'}{id_display}"]
+    events = group["events"]
+    start_ts = group["start_ts"] or (events[0][0] if events else None)
+    start = ts_seconds(start_ts) if start_ts else 0
+    lap_count = 0
+    for ts, action, details in events:
+        delta_str = format_delta(ts_seconds(ts) - start)
+        if action == "Lap":
+            lap_count += 1
+            display_action = f"Lap {lap_count}"
+            if details: display_action += f": {details}"
+        else:
+            display_action = f"{action} {details}".strip()
+        lines.append(f"  {ts} ({delta_str}) > {display_action}")
+    lines.append("-" * (width - 2))
+    return lines
+
+def format_system(events_newest_first, width) -> List[str]:
+    """Display lines for the trailing [SYSTEM EVENTS] section."""
+    lines = ["", "[SYSTEM EVENTS]"]
+    lines.extend(f"  {ts} > {action} {details}" for ts, action, details in events_newest_first)
+    lines.append("-" * (width - 2))
+    return lines
+
+class ReverseLineReader:
+    """
+    Reads a file's lines from a byte offset backwards, one chunk at a time,
+    through mmap when the platform allows it. Yields (offset, line) pairs with
+    the newest line first. With `data` the lines come from those bytes
+    (e.g. a decompressed segment) instead of the file.
+    """
+    def __init__(self, path, end: int, chunk_size: int = CHUNK_SIZE, data: Optional[bytes] = None):
+        self.chunk_size = chunk_size
+        self._pos = end
+        self._file = None
+        self._map = data
+        if data is not None:
+            return
+        self._file = open(path, "rb")
+        if end > 0:
+            try:
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                self._map = None # Fall back to seek/read
+
+    @property
+    def exhausted(self) -> bool:
+        return self._pos <= 0
+
+    def _read(self, start, end) -> bytes:
+        if self._map is not None:
+            return self._map[start:end]
+        self._file.seek(start)
+        return self._file.read(end - start)
+
+    def read_chunk(self) -> List[Tuple[int, str]]:
+        """Returns the next batch of complete lines, newest first."""
+        if self._pos <= 0:
+            return []
+        size = self.chunk_size
+        while True:
+            start = max(0, self._pos - size)
+            data = self._read(start, self._pos)
+            if start == 0:
+                break
+            cut = data.find(b"\n")
+            if cut != -1:
+                # Bytes before the first newline belong to a line in the previous chunk
+                start += cut + 1
+                data = data[cut + 1:]
+                break
+            size *= 2 # A single line longer than the chunk
+
+        parts = data.split(b"\n")
+        parts.pop() # Chunks always end right after a newline
+        lines = []
+        offset = self._pos
+        for raw in reversed(parts):
+            offset -= len(raw) + 1
+            lines.append((offset, raw.decode("utf-8", errors="replace").rstrip("\r")))
+        self._pos = start
+        return lines
+
+    def close(self):
+        if self._file is None:
+            self._map = None
+            return
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+class HistoryStream:
+    """
+    Newest-first view of the log file and its archived segments, as one
+    stream. Older lines are read backwards on demand: a segment is only
+    decompressed once reading reaches it, and with since/until segments whose
+    time-range header lies outside the window are skipped unread. Lines
+    appended while the view is open are picked up by poll() without
+    re-reading the rest of the file. With live=False only the archived
+    segments are read.
+    """
+    def __init__(self, path, chunk_size: int = CHUNK_SIZE, since: Optional[float] = None,
+                 until: Optional[float] = None, live: bool = True):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.since = since
+        self.until = until
+        self.live = live
+        self.generation = 0 # Bumped when the file is truncated, replaced or rotated
+        self._open()
+
+    def _open(self):
+        self._older: List[str] = [] # Newest to oldest, as read backwards
+        self._newer: List[str] = [] # Appended since opening, oldest to newest
+        self._reader: Optional[ReverseLineReader] = None
+        self._tail_pos = 0
+        self._ino = None
+        self._segments = segment_paths(self.path) # Oldest first; popped from the end
+        self.segments_read = 0
+        self.source = self.path # File the reader is in: the live log or a segment
+        try:
+            st = os.stat(self.path) if self.live else None
+        except OSError:
+            st = None
+        if st is None:
+            self.missing = not self._segments
+            return
+        self.missing = False
+        self._ino = st.st_ino
+        size = st.st_size
+        self._tail_pos = self._last_line_end(size)
+        self._reader = ReverseLineReader(self.path, self._tail_pos, self.chunk_size)
+
+    def _last_line_end(self, size) -> int:
+        """Offset just past the last complete line; a partial line is left for poll()."""
+        with open(self.path, "rb") as f:
+            pos = size
+            while pos > 0:
+                start = max(0, pos - self.chunk_size)
+                f.seek(start)
+                data = f.read(pos - start)
+                cut = data.rfind(b"\n")
+                if cut != -1:
+                    return start + cut + 1
+                pos = start
+        return 0
+
+    def __len__(self):
+        return len(self._newer) + len(self._older)
+
+    @property
+    def exhausted(self) -> bool:
+        return (self._reader is None or self._reader.exhausted) and not self._segments
+
+    def _next_segment(self) -> bool:
+        """Moves on to the newest unread segment in the time window."""
+        while self._segments:
+            path = self._segments.pop()
+            header = read_header(path)
+            if not overlaps(header, self.since, self.until):
+                if self.since is not None and header.get("last") is not None and header["last"] < self.since:
+                    self._segments = [] # The rest are older still
+                continue
+            try:
+                data = read_segment(path)
+            except (OSError, EOFError):
+                continue # Unreadable archive: skip it rather than end the history here
+            if self._reader is not None:
+                self._reader.close()
+            self._reader = ReverseLineReader(path, len(data), self.chunk_size, data=data)
+            self.source = path
+            self.segments_read += 1
+            return True
+        return False
+
+    def read_older(self, keep: bool = True, offsets: bool = False) -> list:
+        """
+        Loads one more chunk of older lines and returns them, newest first.
+        With keep=False they are only handed over, not retained for line().
+        With offsets=True they come as (offset, line) pairs, offsets being
+        into `source` (for a segment, into its read_segment() bytes).
+        """
+        if self._reader is None or self._reader.exhausted:
+            if not self._next_segment():
+                return []
+        chunk = self._reader.read_chunk()
+        lines = [line for _, line in chunk]
+        if keep:
+            self._older.extend(lines)
+        return chunk if offsets else lines
+
+    def ensure(self, count: int):
+        """Reads backwards until at least count lines are loaded or the file is exhausted."""
+        while len(self) < count and not self.exhausted:
+            self.read_older()
+
+    def line(self, index: int) -> str:
+        """Line by newest-first position."""
+        n_newer = len(self._newer)
+        if index < n_newer:
+            return self._newer[n_newer - 1 - index]
+        return self._older[index - n_newer]
+
+    def lines(self, start: int, count: int) -> List[str]:
+        self.ensure(start + count)
+        return [self.line(i) for i in range(start, min(start + count, len(self)))]
+
+    def poll(self, offsets: bool = False) -> list:
+        """
+        Returns complete lines appended since the last call, oldest first;
+        with offsets=True as (offset, line) pairs.
+        """
+        if not self.live: return []
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return []
+        size = st.st_size
+        if self.missing or size < self._tail_pos or (self._ino is not None and st.st_ino != self._ino):
+            # Created, truncated or rotated underneath us: start over
+            self.close()
+            self.generation += 1
+            self._open()
+            return []
+        self._ino = st.st_ino
+        if size == self._tail_pos:
+            return []
+        with open(self.path, "rb") as f:
+            f.seek(self._tail_pos)
+            data = f.read(size - self._tail_pos)
+        cut = data.rfind(b"\n")
+        if cut == -1:
+            return []
+        offset = self._tail_pos
+        self._tail_pos += cut + 1
+        raws = data[:cut].split(b"\n")
+        new = [raw.decode("utf-8", errors="replace").rstrip("\r") for raw in raws]
+        self._newer.extend(new)
+        if not offsets:
+            return new
+        starts = []
+        for raw in raws:
+            starts.append(offset)
+            offset += len(raw) + 1
+        return list(zip(starts, new))
+
+    def close(self):
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+class GroupedHistory:
+    """
+    Groups log events by object ID, most recently active group first, with
+    each group's events in chronological order. Lines are folded in as they
+    are streamed, older ones through feed_older() and appended ones through
+    feed_newer(), so only the part of the log the viewport reaches is parsed.
+    """
+    def __init__(self, stream: Optional[HistoryStream] = None, parse=parse_event_text):
+        self.stream = stream
+        self.parse = parse
+        self._reset()
+
+    def _reset(self):
+        self.groups = OrderedDict() # effective id -> group, newest activity first
+        self.system_events = deque() # (ts, action, details), oldest first
+        self.size = 1 # Leading blank line
+        self._generation = self.stream.generation if self.stream else 0
+
+    def _group_for(self, event, newest_first):
+        ts, cat, action, obj_id, name, details = event
+        effective_id, display_id = object_key(event)
+
+        group = self.groups.get(effective_id)
+        if group is None:
+            group = {"id": display_id, "type": cat, "name": None, "events": deque(), "start_ts": None}
+            self.groups[effective_id] = group
+            if not newest_first:
+                self.groups.move_to_end(effective_id, last=False)
+            self.size += 2 # Header + separator
+        elif not newest_first:
+            self.groups.move_to_end(effective_id, last=False)
+
+        # Later lines win for the display name, like a chronological pass would
+        if name and (group["name"] is None or not newest_first):
+            group["name"] = name
+        if action == "Started":
+            if group["start_ts"] is None or not newest_first:
+                group["start_ts"] = ts
+        return group
+
+    def _add(self, line, newest_first):
+        event = self.parse(line)
+        if event is None: return
+        ts, cat, action, obj_id, name, details = event
+
+        if cat == "System":
+            if not self.system_events:
+                self.size += 3 # Blank + title + separator
+            if newest_first:
+                self.system_events.appendleft((ts, action, details))
+            else:
+                self.system_events.append((ts, action, details))
+            self.size += 1
+            return
+
+        group = self._group_for(event, newest_first)
+        if newest_first:
+            group["events"].appendleft((ts, action, details))
+        else:
+            group["events"].append((ts, action, details))
+        self.size += 1
+
+    def feed_older(self, lines_newest_first):
+        for line in lines_newest_first:
+            self._add(line, True)
+
+    def feed_newer(self, lines_oldest_first):
+        for line in lines_oldest_first:
+            self._add(line, False)
+
+    def sync(self) -> int:
+        """Folds lines appended to the stream since the last call and returns how many."""
+        if self.stream is None: return 0
+        new = self.stream.poll()
+        if self.stream.generation != self._generation:
+            self._reset()
+            return 0
+        self.feed_newer(new)
+        return len(new)
+
+    def ensure(self, count: int):
+        """Streams older lines until at least count display lines exist."""
+        if self.stream is None: return
+        while self.size < count and not self.stream.exhausted:
+            self.feed_older(self.stream.read_older())
+
+    def render(self, width, start, count) -> List[str]:
+        """Display lines [start, start + count), building only the groups they touch."""
+        out = []
+        pos = 0
+        end = start + count
+
+        def take(block_len, build):
+            nonlocal pos
+            if pos + block_len > start and pos < end:
+                block = build()
+                out.extend(block[max(0, start - pos):end - pos])
+            pos += block_len
+
+        take(1, lambda: [""])
+        for group in self.groups.values():
+            if pos >= end: break
+            take(len(group["events"]) + 2, lambda g=group: format_group(g, width))
+        if self.system_events and pos < end:
+            take(len(self.system_events) + 3, lambda: format_system(reversed(self.system_events), width))
+        return out
+
+def build_grouped_view(log_lines, width):
+    """Builds the whole grouped view for an in-memory list of log lines."""
+    grouped = GroupedHistory()
+    grouped.feed_older(reversed(log_lines))
+    return grouped.render(width, 0, grouped.size)
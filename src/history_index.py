@@ -0,0 +1,352 @@
+import hashlib
+import json
+import os
+import struct
+from contextlib import contextmanager
+from itertools import islice
+from typing import Dict, List, Optional
+from .history import HistoryStream, GroupedHistory, parse_event_json, object_key, format_group, format_system
+
+try:
+    import fcntl
+except ImportError: # Windows: no advisory locks, so one indexing process is assumed
+    fcntl = None
+
+INDEX_VERSION = 1
+# One record per indexed event: (byte offset in the log, previous record of the same group)
+RECORD = struct.Struct("<QI")
+NO_RECORD = 0xFFFFFFFF
+HEAD_BYTES = 4096
+READ_SIZE = 1024 * 1024
+
+class HistoryIndex:
+    """
+    Persistent sidecar index of the event stream, grouped by Timer/Stopwatch ID.
+
+    `<log>.idx` is a small JSON document with one entry per object (name, type,
+    start/last timestamps, lap count) plus the byte offset the index has
+    reached. `<log>.idx.bin` holds fixed-size event records chained per group,
+    so the byte offsets of one group's events can be fetched without touching
+    anyone else's. update() only parses lines appended since the last run and
+    starts over if the log was rotated or truncated, bumping `generation`.
+    Archived segments are not indexed.
+
+    Several dashboards may keep the same index. Loading and extending it
+    happen under an exclusive flock on `<log>.idx.lock`, and update() first
+    reloads the JSON if another process saved it since, so records are
+    only ever appended by a process that knows how many there are.
+    """
+    def __init__(self, log_path, index_path: Optional[str] = None, parse=parse_event_json):
+        self.log_path = log_path
+        self.parse = parse
+        self.index_path = index_path or log_path + ".idx"
+        self.records_path = self.index_path + ".bin"
+        self.generation = 0
+        with self._locked():
+            self._load()
+
+    @contextmanager
+    def _locked(self):
+        """Holds the index's sidecar lock, like the log writer's (see logging_setup.py)."""
+        if fcntl is None:
+            yield
+            return
+        with open(self.index_path + ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _index_stamp(self):
+        """Identifies the saved .idx; _save() replaces the file, so any save changes it."""
+        try:
+            st = os.stat(self.index_path)
+        except OSError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _reset(self):
+        self.log_bytes = 0
+        self.head: Optional[str] = None
+        self.groups: Dict[str, dict] = {}
+        self.system = {"count": 0, "tail": NO_RECORD}
+        self.records = 0
+
+    def _start_over(self):
+        """Empties the index, records file included: new records are numbered from 0 again."""
+        self._reset()
+        try:
+            with open(self.records_path, "wb"):
+                pass
+        except OSError:
+            pass # update() appends to it, and fails there if it really can't be written
+
+    def _load(self):
+        self._reset()
+        self._stamp = self._index_stamp()
+        try:
+            with open(self.index_path, "r") as f:
+                data = json.load(f)
+            if data.get("version") != INDEX_VERSION:
+                self._start_over()
+                return
+            self.log_bytes = data["log_bytes"]
+            self.head = data["head"]
+            self.groups = data["groups"]
+            self.system = data["system"]
+            self.records = data["records"]
+        except (OSError, ValueError, KeyError):
+            self._start_over()
+            return
+        # Drop records written after the last successful save (e.g. a crash mid-update)
+        try:
+            size = os.path.getsize(self.records_path)
+            if size < self.records * RECORD.size:
+                self._start_over() # Records the index refers to are gone
+            elif size > self.records * RECORD.size:
+                with open(self.records_path, "r+b") as f:
+                    f.truncate(self.records * RECORD.size)
+        except OSError:
+            self._start_over()
+
+    def _save(self):
+        data = {
+            "version": INDEX_VERSION, "log_bytes": self.log_bytes, "head": self.head,
+            "records": self.records, "system": self.system, "groups": self.groups,
+        }
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.index_path)
+        self._stamp = self._index_stamp()
+
+    def _read_head(self) -> Optional[str]:
+        """Fingerprint of the log's first line, used to notice rotation."""
+        with open(self.log_path, "rb") as f:
+            data = f.read(HEAD_BYTES)
+        cut = data.find(b"\n")
+        if cut == -1:
+            return None
+        return hashlib.sha1(data[:cut]).hexdigest()
+
+    def update(self) -> int:
+        """
+        Indexes complete lines appended since the last update. Returns how
+        many events joined the index, counting those another process
+        indexed first (after a restart, all of them).
+        """
+        with self._locked():
+            before, generation, head = self.records, self.generation, self.head
+            if self._index_stamp() != self._stamp:
+                self._load() # Another process saved since
+                if self.records < before or (head is not None and self.head != head):
+                    self.generation += 1
+            self._extend()
+            return self.records if self.generation != generation else self.records - before
+
+    def _extend(self):
+        try:
+            size = os.path.getsize(self.log_path)
+        except OSError:
+            return
+        if self.log_bytes and (size < self.log_bytes or self._read_head() != self.head):
+            self._start_over() # Rotated or truncated: rebuild from scratch
+            self.generation += 1
+        if size == self.log_bytes:
+            return
+
+        with open(self.log_path, "rb") as log, open(self.records_path, "ab") as out:
+            log.seek(self.log_bytes)
+            pos = self.log_bytes
+            pending = b""
+            while pos < size:
+                data = pending + log.read(min(READ_SIZE, size - pos))
+                if len(data) == len(pending):
+                    break
+                pos += len(data) - len(pending)
+                cut = data.rfind(b"\n")
+                if cut == -1:
+                    pending = data
+                    continue
+                pending = data[cut + 1:]
+                buf = bytearray()
+                offset = self.log_bytes
+                for raw in data[:cut].split(b"\n"):
+                    self._index_line(offset, raw, buf)
+                    offset += len(raw) + 1
+                self.log_bytes = offset
+                out.write(buf)
+        if self.head is None and self.log_bytes:
+            self.head = self._read_head()
+        self._save()
+
+    def _append(self, buf, offset, prev) -> int:
+        buf += RECORD.pack(offset, prev)
+        self.records += 1
+        return self.records - 1
+
+    def _index_line(self, offset, raw, buf):
+        event = self.parse(raw.decode("utf-8", errors="replace"))
+        if event is None: return
+        ts, cat, action, obj_id, name, details = event
+
+        if cat == "System":
+            self.system["tail"] = self._append(buf, offset, self.system["tail"])
+            self.system["count"] += 1
+            return
+
+        key, display_id = object_key(event)
+        group = self.groups.get(key)
+        if group is None:
+            group = {"id": display_id, "type": cat, "name": None, "start_ts": ts, "last_ts": ts,
+                     "lap_count": 0, "count": 0, "tail": NO_RECORD, "last_offset": offset}
+            self.groups[key] = group
+        if action == "Started": group["start_ts"] = ts
+        if name: group["name"] = name
+        if action == "Lap": group["lap_count"] += 1
+        group["last_ts"] = ts
+        group["last_offset"] = offset
+        group["tail"] = self._append(buf, offset, group["tail"])
+        group["count"] += 1
+
+    def offsets(self, tail, limit=None) -> List[int]:
+        """Walks a record chain from its tail, newest event first."""
+        result = []
+        with open(self.records_path, "rb") as f:
+            while tail != NO_RECORD and (limit is None or len(result) < limit):
+                f.seek(tail * RECORD.size)
+                data = f.read(RECORD.size)
+                if len(data) < RECORD.size:
+                    break # Another process started over; the next update() reloads
+                offset, tail = RECORD.unpack(data)
+                result.append(offset)
+        return result
+
+    def read_events(self, offsets) -> List[tuple]:
+        """Re-reads and parses the log lines at the given offsets."""
+        events = []
+        with open(self.log_path, "rb") as f:
+            for offset in offsets:
+                f.seek(offset)
+                event = self.parse(f.readline().decode("utf-8", errors="replace"))
+                if event is None: continue
+                ts, cat, action, obj_id, name, details = event
+                events.append((ts, action, details))
+        return events
+
+class IndexedGroupedHistory:
+    """
+    Grouped History view served from a HistoryIndex. Opening it costs one
+    JSON load; event lines are only read back for the groups on screen.
+
+    The index covers the live file only; archived segments are chained
+    after it, grouped while streaming as the view scrolls back to them:
+    their events are prepended to the matching live group, and groups only
+    found in the archive follow the live ones.
+    """
+    def __init__(self, index: HistoryIndex):
+        self.index = index
+        self._cache = {} # group key -> (count, width, lines)
+        self._open_archive()
+        self._order()
+
+    def _open_archive(self):
+        self._generation = self.index.generation
+        stream = HistoryStream(self.index.log_path, live=False)
+        self.older = GroupedHistory(stream, parse=self.index.parse)
+
+    def _order(self):
+        groups = self.index.groups
+        self._keys = sorted(groups, key=lambda k: groups[k]["last_offset"], reverse=True)
+        self.size = 1 + sum(g["count"] + 2 for g in groups.values())
+        system_count = self.index.system["count"]
+        for key, group in self.older.groups.items():
+            self.size += len(group["events"]) + (0 if key in groups else 2)
+        system_count += len(self.older.system_events)
+        if system_count:
+            self.size += system_count + 3
+
+    def ensure(self, count: int):
+        """Streams older archived lines until at least count display lines exist."""
+        stream = self.older.stream
+        while self.size < count and not stream.exhausted:
+            self.older.feed_older(stream.read_older(keep=False))
+            self._order()
+
+    def sync(self) -> int:
+        """Indexes lines appended since the last call and returns how many."""
+        added = self.index.update()
+        if self.index.generation != self._generation:
+            # Rotated: what was live is now the newest segment
+            self.close()
+            self._cache.clear()
+            self._open_archive()
+            added = max(added, 1)
+        if added:
+            self._order()
+        return added
+
+    def close(self):
+        self.older.stream.close()
+
+    def _group_lines(self, key, width):
+        group = self.index.groups[key]
+        archived = self.older.groups.get(key)
+        archived_count = len(archived["events"]) if archived else 0
+        cached = self._cache.get(key)
+        if cached and cached[0] == (group["count"], archived_count) and cached[1] == width:
+            return cached[2]
+        offsets = self.index.offsets(group["tail"])
+        offsets.reverse()
+        events = self.index.read_events(offsets)
+        merged = dict(group, events=events)
+        if archived:
+            # The index starts a group at its first live event unless it saw "Started"
+            if archived["start_ts"] and not any(action == "Started" for _, action, _ in events):
+                merged["start_ts"] = archived["start_ts"]
+            merged["name"] = group["name"] or archived["name"]
+            merged["events"] = list(archived["events"]) + events
+        lines = format_group(merged, width)
+        self._cache[key] = ((group["count"], archived_count), width, lines)
+        return lines
+
+    def _system_lines(self, width, needed):
+        system = self.index.system
+        archived = self.older.system_events
+        offsets = self.index.offsets(system["tail"], limit=max(0, needed - 2))
+        events = self.index.read_events(offsets)
+        if len(offsets) == system["count"]:
+            events.extend(islice(reversed(archived), max(0, needed - 2 - len(events))))
+        lines = format_system(events, width)
+        if len(events) < system["count"] + len(archived):
+            lines.pop() # Separator only belongs after the last event
+        return lines
+
+    def render(self, width, start, count) -> List[str]:
+        """Display lines [start, start + count), reading back only the groups they touch."""
+        out = []
+        pos = 0
+        end = start + count
+
+        def take(block_len, build):
+            nonlocal pos
+            if pos + block_len > start and pos < end:
+                block = build()
+                out.extend(block[max(0, start - pos):end - pos])
+            pos += block_len
+
+        take(1, lambda: [""])
+        archived = self.older.groups
+        for key in self._keys:
+            if pos >= end: break
+            count = self.index.groups[key]["count"] + (len(archived[key]["events"]) if key in archived else 0)
+            take(count + 2, lambda k=key: self._group_lines(k, width))
+        for key, group in archived.items():
+            if pos >= end: break
+            if key not in self.index.groups:
+                take(len(group["events"]) + 2, lambda g=group: format_group(g, width))
+        system_count = self.index.system["count"] + len(self.older.system_events)
+        if system_count and pos < end:
+            take(system_count + 3, lambda: self._system_lines(width, end - pos))
+        return out
@@ -0,0 +1,401 @@
+import re
+import time
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Optional, Set
+from .history import HistoryStream, parse_event_json, object_key
+from .segments import read_segment
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+DATE_PATTERN = re.compile(r"\d{4}(-\d{2}(-\d{2})?)?$")
+TYPES = ("timer", "stopwatch", "system")
+# Seconds of streaming per advance() call, so the view stays responsive while indexing
+ADVANCE_BUDGET = 0.02
+
+QUERY_HELP = "words  type:timer|stopwatch|system  action:lap  since:2024-05-01  until:2024-05  date:2024-05-03"
+
+class Query:
+    """
+    A parsed search: free words match names, IDs and details by prefix; the
+    field filters narrow by type, action (prefix) and date range. Dates are
+    YYYY, YYYY-MM or YYYY-MM-DD and ranges include both ends. Every part
+    must match. Raises ValueError for a malformed query.
+    """
+    def __init__(self, text: str):
+        self.text = text
+        self.words: List[str] = []
+        self.types: Set[str] = set()
+        self.actions: List[str] = []
+        self.since: Optional[str] = None
+        self.until: Optional[str] = None
+        for token in text.lower().split():
+            field, sep, value = token.partition(":")
+            if not sep:
+                self.words.extend(WORD_PATTERN.findall(token))
+                continue
+            if not value:
+                raise ValueError(f"Missing value for {field}:")
+            if field in ("type", "t"):
+                found = [t for t in TYPES if t.startswith(value)]
+                if len(found) != 1:
+                    raise ValueError(f"Unknown type: {value}")
+                self.types.add(found[0])
+            elif field in ("action", "a"):
+                self.actions.append(value)
+            elif field in ("since", "from", "until", "to", "date"):
+                if not DATE_PATTERN.match(value):
+                    raise ValueError(f"Bad date: {value} (use YYYY-MM-DD)")
+                if field in ("since", "from", "date"):
+                    self.since = value
+                if field in ("until", "to", "date"):
+                    self.until = value
+            else:
+                raise ValueError(f"Unknown filter: {field}:")
+
+    @property
+    def empty(self) -> bool:
+        return not (self.words or self.types or self.actions or self.since or self.until)
+
+    def day_in_range(self, day: str) -> bool:
+        if self.since is not None and day < self.since:
+            return False
+        if self.until is not None and day[:len(self.until)] > self.until:
+            return False
+        return True
+
+class Vocabulary:
+    """
+    Sorted keys for prefix lookups. New keys are collected and merged in
+    one sort on the next lookup, so indexing a batch doesn't pay for
+    keeping the list in order line by line.
+    """
+    def __init__(self):
+        self._keys: List[str] = []
+        self._pending: List[str] = []
+
+    def add(self, key: str):
+        self._pending.append(key)
+
+    def prefixed(self, prefix: str) -> List[str]:
+        """Keys starting with prefix, in order."""
+        keys = self._keys
+        if self._pending:
+            keys.extend(self._pending)
+            keys.sort() # Timsort merges the sorted run with the new one
+            self._pending.clear()
+        return keys[bisect_left(keys, prefix):bisect_left(keys, prefix + "\uffff")]
+
+class SearchIndex:
+    """
+    Inverted index over the structured event stream, built while the stream
+    is read backwards through the live file and its archived segments.
+
+    Events are numbered in the order they are indexed; every posting list is
+    an array of those numbers, ascending, so the events indexed since any
+    earlier point are a bisect away. Postings are kept per type, action,
+    day, object and detail word. Names are attached to objects rather than
+    events: only an object's "Started" line carries its name, and it is the
+    last of that object's lines to be read.
+
+    Action, detail and name words are also kept in a sorted Vocabulary, so
+    a prefix resolves with two bisects however large the vocabulary grows.
+    Events themselves are not kept: each is remembered by file and byte
+    offset and read back when it is displayed or re-checked.
+    """
+    def __init__(self, path, parse=parse_event_json):
+        self.stream = HistoryStream(path)
+        self.parse = parse
+        self.generation = 0 # Bumped when the stream starts over (log rotated or replaced)
+        self._generation = self.stream.generation
+        self._live = None # Handle on the live log for event()
+        self._segment = None # (path, bytes) of the last segment event() decompressed
+        self._reset()
+
+    def _reset(self):
+        self._close_sources()
+        self.sources: List[str] = [] # Files events were read from: the live log, then segments
+        self._source_ids: Dict[str, int] = {}
+        self.source = array("I") # Per event: index into sources
+        self.offset = array("q") # Per event: byte offset of its line in that source
+        self.owners: List[Optional[str]] = [] # Object key per event; None for System events
+        self.position = array("q") # Newest-first sort key: negative for older lines, positive for appended
+        self.types: Dict[str, array] = {}
+        self.actions: Dict[str, array] = {}
+        self.days: Dict[str, array] = {}
+        self.objects: Dict[str, array] = {}
+        self.words: Dict[str, array] = {}
+        self.names: Dict[str, str] = {} # Object key -> display name
+        self.object_words: Dict[str, Set[str]] = {} # Object key -> name and ID words
+        self.name_words: Dict[str, Set[str]] = {} # Name or ID word -> object keys
+        self.action_vocabulary = Vocabulary()
+        self.word_vocabulary = Vocabulary()
+        self.name_vocabulary = Vocabulary()
+        self.oldest_day: Optional[str] = None
+        self._older = 0
+        self._newer = 0
+
+    def __len__(self):
+        return len(self.position)
+
+    @property
+    def exhausted(self) -> bool:
+        return self.stream.exhausted
+
+    @staticmethod
+    def _post(table, key, n, vocabulary=None):
+        postings = table.get(key)
+        if postings is None:
+            postings = table[key] = array("I")
+            if vocabulary is not None:
+                vocabulary.add(key)
+        postings.append(n)
+
+    def _source_index(self, path) -> int:
+        source = self._source_ids.get(path)
+        if source is None:
+            source = self._source_ids[path] = len(self.sources)
+            self.sources.append(path)
+        return source
+
+    def _add(self, line, older: bool, source: int, offset: int):
+        event = self.parse(line)
+        if event is None: return
+        ts, cat, action, obj_id, name, details = event
+        n = len(self.position)
+        self.source.append(source)
+        self.offset.append(offset)
+        if older:
+            self._older += 1
+            self.position.append(-self._older)
+            self.oldest_day = ts[:10]
+        else:
+            self._newer += 1
+            self.position.append(self._newer)
+        self._post(self.types, cat.lower(), n)
+        self._post(self.actions, action.lower(), n, self.action_vocabulary)
+        self._post(self.days, ts[:10], n)
+        for word in set(WORD_PATTERN.findall(details.lower())):
+            self._post(self.words, word, n, self.word_vocabulary)
+        if cat == "System":
+            self.owners.append(None)
+            return
+        key, display_id = object_key(event)
+        self.owners.append(key)
+        self._post(self.objects, key, n)
+        if key not in self.object_words:
+            self.object_words[key] = set()
+            self._name_word(key, display_id.lower())
+        if name and (key not in self.names or not older):
+            self.names[key] = name
+            for word in WORD_PATTERN.findall(name.lower()):
+                self._name_word(key, word)
+
+    def _name_word(self, key, word):
+        self.object_words[key].add(word)
+        keys = self.name_words.get(word)
+        if keys is None:
+            keys = self.name_words[word] = set()
+            self.name_vocabulary.add(word)
+        keys.add(key)
+
+    def advance(self, budget: float = ADVANCE_BUDGET) -> int:
+        """Indexes older chunks of the stream for up to `budget` seconds; returns events added."""
+        before = len(self)
+        deadline = time.perf_counter() + budget
+        while not self.stream.exhausted:
+            chunk = self.stream.read_older(keep=False, offsets=True)
+            source = self._source_index(self.stream.source)
+            for offset, line in chunk:
+                self._add(line, True, source, offset)
+            if time.perf_counter() >= deadline:
+                break
+        return len(self) - before
+
+    def sync(self) -> int:
+        """Indexes lines appended since the last call and returns how many."""
+        new = self.stream.poll(offsets=True)
+        if self.stream.generation != self._generation:
+            self._generation = self.stream.generation
+            self.generation += 1
+            self._reset()
+            return 0
+        if new:
+            source = self._source_index(self.stream.path)
+            for offset, line in new:
+                self._add(line, False, source, offset)
+        return len(new)
+
+    @staticmethod
+    def _range(postings, lo, hi):
+        return postings[bisect_left(postings, lo):bisect_left(postings, hi)]
+
+    def _union(self, table, keys, lo, hi) -> Set[int]:
+        ids = set()
+        for key in keys:
+            ids.update(self._range(table[key], lo, hi))
+        return ids
+
+    def matching_objects(self, word: str) -> Set[str]:
+        """Objects with a name or ID word starting with `word`."""
+        found = set()
+        for name_word in self.name_vocabulary.prefixed(word):
+            found |= self.name_words[name_word]
+        return found
+
+    def match(self, query: Query, lo: int = 0, hi: Optional[int] = None) -> List[int]:
+        """Numbers of the events in [lo, hi) that match the query, ascending."""
+        hi = len(self) if hi is None else hi
+        clauses = []
+        if query.types:
+            clauses.append(self._union(self.types, query.types & self.types.keys(), lo, hi))
+        for prefix in query.actions:
+            clauses.append(self._union(self.actions, self.action_vocabulary.prefixed(prefix), lo, hi))
+        if query.since is not None or query.until is not None:
+            clauses.append(self._union(self.days, [d for d in self.days if query.day_in_range(d)], lo, hi))
+        for word in query.words:
+            ids = self._union(self.objects, self.matching_objects(word), lo, hi)
+            ids.update(self._union(self.words, self.word_vocabulary.prefixed(word), lo, hi))
+            clauses.append(ids)
+        if not clauses:
+            return list(range(lo, hi))
+        clauses.sort(key=len)
+        found = clauses[0].intersection(*clauses[1:])
+        return sorted(found)
+
+    def accepts(self, n: int, query: Query) -> bool:
+        """Whether event n matches the query, checked directly rather than through the postings."""
+        event = self.event(n)
+        if event is None:
+            return False
+        ts, cat, action, obj_id, name, details = event
+        if query.types and cat.lower() not in query.types:
+            return False
+        if query.actions and not all(action.lower().startswith(a) for a in query.actions):
+            return False
+        if not query.day_in_range(ts[:10]):
+            return False
+        owner_words = self.object_words.get(self.owners[n], ()) if self.owners[n] else ()
+        detail_words = WORD_PATTERN.findall(details.lower())
+        return all(any(w.startswith(word) for w in owner_words) or any(w.startswith(word) for w in detail_words)
+                   for word in query.words)
+
+    def event(self, n: int) -> Optional[tuple]:
+        """Event n, parsed again from its line; None if the line can't be read back."""
+        path = self.sources[self.source[n]]
+        offset = self.offset[n]
+        try:
+            if path == self.stream.path:
+                if self._live is None:
+                    self._live = open(path, "rb")
+                self._live.seek(offset)
+                raw = self._live.readline()
+            else:
+                if self._segment is None or self._segment[0] != path:
+                    self._segment = (path, read_segment(path)) # Results cluster, so one segment at a time
+                data = self._segment[1]
+                end = data.find(b"\n", offset)
+                raw = data[offset:end if end != -1 else len(data)]
+        except (OSError, EOFError):
+            return None
+        return self.parse(raw.decode("utf-8", errors="replace").rstrip("\r\n"))
+
+    def format(self, n: int) -> str:
+        """One display line for event n, with the object's name as known so far."""
+        event = self.event(n)
+        if event is None:
+            return ""
+        ts, cat, action, obj_id, name, details = event
+        if cat == "System":
+            return f"{ts} [System] {action} {details}".rstrip()
+        key = self.owners[n]
+        label = self.names.get(key) or "Unknown"
+        id_display = f" (ID: {obj_id})" if obj_id else ""
+        return f"{ts} [{cat}] {label}{id_display} > {action} {details}".rstrip()
+
+    def _close_sources(self):
+        if self._live is not None:
+            self._live.close()
+        self._live = None
+        self._segment = None
+
+    def close(self):
+        self._close_sources()
+        self.stream.close()
+
+class SearchResults:
+    """
+    Matches for one query, newest first, extended incrementally: update()
+    only evaluates events indexed since the previous call. An object whose
+    name is only learned later (its "Started" line is read last) has its
+    earlier events re-checked then, so name searches miss nothing.
+    """
+    def __init__(self, index: SearchIndex, query: Query):
+        self.index = index
+        self.query = query
+        self._reset()
+
+    def _reset(self):
+        self._newer: List[int] = [] # Appended events, oldest first
+        self._older: List[int] = [] # Events read backwards, newest first
+        self._seen: Set[int] = set()
+        self._objects: List[Set[str]] = [set() for _ in self.query.words]
+        self.scanned = 0
+        self._generation = self.index.generation
+
+    def __len__(self):
+        return len(self._newer) + len(self._older)
+
+    def __getitem__(self, i: int) -> int:
+        """Event number of the i-th match, newest first."""
+        n_newer = len(self._newer)
+        if i < n_newer:
+            return self._newer[n_newer - 1 - i]
+        return self._older[i - n_newer]
+
+    @property
+    def complete(self) -> bool:
+        """Whether reading further back can't add matches."""
+        index = self.index
+        if index.exhausted:
+            return True
+        return (self.query.since is not None and index.oldest_day is not None
+                and index.oldest_day < self.query.since)
+
+    def _insert(self, found):
+        position = self.index.position
+        newer, older = [], []
+        for n in found:
+            if n in self._seen:
+                continue
+            self._seen.add(n)
+            (newer if position[n] > 0 else older).append(n)
+        # Late re-checks can land among matches already listed; keep both lists in order
+        if newer:
+            resort = self._newer and position[newer[0]] < position[self._newer[-1]]
+            self._newer.extend(newer)
+            if resort:
+                self._newer.sort(key=position.__getitem__)
+        if older:
+            resort = self._older and position[older[0]] > position[self._older[-1]]
+            self._older.extend(older)
+            if resort:
+                self._older.sort(key=position.__getitem__, reverse=True)
+
+    def update(self) -> int:
+        """Evaluates events indexed since the last call; returns how many matches were added."""
+        index = self.index
+        if index.generation != self._generation:
+            self._reset()
+        before = len(self)
+        late = set()
+        for word, known in zip(self.query.words, self._objects):
+            objects = index.matching_objects(word)
+            for key in objects - known:
+                late.update(SearchIndex._range(index.objects[key], 0, self.scanned))
+            known |= objects
+        if late:
+            self._insert(sorted(n for n in late if index.accepts(n, self.query)))
+        hi = len(index)
+        self._insert(index.match(self.query, self.scanned, hi))
+        self.scanned = hi
+        return len(self) - before
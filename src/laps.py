@@ -0,0 +1,298 @@
+import os
+from array import array
+from bisect import insort
+from typing import List, Optional, Tuple
+
+# Laps kept in memory per stopwatch. Past this the oldest half is spilled to
+# disk (when enabled) or dropped; the statistics keep covering every lap.
+LAP_CAPACITY = 10_000
+QUANTILES = (0.5, 0.95, 0.99)
+# Spill files hold native doubles, 8 bytes per lap
+LAP_SIZE = array("d").itemsize
+
+def trim_count(retained: int, capacity: int = LAP_CAPACITY) -> int:
+    """How many of the oldest laps to evict once `retained` are held: none, or half of them."""
+    return retained // 2 if retained > capacity else 0
+
+class P2Quantile:
+    """
+    Streaming estimate of one quantile with the P² algorithm (Jain & Chlamtac,
+    1985): five markers whose heights are adjusted as values arrive, so each
+    value costs O(1) time and the memory is fixed.
+    """
+    __slots__ = ("p", "q", "n", "want")
+
+    def __init__(self, p: float):
+        self.p = p
+        self.q: List[float] = [] # Marker heights; the first five values until then
+        self.n = [0, 1, 2, 3, 4] # Marker positions
+        self.want = [0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0] # Desired positions
+
+    def add(self, x: float):
+        q, n = self.q, self.n
+        if len(q) < 5:
+            insort(q, x)
+            return
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+        p = self.p
+        want = self.want
+        want[1] += p / 2
+        want[2] += p
+        want[3] += (1 + p) / 2
+        want[4] += 1
+        for i in (1, 2, 3):
+            d = want[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                # Piecewise-parabolic prediction, falling back to linear if it overshoots
+                height = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    def value(self) -> Optional[float]:
+        q = self.q
+        if not q:
+            return None
+        if len(q) < 5:
+            return q[min(len(q) - 1, int(round(self.p * (len(q) - 1))))]
+        return q[2]
+
+    def to_state(self) -> dict:
+        return {"p": self.p, "q": list(self.q), "n": list(self.n), "want": list(self.want)}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "P2Quantile":
+        sketch = cls(state["p"])
+        sketch.q = list(state["q"])
+        sketch.n = list(state["n"])
+        sketch.want = list(state["want"])
+        return sketch
+
+class LapStats:
+    """
+    Running statistics over the splits (time between consecutive laps) of a
+    stopwatch: count, min, max, mean and p50/p95/p99, each updated in O(1).
+    """
+    __slots__ = ("count", "last", "min", "max", "mean", "quantiles")
+
+    def __init__(self):
+        self.count = 0
+        self.last = 0.0 # Cumulative time of the latest lap; the next split starts here
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.mean = 0.0
+        self.quantiles = [P2Quantile(p) for p in QUANTILES]
+
+    def add_lap(self, cumulative: float) -> float:
+        """Folds in the lap taken at `cumulative` seconds and returns its split."""
+        split = cumulative - self.last
+        self.last = cumulative
+        self.count += 1
+        if self.min is None or split < self.min:
+            self.min = split
+        if self.max is None or split > self.max:
+            self.max = split
+        self.mean += (split - self.mean) / self.count
+        for sketch in self.quantiles:
+            sketch.add(split)
+        return split
+
+    def quantile(self, p: float) -> Optional[float]:
+        for sketch in self.quantiles:
+            if sketch.p == p:
+                return sketch.value()
+        raise KeyError(p)
+
+    def to_state(self) -> dict:
+        return {"count": self.count, "last": self.last, "min": self.min, "max": self.max, "mean": self.mean,
+                "quantiles": [sketch.to_state() for sketch in self.quantiles]}
+
+    @classmethod
+    def from_state(cls, state: Optional[dict]) -> "LapStats":
+        stats = cls()
+        if state:
+            stats.count = state["count"]
+            stats.last = state["last"]
+            stats.min = state["min"]
+            stats.max = state["max"]
+            stats.mean = state["mean"]
+            stats.quantiles = [P2Quantile.from_state(s) for s in state["quantiles"]]
+        return stats
+
+class LapLog:
+    """
+    A stopwatch's laps (cumulative seconds) in a compact array('d').
+
+    Only the newest laps are held in memory: when more than `capacity`
+    accumulate, the oldest half is appended to the spill file (if one is
+    attached) or dropped. len() and the lap numbers always count every lap;
+    indexing reaches laps in memory and, with a spill file, those on disk.
+    Statistics over all splits are kept in `stats`.
+    """
+    __slots__ = ("values", "offset", "stats", "capacity", "spill_path", "spill_start")
+
+    def __init__(self, capacity: int = LAP_CAPACITY):
+        self.values = array("d")
+        self.offset = 0 # Number of laps no longer in memory
+        self.stats = LapStats()
+        self.capacity = capacity
+        self.spill_path: Optional[str] = None
+        self.spill_start = 0 # Index of the first lap in the spill file
+
+    def __len__(self) -> int:
+        return self.offset + len(self.values)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    @property
+    def first(self) -> int:
+        """Index of the oldest lap still reachable."""
+        return self.spill_start if self.spill_path is not None else self.offset
+
+    def append(self, cumulative: float):
+        self.stats.add_lap(cumulative)
+        self.values.append(cumulative)
+        evict = trim_count(len(self.values), self.capacity)
+        if evict:
+            if self.spill_path is not None:
+                try:
+                    with open(self.spill_path, "ab") as f:
+                        self.values[:evict].tofile(f)
+                except OSError:
+                    self.spill_path = None # Can't write: fall back to dropping
+            del self.values[:evict]
+            self.offset += evict
+
+    def __getitem__(self, index: int) -> float:
+        total = len(self)
+        if index < 0:
+            index += total
+        if self.offset <= index < total:
+            return self.values[index - self.offset]
+        if self.spill_path is not None and self.spill_start <= index < self.offset:
+            return self.read(index, 1)[0]
+        raise IndexError("lap not available")
+
+    def __iter__(self):
+        for start in range(self.first, self.offset, self.capacity):
+            yield from self.read(start, min(self.capacity, self.offset - start))
+        yield from self.values
+
+    def read(self, start: int, count: int) -> List[float]:
+        """Laps [start, start + count) of those reachable, reading spilled ones from disk."""
+        start = max(start, self.first)
+        end = min(start + count, len(self))
+        out = []
+        if start < self.offset:
+            disk_end = min(end, self.offset)
+            spilled = array("d")
+            with open(self.spill_path, "rb") as f:
+                f.seek((start - self.spill_start) * LAP_SIZE)
+                spilled.frombytes(f.read((disk_end - start) * LAP_SIZE))
+            out.extend(spilled)
+            start = disk_end
+        if start < end:
+            out.extend(self.values[start - self.offset:end - self.offset])
+        return out
+
+    def tail(self, count: int) -> List[Tuple[int, float]]:
+        """The newest `count` laps (at most those in memory) as (lap number, cumulative)."""
+        count = min(count, len(self.values))
+        base = len(self) - count
+        return [(base + i + 1, value) for i, value in enumerate(self.values[len(self.values) - count:])]
+
+    def split(self, index: int) -> float:
+        """Time between lap `index` and the one before it."""
+        return self[index] - (self[index - 1] if index > 0 else 0.0)
+
+    def attach_spill(self, path: str):
+        """
+        Spills evicted laps to `path` from now on. A file left by an earlier
+        run is kept if it still lines up with this log, otherwise replaced.
+        """
+        self.spill_path = path
+        try:
+            on_disk = os.path.getsize(path) // LAP_SIZE
+        except OSError:
+            on_disk = 0
+        if self.offset and on_disk >= self.offset:
+            self.spill_start = 0
+            if on_disk > self.offset:
+                os.truncate(path, self.offset * LAP_SIZE)
+            return
+        self.spill_start = self.offset # Earlier laps were dropped; the file starts here
+        try:
+            open(path, "wb").close()
+        except OSError:
+            self.spill_path = None
+
+    def discard(self):
+        """Deletes the spill file, e.g. when the stopwatch is removed."""
+        if self.spill_path is not None:
+            try:
+                os.remove(self.spill_path)
+            except OSError:
+                pass
+
+    def cleared(self) -> "LapLog":
+        """An empty log with the same capacity and spill file (now truncated), for a reset."""
+        log = LapLog(self.capacity)
+        if self.spill_path is not None:
+            log.attach_spill(self.spill_path)
+        return log
+
+    def to_state(self) -> dict:
+        """The laps in memory plus what is needed to account for the rest."""
+        state = {"laps": self.values.tolist()}
+        if self.offset:
+            state["laps_offset"] = self.offset
+        if self.stats.count:
+            state["lap_stats"] = self.stats.to_state()
+        return state
+
+    @classmethod
+    def from_state(cls, state: dict, capacity: int = LAP_CAPACITY) -> "LapLog":
+        log = cls(capacity)
+        log.offset = state.get("laps_offset", 0)
+        log.values = array("d", state["laps"])
+        log.stats = LapStats.from_state(state.get("lap_stats"))
+        log.stats_catch_up()
+        return log
+
+    def stats_catch_up(self):
+        """Folds laps the saved statistics haven't seen yet (appended by "lap" entries)."""
+        for index in range(max(self.stats.count, self.offset), len(self)):
+            self.stats.add_lap(self.values[index - self.offset])
+
+def fold_lap(state: dict, cumulative: float, capacity: int = LAP_CAPACITY):
+    """
+    Appends a lap to a saved stopwatch state the way LapLog.append would,
+    evicting the same laps and folding them into the saved statistics first.
+    """
+    laps = state["laps"]
+    laps.append(cumulative)
+    evict = trim_count(len(laps), capacity)
+    if evict:
+        offset = state.get("laps_offset", 0)
+        stats = LapStats.from_state(state.get("lap_stats"))
+        for index in range(max(stats.count, offset), offset + evict):
+            stats.add_lap(laps[index - offset])
+        state["lap_stats"] = stats.to_state()
+        del laps[:evict]
+        state["laps_offset"] = offset + evict
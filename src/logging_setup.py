@@ -1,31 +1,255 @@
+import atexit
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from .paths import get_log_path # Re-exported; lives apart so the CLI can skip logging
+from .segments import first_line_time, recover, rotate, segment_paths
+try:
+    import fcntl
+except ImportError: # Windows: no advisory locks, so one writing process is assumed
+    fcntl = None
 
-def get_log_path(log_filename="timer_cli.log"):
-    """Returns the absolute path to the log file in the user's home directory."""
-    home_dir = os.path.expanduser("~")
-    log_dir = os.path.join(home_dir, ".timer_cli")
-    os.makedirs(log_dir, exist_ok=True)
-        
-    return os.path.join(log_dir, log_filename)
+LOG_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+EVENTS_FILENAME = "events.jsonl"
 
-def setup_logging(log_filename="timer_cli.log"):
+_writer = None
+
+class BatchingLogWriter(threading.Thread):
+    """
+    Background thread that owns the log files. Records arrive through a queue
+    (fed by a QueueHandler on the caller's thread), are held for up to
+    flush_interval seconds, and are then formatted and written in one go:
+    every record to the human-readable log, and records made by log_action
+    also to the structured JSONL event stream.
+
+    Each file is rotated into a compressed segment (see segments.py) once it
+    reaches rotate_bytes, or once its first line is rotate_age seconds old;
+    0 disables either limit.
+
+    A daemon and dashboards may all write the same files. Appends hold a
+    shared flock on a `<log>.lock` sidecar and rotation an exclusive one,
+    and before each append the handle is checked against the file now at
+    the path, so no process keeps writing into a log another one rotated.
+    """
+    _STOP = object()
+
+    def __init__(self, path, flush_interval=0.5, max_batch=1024, events_path=None, rotate_bytes=0, rotate_age=0):
+        super().__init__(name="log-writer", daemon=True)
+        self.path = path
+        self.events_path = events_path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.rotate_bytes = rotate_bytes
+        self.rotate_age = rotate_age
+        self._born = {} # path -> time of the live file's first line, for rotate_age
+        self.queue = queue.SimpleQueue()
+        self.formatter = logging.Formatter(LOG_FORMAT, datefmt=DATE_FORMAT)
+        self._unwritten = []
+        self._unwritten_events = []
+        self._file = None
+        self._events_file = None
+        self._locks = {} # path -> open sidecar lock file
+        self.observer = None # Optional callback given each batch's log_action-to-disk latencies
+
+    def run(self):
+        for path in (self.path, self.events_path):
+            if path:
+                try:
+                    with self._locked(path, exclusive=True):
+                        recover(path)
+                except OSError:
+                    pass
+        if self.events_path and not os.path.exists(self.events_path) and not segment_paths(self.events_path):
+            self._backfill_events()
+        stopping = False
+        while not stopping:
+            record = self.queue.get()
+            batch = []
+            if record is self._STOP:
+                stopping = True
+            else:
+                batch.append(record)
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.max_batch:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        record = self.queue.get(timeout=timeout)
+                    except queue.Empty:
+                        break
+                    if record is self._STOP:
+                        stopping = True
+                        break
+                    batch.append(record)
+            self._write(batch)
+        for f in (self._file, self._events_file, *self._locks.values()):
+            if f is not None:
+                f.close()
+
+    def _backfill_events(self):
+        """Converts an existing text log once, so the event stream covers older history too."""
+        from .history import legacy_event_record
+        try:
+            with open(self.path, "r", encoding="utf-8", errors="replace") as src, \
+                 open(self.events_path + ".tmp", "w", encoding="utf-8") as out:
+                for line in src:
+                    event = legacy_event_record(line)
+                    if event is not None:
+                        out.write(json.dumps(event, separators=(",", ":")) + "\n")
+            os.replace(self.events_path + ".tmp", self.events_path)
+        except OSError:
+            pass # No text log yet; the stream simply starts empty
+
+    @contextmanager
+    def _locked(self, path, exclusive=False):
+        """Holds the log's sidecar lock: shared to append, exclusive to rotate."""
+        if fcntl is None:
+            yield
+            return
+        lock = self._locks.get(path)
+        if lock is None:
+            lock = self._locks[path] = open(path + ".lock", "a")
+        fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _is_live(f, path) -> bool:
+        """Whether a handle still refers to the file at path, i.e. nobody rotated it away."""
+        try:
+            return os.fstat(f.fileno()).st_ino == os.stat(path).st_ino
+        except FileNotFoundError:
+            return False
+
+    def _append(self, f, path, lines):
+        """Writes lines to the live file, reopening the handle if needed. Returns the handle."""
+        with self._locked(path):
+            if f is not None and not self._is_live(f, path):
+                f.close() # Another process rotated it
+                f = None
+                self._born.pop(path, None)
+            if f is None:
+                f = open(path, "a", encoding="utf-8")
+            f.write("".join(lines))
+            f.flush()
+        return f
+
+    def _write(self, batch):
+        self._unwritten.extend(self.formatter.format(r) + "\n" for r in batch)
+        if self.events_path:
+            for r in batch:
+                event = getattr(r, "event", None)
+                if event is not None:
+                    event["wall"] = r.created
+                    self._unwritten_events.append(json.dumps(event, separators=(",", ":")) + "\n")
+        try:
+            if self._unwritten:
+                self._file = self._append(self._file, self.path, self._unwritten)
+                self._unwritten = []
+            if self._unwritten_events:
+                self._events_file = self._append(self._events_file, self.events_path, self._unwritten_events)
+                self._unwritten_events = []
+            if self.rotate_bytes or self.rotate_age:
+                self._file = self._maybe_rotate(self._file, self.path)
+                self._events_file = self._maybe_rotate(self._events_file, self.events_path)
+            observer = self.observer
+            if observer is not None:
+                now = time.monotonic()
+                observer([now - r.event["mono"] for r in batch if getattr(r, "event", None) is not None])
+        except OSError:
+            # Keep the lines and try again with the next batch on fresh handles
+            for f in (self._file, self._events_file):
+                if f is not None:
+                    try:
+                        f.close()
+                    except OSError:
+                        pass
+            self._file = self._events_file = None
+
+    def _maybe_rotate(self, f, path):
+        """Rotates the file behind an open handle if it is due. Returns the handle to keep using."""
+        if f is None:
+            return None
+        due = self.rotate_bytes and os.fstat(f.fileno()).st_size >= self.rotate_bytes
+        if not due and self.rotate_age:
+            born = self._born.get(path)
+            if born is None:
+                born = self._born[path] = first_line_time(path) or time.time()
+            due = time.time() - born >= self.rotate_age
+        if not due:
+            return f
+        with self._locked(path, exclusive=True):
+            live = self._is_live(f, path) # Otherwise another process rotated it first
+            f.close()
+            self._born.pop(path, None)
+            if live:
+                try:
+                    rotate(path)
+                except OSError:
+                    pass # e.g. a reader holds it open on Windows; try again after the next batch
+        return None
+
+    def stop(self):
+        """Writes everything still queued, then ends the thread."""
+        if self.is_alive():
+            self.queue.put(self._STOP)
+            self.join()
+
+def setup_logging(log_filename="timer_cli.log", flush_interval=0.5, rotate_bytes=0, rotate_age=0):
     """
     Configures the logging system to write to a centralized file in the user's home directory.
+    Records are handed to a background writer so logging never blocks on disk I/O.
     """
+    global _writer
+    root = logging.getLogger()
+    if _writer is not None or root.handlers:
+        return # Already configured
     log_path = get_log_path(log_filename)
 
-    logging.basicConfig(
-        filename=log_path,
-        level=logging.INFO,
-        format="%(asctime)s [%(levelname)s] %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
+    _writer = BatchingLogWriter(log_path, flush_interval, events_path=get_log_path(EVENTS_FILENAME),
+                                rotate_bytes=rotate_bytes, rotate_age=rotate_age)
+    _writer.start()
+    root.addHandler(logging.handlers.QueueHandler(_writer.queue))
+    root.setLevel(logging.INFO)
+    atexit.register(shutdown_logging)
     logging.info(f"Logging system initialized at {log_path}")
 
-def log_action(category, action, details=""):
+def set_write_observer(callback):
+    """Has the writer report log_action-to-disk latencies to callback (None to stop)."""
+    if _writer is not None:
+        _writer.observer = callback
+
+def shutdown_logging():
+    """Drains the writer queue so no history events are lost on exit."""
+    global _writer
+    if _writer is None:
+        return
+    for handler in list(logging.getLogger().handlers):
+        if isinstance(handler, logging.handlers.QueueHandler):
+            logging.getLogger().removeHandler(handler)
+    _writer.stop()
+    _writer = None
+
+def log_action(category, action, details="", **fields):
     """
     Helper to log structured actions.
-    Example: log_action("Timer", "Start", "ID: 12345")
+    Example: log_action("Timer", "Start", "ID: 12345", id="12345")
+
+    Keyword fields (id, name, duration, lap) are carried as typed values into
+    the JSONL event stream; without them the details text is kept as-is.
     """
-    logging.info(f"[{category}] {action} - {details}")
+    event = {"mono": time.monotonic(), "cat": category, "action": action}
+    if fields:
+        event.update((k, v) for k, v in fields.items() if v is not None)
+    elif details:
+        event["text"] = details
+    logging.info(f"[{category}] {action} - {details}", extra={"event": event})
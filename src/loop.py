@@ -0,0 +1,124 @@
+import math
+import select
+import sys
+import time
+from collections import deque
+from typing import Optional
+from .models import State
+from .clock import NS_PER_SEC
+from .ui import timer_label, progress_bar_width, padded_time
+
+# Wake a few ms past a boundary so the next frame actually sees the new value
+WAKE_SLACK = 0.005
+
+def _until_tick_down(value: float) -> float:
+    """Seconds until int(value) changes for a value counting down."""
+    frac = value - math.floor(value)
+    return frac if frac > 0 else 1.0
+
+def _until_tick_up(value: float) -> float:
+    """Seconds until int(value) changes for a value counting up."""
+    return 1.0 - (value - math.floor(value))
+
+def next_frame_delay(manager, width, viewport=None) -> Optional[float]:
+    """
+    Returns how long the screen can stay as it is: the time until the next
+    whole-second change of any displayed time, the next timer expiry, or the
+    next progress-bar cell step. None means nothing is running.
+
+    With a viewport only the rows drawn last frame are inspected; expiries of
+    off-screen timers come from the manager's deadline heap.
+    """
+    delay = None
+    deadline = manager.next_deadline()
+    if deadline is not None:
+        delay = max(0.0, (deadline - manager.clock.monotonic_ns()) / NS_PER_SEC)
+
+    if viewport is not None:
+        start, end = viewport.visible
+    else:
+        start, end = 0, manager.item_count()
+    n_timers = len(manager.timers)
+
+    for t in manager.timers[start:min(end, n_timers)]:
+        if t.state != State.RUNNING:
+            continue
+        rem = t.remaining_time
+        if t.state != State.RUNNING:
+            return 0.0 # Just expired, redraw immediately
+
+        # Digits tick down when rem crosses an integer; expiry is rem reaching 0
+        candidate = _until_tick_down(rem)
+
+        bar_width = progress_bar_width(timer_label(t), padded_time(rem), width)
+        if bar_width > 5 and t.duration > 0:
+            elapsed = t.duration - rem
+            filled = int(bar_width * (elapsed / t.duration))
+            cell_at = (filled + 1) * t.duration / bar_width
+            candidate = min(candidate, max(0.0, cell_at - elapsed))
+
+        if delay is None or candidate < delay:
+            delay = candidate
+
+    for s in manager.stopwatches[max(0, start - n_timers):max(0, end - n_timers)]:
+        if s.state != State.RUNNING:
+            continue
+        candidate = _until_tick_up(s.elapsed_time)
+        if delay is None or candidate < delay:
+            delay = candidate
+
+    return delay
+
+def frame_timeout_ms(delay: Optional[float]) -> int:
+    """Converts a frame delay into a curses getch timeout (-1 blocks until a key)."""
+    if delay is None:
+        return -1
+    return max(1, int(math.ceil((delay + WAKE_SLACK) * 1000)))
+
+def wait_for_key(stdscr, delay: Optional[float], *sources) -> int:
+    """
+    Blocks until a key, the frame delay, or (with sources such as a daemon
+    connection or the terminal bell) incoming data on any source.fileno().
+    Returns the key or -1.
+    """
+    if not sources:
+        stdscr.timeout(frame_timeout_ms(delay))
+        return stdscr.getch()
+    # curses may already hold keys it read ahead; select() can't see those
+    stdscr.timeout(0)
+    key = stdscr.getch()
+    if key != -1:
+        return key
+    timeout = None if delay is None else delay + WAKE_SLACK
+    ready, _, _ = select.select([sys.stdin, *sources], [], [], timeout)
+    if sys.stdin in ready:
+        return stdscr.getch()
+    return -1
+
+class WakeupCounter:
+    """Counts main-loop wakeups over a sliding one-minute window."""
+    def __init__(self, window: float = 60.0):
+        self.window = window
+        self.total = 0
+        self._stamps = deque()
+        self._started = time.monotonic()
+
+    def record(self):
+        now = time.monotonic()
+        self.total += 1
+        self._stamps.append(now)
+        self._trim(now)
+
+    def _trim(self, now):
+        cutoff = now - self.window
+        while self._stamps and self._stamps[0] < cutoff:
+            self._stamps.popleft()
+
+    @property
+    def per_minute(self) -> float:
+        now = time.monotonic()
+        self._trim(now)
+        span = min(self.window, now - self._started)
+        if span <= 0:
+            return 0.0
+        return len(self._stamps) * 60.0 / span
@@ -1,81 +1,476 @@
-from typing import List
-from .models import Timer, Stopwatch, State
+import heapq
+import math
+import os
+from itertools import chain
+from typing import Dict, List, Optional, Tuple
+from .models import Timer, Stopwatch, State, new_id
+from .clock import Clock, SYSTEM_CLOCK, NS_PER_SEC
+from .schedule import Schedule, Scheduler
 from .logging_setup import log_action
 
+# Operations TimeManager.bulk() can apply to a selection of items
+BULK_ACTIONS = ("pause", "resume", "reset", "delete", "extend")
+# Schedules fire on the wall clock, but waits are measured on the monotonic one:
+# wake at least this often so a step of the system clock can't hold a fire back
+SCHEDULE_RECHECK_NS = 60 * NS_PER_SEC
+
 class TimeManager:
-    def __init__(self):
-        self.timers: List[Timer] = []
-        self.stopwatches: List[Stopwatch] = []
+    def __init__(self, journal=None, clock: Clock = SYSTEM_CLOCK, notifier=None, lap_spill_dir=None):
+        self.journal = journal # Optional SessionJournal receiving every state change
+        self.notifier = notifier # Optional Notifier told about every finished timer
+        self.lap_spill_dir = lap_spill_dir # Optional directory for laps evicted from memory
+        self.clock = clock # Shared by every timer and stopwatch this manager creates
+        # Items are stored by id (dicts keep insertion order, which is list order),
+        # so lookup and removal are O(1). The timers/stopwatches lists the UI
+        # indexes into are rebuilt lazily after an add or remove.
+        self._timers_by_id: Dict[str, Timer] = {}
+        self._stopwatches_by_id: Dict[str, Stopwatch] = {}
+        self._timer_list: Optional[List[Timer]] = []
+        self._stopwatch_list: Optional[List[Stopwatch]] = []
         self.timer_count = 0
         self.stopwatch_count = 0
+        # Min-heap of (monotonic ns deadline, timer id). Entries are never removed in place;
+        # stale ones (paused, reset, removed) are skipped when they surface.
+        self._deadlines: List[Tuple[int, str]] = []
+        self.scheduler = Scheduler() # Recurring and chained timers
+
+    @property
+    def timers(self) -> List[Timer]:
+        if self._timer_list is None:
+            self._timer_list = list(self._timers_by_id.values())
+        return self._timer_list
+
+    @property
+    def stopwatches(self) -> List[Stopwatch]:
+        if self._stopwatch_list is None:
+            self._stopwatch_list = list(self._stopwatches_by_id.values())
+        return self._stopwatch_list
+
+    def get(self, item_id: str):
+        """Returns the timer or stopwatch with this id, or None."""
+        return self._timers_by_id.get(item_id) or self._stopwatches_by_id.get(item_id)
+
+    def _add(self, item):
+        # 8 hex digits collide around a hundred thousand items; ids must stay unique keys
+        while item.id in self._timers_by_id or item.id in self._stopwatches_by_id:
+            item.id = new_id()
+        if isinstance(item, Timer):
+            self._timers_by_id[item.id] = item
+            self._timer_list = None
+            self._schedule(item)
+        else:
+            self._stopwatches_by_id[item.id] = item
+            self._stopwatch_list = None
+            if self.lap_spill_dir is not None:
+                item.laps.attach_spill(os.path.join(self.lap_spill_dir, f"{item.id}.laps"))
+
+    def _schedule(self, timer: Timer):
+        deadline = timer.deadline
+        if deadline is not None:
+            heapq.heappush(self._deadlines, (deadline, timer.id))
+            # Keep pause/resume churn from growing the heap without bound
+            if len(self._deadlines) > 2 * len(self._timers_by_id) + 64:
+                self._rebuild_deadlines()
+
+    def _schedule_many(self, timers):
+        entries = [(t.deadline, t.id) for t in timers if t.deadline is not None]
+        heap = self._deadlines
+        if len(entries) * 8 < len(heap):
+            for entry in entries:
+                heapq.heappush(heap, entry)
+        else:
+            heap.extend(entries)
+            heapq.heapify(heap)
+        if len(heap) > 2 * len(self._timers_by_id) + 64:
+            self._rebuild_deadlines()
+
+    def _rebuild_deadlines(self):
+        self._deadlines = [(t.deadline, t.id) for t in self._timers_by_id.values()
+                           if t.deadline is not None]
+        heapq.heapify(self._deadlines)
+
+    def restore(self, states, counts):
+        """Rebuilds timers and stopwatches from SessionJournal.load() output."""
+        self.timer_count = counts.get("timers", 0)
+        self.stopwatch_count = counts.get("stopwatches", 0)
+        for state in states:
+            try:
+                if state["kind"] == "timer":
+                    self._add(Timer.from_state(state, self.clock))
+                elif state["kind"] == "schedule":
+                    self.scheduler.add(Schedule.from_state(state)) # Fires missed meanwhile are due now
+                else:
+                    self._add(Stopwatch.from_state(state, self.clock))
+            except (KeyError, ValueError):
+                continue # Saved by an older version in a different format
+        self._rebuild_deadlines()
+        # Timers that ran out while nobody was attached get their Finished event
+        # on the first update(), which reads back through the heap
+        for timer in self._timers_by_id.values():
+            if timer.state == State.FINISHED and not timer.notified:
+                heapq.heappush(self._deadlines, (timer.start_ns, timer.id))
+
+    def checkpoint(self):
+        """
+        Re-anchors every saved item to the current wall clock, so that only the
+        time the app spends closed is measured with the (steppable) wall clock.
+        """
+        for item in self._timers_by_id.values(): self._record_change(item)
+        for item in self._stopwatches_by_id.values(): self._record_change(item)
 
-    def add_timer(self, duration: int, name: str = ""):
+    def _record_new(self, item):
+        if self.journal is not None:
+            self.journal.counts(self.timer_count, self.stopwatch_count)
+            self.journal.put(item)
+
+    def _record_change(self, item):
+        if self.journal is not None:
+            self.journal.touch(item)
+
+    def add_timer(self, duration: int, name: str = "", tags=()):
         self.timer_count += 1
         if not name:
             name = f"Timer {self.timer_count}"
-        
-        new_timer = Timer(duration, name[:15]) # Cap name
-        self.timers.append(new_timer)
-        log_action("Timer", "Started", f"ID: {new_timer.id}, Name: {new_timer.name}, Duration: {duration}s")
+
+        new_timer = Timer(duration, name[:15], self.clock, tags) # Cap name
+        self._add(new_timer)
+        self._record_new(new_timer)
+        log_action("Timer", "Started", f"ID: {new_timer.id}, Name: {new_timer.name}, Duration: {duration}s",
+                   id=new_timer.id, name=new_timer.name, duration=duration)
         return new_timer
 
-    def add_stopwatch(self, name: str = ""):
+    def add_stopwatch(self, name: str = "", tags=()):
         self.stopwatch_count += 1
         if not name:
             name = f"Stopwatch {self.stopwatch_count}"
-            
-        new_sw = Stopwatch(name[:15]) # Cap name
-        self.stopwatches.append(new_sw)
-        log_action("Stopwatch", "Started", f"ID: {new_sw.id}, Name: {new_sw.name}")
+
+        new_sw = Stopwatch(name[:15], self.clock, tags) # Cap name
+        self._add(new_sw)
+        self._record_new(new_sw)
+        log_action("Stopwatch", "Started", f"ID: {new_sw.id}, Name: {new_sw.name}",
+                   id=new_sw.id, name=new_sw.name)
         return new_sw
 
+    def item_count(self) -> int:
+        return len(self._timers_by_id) + len(self._stopwatches_by_id)
+
+    def item_at(self, index: int):
+        """Maps a list position (timers first, then stopwatches) to its item."""
+        n_timers = len(self.timers)
+        if index < n_timers:
+            return self.timers[index]
+        return self.stopwatches[index - n_timers]
+
     def remove_timer(self, timer: Timer):
-        if timer in self.timers:
-            self.timers.remove(timer)
-            log_action("Timer", "Removed", f"ID: {timer.id}")
+        if self._timers_by_id.pop(timer.id, None) is not None:
+            self._timer_list = None
+            if self.journal is not None: self.journal.delete(timer.id)
+            log_action("Timer", "Removed", f"ID: {timer.id}", id=timer.id)
+            self._unchain(timer.id)
 
     def remove_stopwatch(self, sw: Stopwatch):
-        if sw in self.stopwatches:
-            self.stopwatches.remove(sw)
-            log_action("Stopwatch", "Removed", f"ID: {sw.id}")
+        if self._stopwatches_by_id.pop(sw.id, None) is not None:
+            self._stopwatch_list = None
+            sw.laps.discard()
+            if self.journal is not None: self.journal.delete(sw.id)
+            log_action("Stopwatch", "Removed", f"ID: {sw.id}", id=sw.id)
+
+    def pause(self, item):
+        item.pause()
+        self._record_change(item)
+        log_action(type(item).__name__, "Pause", f"ID: {item.id}", id=item.id)
+
+    def resume(self, item):
+        item.resume()
+        if isinstance(item, Timer):
+            self._schedule(item)
+        self._record_change(item)
+        log_action(type(item).__name__, "Resume", f"ID: {item.id}", id=item.id)
+
+    def reset(self, item):
+        item.reset()
+        if isinstance(item, Timer):
+            self._schedule(item)
+        if self.journal is not None: self.journal.put(item)
+        log_action(type(item).__name__, "Reset", f"ID: {item.id}", id=item.id)
 
     def toggle_all_pause(self):
-        """Pauses all if any are running, otherwise resumes all."""
-        # Check if any are running
-        any_running = any(t.state == State.RUNNING for t in self.timers) or \
-                      any(s.state == State.RUNNING for s in self.stopwatches)
-        
-        if any_running:
-            for t in self.timers: t.pause()
-            for s in self.stopwatches: s.pause()
-            log_action("System", "Control", "Paused All")
+        """
+        Pauses all if any are running, otherwise resumes all. Logged as a
+        System/Bulk record naming the items, like bulk(), so reports see
+        which items stopped and started.
+        """
+        items = self.select()
+        action = "pause" if any(item.state == State.RUNNING for item in items) else "resume"
+        changed = self._apply(action, items)
+        details = "Paused All" if action == "pause" else "Resumed All"
+        log_action("System", "Bulk", details, text=details, op=action, ids=[item.id for item in changed])
+
+    def select(self, prefix=None, tag=None, state=None, ids=None) -> list:
+        """
+        Items matching every given criterion, timers first. ids are looked up
+        directly; the other filters cost one pass over the candidates.
+        """
+        if ids is not None:
+            items = [item for item in map(self.get, dict.fromkeys(ids)) if item is not None]
+        else:
+            items = list(chain(self._timers_by_id.values(), self._stopwatches_by_id.values()))
+        if prefix:
+            items = [item for item in items if item.name.startswith(prefix)]
+        if tag:
+            items = [item for item in items if tag in item.tags]
+        if state is not None:
+            state = State(state)
+            items = [item for item in items if item.state is state]
+        return items
+
+    def bulk(self, action: str, seconds: float = 0, **selector) -> int:
+        """
+        Applies one action to every item select(**selector) returns, all at
+        the same instant, and logs it as a single record. `extend` adds
+        seconds to running and paused timers. Returns how many items changed.
+        """
+        if action not in BULK_ACTIONS:
+            raise ValueError(f"Unknown bulk action: {action}")
+        if isinstance(seconds, bool) or not isinstance(seconds, (int, float)) or not math.isfinite(seconds):
+            raise ValueError(f"Bulk seconds must be a number, not {seconds!r}")
+        changed = self._apply(action, self.select(**selector), seconds)
+        details = f"{action.title()} {len(changed)} items" + (f" by {seconds}s" if action == "extend" else "")
+        log_action("System", "Bulk", details, text=details, op=action,
+                   ids=[item.id for item in changed], seconds=seconds if action == "extend" else None)
+        return len(changed)
+
+    def _apply(self, action, items, seconds=0) -> list:
+        """
+        Runs one bulk action with a single captured timestamp; returns the
+        items it changed. Each action is one pass over the selection rather
+        than over timing columns: the Timer objects stay the only copy of an
+        item's state (the UI, journal and daemon all read them), and per item
+        the cost is in rescheduling and journaling, not the arithmetic.
+        """
+        now = self.clock.monotonic_ns()
+        if action == "delete":
+            for item in items:
+                if isinstance(item, Timer):
+                    self._timers_by_id.pop(item.id, None)
+                    self._unchain(item.id)
+                elif self._stopwatches_by_id.pop(item.id, None) is not None:
+                    item.laps.discard()
+            self._timer_list = self._stopwatch_list = None
+            if self.journal is not None: self.journal.record_many(deletes=[item.id for item in items])
+            return items
+
+        if action == "pause":
+            changed = [item for item in items if item.state == State.RUNNING]
+            for item in changed: item.pause(now)
+        elif action == "resume":
+            changed = [item for item in items if item.state == State.PAUSED]
+            for item in changed: item.resume(now)
+        elif action == "reset":
+            changed = items
+            for item in changed: item.reset(now)
         else:
-            for t in self.timers: t.resume()
-            for s in self.stopwatches: s.resume()
-            log_action("System", "Control", "Resumed All")
+            changed = [item for item in items if isinstance(item, Timer) and item.extend(seconds)]
+
+        if action != "pause":
+            self._schedule_many(item for item in changed if isinstance(item, Timer))
+        if self.journal is not None:
+            if action in ("reset", "extend"):
+                self.journal.record_many(puts=changed)
+            else:
+                self.journal.record_many(touches=changed)
+        return changed
+
+    def lap(self, sw: Stopwatch) -> bool:
+        """Records a lap on a stopwatch; paused stopwatches don't take laps."""
+        before = len(sw.laps)
+        sw.lap()
+        if len(sw.laps) == before:
+            return False
+        if self.journal is not None: self.journal.lap(sw, sw.laps[-1])
+        log_action("Stopwatch", "Lap", f"ID: {sw.id}, Lap Time: {sw.laps[-1]}", id=sw.id, lap=sw.laps[-1])
+        return True
 
     def lap_active(self):
         """Records a lap for the most recently active stopwatch."""
-        for sw in reversed(self.stopwatches):
+        for sw in reversed(self._stopwatches_by_id.values()):
             if sw.state == State.RUNNING:
-                sw.lap()
-                log_action("Stopwatch", "Lap", f"ID: {sw.id}, Lap Time: {sw.laps[-1]}")
-                return True
+                return self.lap(sw)
         return False
 
+    # --- Schedules ---
+
+    def add_schedule(self, schedule: Schedule) -> Schedule:
+        """Takes over a new schedule: queues its first fire, or starts a chain's first step."""
+        while schedule.id in self.scheduler or self.get(schedule.id) is not None:
+            schedule.id = new_id() # Shares the journal's id space with items
+        if schedule.rule != "chain":
+            schedule.next_ns = schedule.next_after(self.clock.wall_ns())
+        self.scheduler.add(schedule)
+        if schedule.rule == "chain":
+            self._start_step(schedule, self.clock.monotonic_ns())
+        self._record_schedule(schedule)
+        details = f"Added {schedule.id} ({schedule.describe()})"
+        log_action("System", "Schedule", details, text=details, op="add", schedule=schedule.id)
+        return schedule
+
+    def remove_schedule(self, schedule_id: str) -> bool:
+        """Stops a schedule; timers it already started carry on. False if there's no such schedule."""
+        schedule = self.scheduler.remove(schedule_id)
+        if schedule is None:
+            return False
+        self._forget_schedule(schedule, "Removed")
+        return True
+
+    def _forget_schedule(self, schedule: Schedule, how: str):
+        self._record_schedule(schedule, deleted=True)
+        details = f"{how} {schedule.id} ({schedule.describe()})"
+        log_action("System", "Schedule", details, text=details, op=how.lower(), schedule=schedule.id)
+
+    def _record_schedule(self, schedule: Schedule, deleted: bool = False):
+        if self.journal is not None:
+            if deleted:
+                self.journal.delete(schedule.id)
+            else:
+                self.journal.put(schedule)
+
+    def _unchain(self, timer_id: str):
+        """Deleting the timer a chain is waiting on ends the chain."""
+        chain = self.scheduler.chain_for(timer_id)
+        if chain is not None:
+            self.remove_schedule(chain.id)
+
+    def _start_scheduled(self, schedule: Schedule, duration: float, start_ns: int) -> Timer:
+        """
+        Starts a schedule's timer as if at monotonic start_ns, so a late tick
+        doesn't shift where it ends; one that would already be over (the app
+        was closed through it) starts now instead.
+        """
+        timer = self.add_timer(duration, schedule.timer_name(), schedule.tags)
+        if timer.start_ns - timer.duration_ns < start_ns < timer.start_ns:
+            timer.start_ns = start_ns
+            self._schedule(timer)
+            self._record_change(timer)
+        return timer
+
+    def _prune(self, timer_ids) -> List[str]:
+        """
+        Removes the timers of earlier fires that have finished and been
+        reported; returns the ids of those still around (running or paused).
+        """
+        kept = []
+        for timer_id in timer_ids:
+            timer = self._timers_by_id.get(timer_id)
+            if timer is None:
+                continue
+            if timer.state == State.FINISHED and timer.notified:
+                self.remove_timer(timer)
+            else:
+                kept.append(timer_id)
+        return kept
+
+    def _start_step(self, chain: Schedule, start_ns: int):
+        previous = chain.timer_id
+        timer = self._start_scheduled(chain, chain.steps[chain.step], start_ns)
+        chain.fired += 1
+        self.scheduler.link(chain, timer.id)
+        if previous is not None:
+            self._prune([previous]) # Unlinked first, so removing it doesn't end the chain
+
+    def _next_step(self, chain: Schedule, end_ns: int):
+        if not chain.advance():
+            self.scheduler.remove(chain.id)
+            self._forget_schedule(chain, "Finished")
+            return
+        self._start_step(chain, end_ns)
+        self._record_schedule(chain)
+
+    def _run_schedules(self):
+        """Starts the timers of every schedule due by now and queues each one's next fire."""
+        fire = self.scheduler.next_fire()
+        if fire is None:
+            return
+        wall = self.clock.wall_ns()
+        if fire > wall:
+            return
+        now = self.clock.monotonic_ns()
+        for schedule in self.scheduler.pop_due(wall):
+            timer = self._start_scheduled(schedule, schedule.duration, now - (wall - schedule.next_ns))
+            schedule.timer_ids = self._prune(schedule.timer_ids) + [timer.id]
+            schedule.fired += 1
+            # The next fire comes from the rule; fires missed while closed collapse into this one
+            try:
+                next_ns = schedule.next_after(wall)
+            except ValueError:
+                next_ns = None
+            if next_ns is None or next_ns <= wall:
+                # No later fire: requeueing would fire it on every tick, so it stops here
+                self.scheduler.remove(schedule.id)
+                self._forget_schedule(schedule, "Dropped")
+                continue
+            schedule.next_ns = next_ns
+            self.scheduler.push(schedule)
+            self._record_schedule(schedule)
+
+    def next_deadline(self):
+        """
+        Earliest pending timer deadline or schedule fire (monotonic ns),
+        discarding stale heap entries on the way.
+        """
+        deadline = None
+        heap = self._deadlines
+        while heap:
+            deadline, timer_id = heap[0]
+            timer = self._timers_by_id.get(timer_id)
+            if timer is not None and not timer.notified and timer.deadline == deadline:
+                break
+            heapq.heappop(heap)
+            deadline = None
+        fire = self.scheduler.next_fire()
+        if fire is not None:
+            wait = min(max(0, fire - self.clock.wall_ns()), SCHEDULE_RECHECK_NS)
+            fire = self.clock.monotonic_ns() + wait
+            if deadline is None or fire < deadline:
+                deadline = fire
+        return deadline
+
+    def _finish(self, timer: Timer) -> bool:
+        """Marks an expired timer finished; False if it's not this manager's to report."""
+        timer.stop()
+        timer.notified = True
+        self._record_change(timer)
+        return True
+
     def update(self):
         """
-        Called every tick. 
-        Checks for finished timers to log them or trigger events.
+        Called every tick.
+        Pops only the deadlines that have passed, so the cost of a tick
+        depends on how many timers expire rather than how many exist.
         """
-        for timer in self.timers:
-            # Trigger state update if needed
-            if timer.state == State.RUNNING:
-                _ = timer.remaining_time # This property access updates state to FINISHED if time sets to 0
-            
+        self._run_schedules()
+        if not self._deadlines:
+            return
+        now = self.clock.monotonic_ns()
+        # _finish() may rebuild the heap, so it's looked up on every pass
+        while self._deadlines and self._deadlines[0][0] <= now:
+            deadline, timer_id = heapq.heappop(self._deadlines)
+            timer = self._timers_by_id.get(timer_id)
+            if timer is None or timer.notified or timer.state == State.PAUSED:
+                continue # Removed, already handled, or rescheduled on resume
+            if timer.state == State.RUNNING and timer.deadline != deadline:
+                continue # Superseded by a reset
+
             # Check for completion event
-            if timer.state == State.FINISHED and not timer.notified:
-                timer.notified = True
-                log_action("Timer", "Finished", f"ID: {timer.id}")
-                from .sound import play_sound
-                play_sound()
+            finished = self._finish(timer)
+            timer = self._timers_by_id.get(timer_id)
+            if timer is None or timer.state != State.FINISHED:
+                continue # Removed, or still running after all
+            if finished:
+                log_action("Timer", "Finished", f"ID: {timer.id}", id=timer.id)
+                if self.notifier is not None:
+                    self.notifier.notify({"event": "finished", "id": timer.id, "name": timer.name,
+                                          "duration": timer.duration, "wall": self.clock.wall_ns() / 1e9})
+            chain = self.scheduler.chain_for(timer.id)
+            if chain is not None:
+                # The next step starts where this one ran out, not where the tick noticed
+                self._next_step(chain, timer.start_ns + timer.paused_ns + timer.duration_ns)
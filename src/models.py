@@ -1,7 +1,6 @@
-import time
 import uuid
 from enum import Enum
-from typing import List, Optional
+from typing import Optional
 
 class State(Enum):
     RUNNING = "RUNNING"
@@ -10,15 +9,39 @@ class State(Enum):
     IDLE = "IDLE"  # Initial state for Stopwatch
 
 from .utils import format_time
+from .clock import Clock, SYSTEM_CLOCK, NS_PER_SEC
+from .laps import LapLog
+
+def _restored_elapsed_ns(state: dict, clock: Clock) -> int:
+    """
+    Elapsed time of a saved item as of now. Monotonic readings don't survive a
+    restart, so time spent running while the app was closed is taken from the
+    wall clock (never negative, in case it was set back in between).
+    """
+    elapsed = state["elapsed_ns"]
+    if state["state"] == State.RUNNING.value:
+        elapsed += max(0, clock.wall_ns() - state["wall_ns"])
+    return elapsed
+
+def new_id() -> str:
+    return uuid.uuid4().hex[:8] # Same 8 hex digits str(uuid4())[:8] gave
 
 class Timer:
-    def __init__(self, duration_seconds: int, name: str):
-        self.id = str(uuid.uuid4())[:8]
+    # No per-instance __dict__: large fleets cost a fraction of the memory
+    __slots__ = ("clock", "id", "name", "tags", "duration", "duration_ns", "original_duration_str",
+                 "start_ns", "pause_ns", "paused_ns", "state", "notified")
+
+    def __init__(self, duration_seconds: int, name: str, clock: Clock = SYSTEM_CLOCK, tags=()):
+        self.clock = clock
+        self.id = new_id()
         self.name = name
+        self.tags = frozenset(tags) # Labels for selecting items in bulk
         self.duration = duration_seconds
+        self.duration_ns = round(duration_seconds * NS_PER_SEC)
         self.original_duration_str = format_time(duration_seconds) # To show on left
-        self.pause_time: Optional[float] = None
-        self.accumulated_pause: float = 0.0
+        # All interval math is integer nanoseconds on the monotonic clock
+        self.pause_ns: Optional[int] = None
+        self.paused_ns: int = 0
         self.state = State.RUNNING # Auto-starts on creation usually, or we can make it explicit
         self.notified = False
         
@@ -26,51 +49,98 @@ class Timer:
         self.start()
 
     def start(self):
-        self.start_time = time.time()
+        self.start_ns = self.clock.monotonic_ns()
         self.state = State.RUNNING
 
-    def pause(self):
+    def pause(self, now: Optional[int] = None):
         if self.state == State.RUNNING:
-            self.pause_time = time.time()
+            self.pause_ns = self.clock.monotonic_ns() if now is None else now
             self.state = State.PAUSED
 
-    def resume(self):
+    def resume(self, now: Optional[int] = None):
         if self.state == State.PAUSED:
-            now = time.time()
-            self.accumulated_pause += (now - self.pause_time)
-            self.pause_time = None
+            self.paused_ns += (self.clock.monotonic_ns() if now is None else now) - self.pause_ns
+            self.pause_ns = None
             self.state = State.RUNNING
 
     def stop(self):
         self.state = State.FINISHED
 
-    def reset(self):
-        self.start_time = time.time()
-        self.pause_time = None
-        self.accumulated_pause = 0.0
+    def reset(self, now: Optional[int] = None):
+        self.start_ns = self.clock.monotonic_ns() if now is None else now
+        self.pause_ns = None
+        self.paused_ns = 0
         self.state = State.RUNNING
         self.notified = False
 
+    def extend(self, seconds: float) -> bool:
+        """
+        Adds seconds to a running or paused timer. Finished timers are left
+        alone, as is any timer the change would leave with no duration.
+        """
+        if self.state not in (State.RUNNING, State.PAUSED) or self.duration + seconds <= 0:
+            return False
+        self.duration += seconds
+        self.duration_ns += round(seconds * NS_PER_SEC)
+        self.original_duration_str = format_time(self.duration)
+        return True
+
+    def elapsed_ns(self) -> int:
+        now = self.pause_ns if self.state == State.PAUSED else self.clock.monotonic_ns()
+        return now - self.start_ns - self.paused_ns
+
     @property
     def remaining_time(self) -> float:
         if self.state == State.FINISHED:
             return 0.0
-        
-        if self.start_time is None:
-            return float(self.duration)
 
-        now = time.time()
-        if self.state == State.PAUSED:
-            now = self.pause_time
-
-        elapsed = now - self.start_time - self.accumulated_pause
-        remaining = self.duration - elapsed
-        
+        remaining = self.duration_ns - self.elapsed_ns()
         if remaining <= 0:
             self.state = State.FINISHED
             return 0.0
         
-        return remaining
+        return remaining / NS_PER_SEC
+
+    def timing_state(self) -> dict:
+        """The fields that change on pause/resume/finish, anchored to the wall clock."""
+        return {
+            "state": self.state.value, "elapsed_ns": min(self.elapsed_ns(), self.duration_ns),
+            "wall_ns": self.clock.wall_ns(), "notified": self.notified,
+        }
+
+    def to_state(self) -> dict:
+        """Compact, JSON-friendly snapshot of everything needed to resume this timer."""
+        state = {"kind": "timer", "id": self.id, "name": self.name, "duration": self.duration}
+        if self.tags:
+            state["tags"] = sorted(self.tags)
+        state.update(self.timing_state())
+        return state
+
+    @classmethod
+    def from_state(cls, state: dict, clock: Clock = SYSTEM_CLOCK) -> "Timer":
+        """Rebuilds a timer from to_state() output without restarting it."""
+        timer = cls.__new__(cls)
+        timer.clock = clock
+        timer.id = state["id"]
+        timer.name = state["name"]
+        timer.tags = frozenset(state.get("tags", ()))
+        timer.duration = state["duration"]
+        timer.duration_ns = round(timer.duration * NS_PER_SEC)
+        timer.original_duration_str = format_time(timer.duration)
+        timer.state = State(state["state"])
+        timer.notified = state["notified"]
+        now = clock.monotonic_ns()
+        timer.start_ns = now - _restored_elapsed_ns(state, clock)
+        timer.paused_ns = 0
+        timer.pause_ns = now if timer.state == State.PAUSED else None
+        return timer
+
+    @property
+    def deadline(self) -> Optional[int]:
+        """Monotonic nanosecond reading at which a running timer expires, None otherwise."""
+        if self.state != State.RUNNING:
+            return None
+        return self.start_ns + self.paused_ns + self.duration_ns
 
     @property
     def progress(self) -> float:
@@ -81,51 +151,79 @@ class Timer:
         return 1.0 - (rem / self.duration)
 
 class Stopwatch:
-    def __init__(self, name: str):
-        self.id = str(uuid.uuid4())[:8]
+    __slots__ = ("clock", "id", "name", "tags", "start_ns", "pause_ns", "paused_ns", "laps", "state")
+
+    def __init__(self, name: str, clock: Clock = SYSTEM_CLOCK, tags=()):
+        self.clock = clock
+        self.id = new_id()
         self.name = name
-        self.start_time: Optional[float] = None
-        self.pause_time: Optional[float] = None
-        self.accumulated_pause: float = 0.0
-        self.laps: List[float] = [] # timestamps of laps
+        self.tags = frozenset(tags)
+        self.pause_ns: Optional[int] = None
+        self.paused_ns: int = 0
+        self.laps = LapLog() # Cumulative times of laps, with split statistics
         self.state = State.RUNNING # Auto-start
         
         self.start()
 
     def start(self):
-        self.start_time = time.time()
+        self.start_ns = self.clock.monotonic_ns()
         self.state = State.RUNNING
 
-    def pause(self):
+    def pause(self, now: Optional[int] = None):
         if self.state == State.RUNNING:
-            self.pause_time = time.time()
+            self.pause_ns = self.clock.monotonic_ns() if now is None else now
             self.state = State.PAUSED
 
-    def resume(self):
+    def resume(self, now: Optional[int] = None):
         if self.state == State.PAUSED:
-            now = time.time()
-            self.accumulated_pause += (now - self.pause_time)
-            self.pause_time = None
+            self.paused_ns += (self.clock.monotonic_ns() if now is None else now) - self.pause_ns
+            self.pause_ns = None
             self.state = State.RUNNING
 
-    def reset(self):
-        self.start_time = time.time()
-        self.pause_time = None
-        self.accumulated_pause = 0.0
-        self.laps = []
+    def reset(self, now: Optional[int] = None):
+        self.start_ns = self.clock.monotonic_ns() if now is None else now
+        self.pause_ns = None
+        self.paused_ns = 0
+        self.laps = self.laps.cleared()
         self.state = State.RUNNING
 
     def lap(self):
         if self.state == State.RUNNING:
             self.laps.append(self.elapsed_time)
 
+    def elapsed_ns(self) -> int:
+        now = self.pause_ns if self.state == State.PAUSED else self.clock.monotonic_ns()
+        return now - self.start_ns - self.paused_ns
+
+    def timing_state(self) -> dict:
+        """The fields that change on pause/resume, anchored to the wall clock."""
+        return {"state": self.state.value, "elapsed_ns": self.elapsed_ns(), "wall_ns": self.clock.wall_ns()}
+
+    def to_state(self) -> dict:
+        """Compact, JSON-friendly snapshot of everything needed to resume this stopwatch."""
+        state = {"kind": "stopwatch", "id": self.id, "name": self.name}
+        state.update(self.laps.to_state())
+        if self.tags:
+            state["tags"] = sorted(self.tags)
+        state.update(self.timing_state())
+        return state
+
+    @classmethod
+    def from_state(cls, state: dict, clock: Clock = SYSTEM_CLOCK) -> "Stopwatch":
+        """Rebuilds a stopwatch from to_state() output without restarting it."""
+        sw = cls.__new__(cls)
+        sw.clock = clock
+        sw.id = state["id"]
+        sw.name = state["name"]
+        sw.tags = frozenset(state.get("tags", ()))
+        sw.laps = LapLog.from_state(state)
+        sw.state = State(state["state"])
+        now = clock.monotonic_ns()
+        sw.start_ns = now - _restored_elapsed_ns(state, clock)
+        sw.paused_ns = 0
+        sw.pause_ns = now if sw.state == State.PAUSED else None
+        return sw
+
     @property
     def elapsed_time(self) -> float:
-        if self.start_time is None:
-            return 0.0
-
-        now = time.time()
-        if self.state == State.PAUSED:
-            now = self.pause_time
-
-        return now - self.start_time - self.accumulated_pause
+        return self.elapsed_ns() / NS_PER_SEC
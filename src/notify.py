@@ -0,0 +1,242 @@
+import json
+import os
+import subprocess
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+from urllib.parse import urlparse
+from .logging_setup import log_action
+
+# Hosts a webhook sink may post to; alerts never leave the machine
+LOOPBACK_HOSTS = ("localhost", "127.0.0.1", "::1")
+
+class Sink:
+    """
+    Somewhere finished-timer notifications go. deliver() receives every
+    event that piled up since the previous call (at least one) and may block;
+    it always runs on a pool worker, never on the main loop.
+    """
+    name = "sink"
+
+    def __init__(self, max_pending=1024):
+        self.max_pending = max_pending # Oldest events are dropped past this
+
+    def deliver(self, events: List[dict]):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class SoundSink(Sink):
+    """
+    One alert sound per batch, however many timers finished together, played
+    by a long-lived AudioWorker. `path` may name a WAV to use instead of the
+    built-in alert.
+    """
+    name = "sound"
+
+    def __init__(self, path=None, max_pending=1024):
+        super().__init__(max_pending)
+        from .sound import AudioWorker, get_audio_worker
+        if path:
+            self.worker = AudioWorker(path)
+            self.worker.start() # Loads the sample now rather than on the first alert
+        else:
+            self.worker = get_audio_worker()
+
+    def deliver(self, events):
+        self.worker.play(wait=True)
+
+    def close(self):
+        from .sound import get_audio_worker
+        if self.worker is not get_audio_worker():
+            self.worker.stop()
+
+class BellSink(Sink):
+    """
+    Rings the dashboard's bell (or flashes the screen with "visual_bell" set).
+    The ring itself happens on the dashboard's UI thread.
+    """
+    name = "bell"
+
+    def deliver(self, events):
+        from .sound import request_bell
+        request_bell() # No dashboard (e.g. the daemon): nothing to ring
+
+class CommandSink(Sink):
+    """
+    Runs a shell command per batch. The events are passed as JSON lines on
+    stdin; the newest one is also in TIMER_ID / TIMER_NAME, with TIMER_COUNT
+    saying how many were coalesced.
+    """
+    name = "command"
+
+    def __init__(self, command, timeout=10.0, max_pending=1024):
+        super().__init__(max_pending)
+        self.command = command
+        self.timeout = timeout
+
+    def deliver(self, events):
+        latest = events[-1]
+        env = dict(os.environ, TIMER_ID=latest["id"], TIMER_NAME=latest["name"], TIMER_COUNT=str(len(events)))
+        payload = "".join(json.dumps(e) + "\n" for e in events).encode("utf-8")
+        subprocess.run(self.command, shell=True, input=payload, env=env, timeout=self.timeout,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+
+class FifoSink(Sink):
+    """
+    Appends events as JSON lines to a named pipe (created if missing). With
+    no reader attached the events are dropped instead of blocking.
+    """
+    name = "fifo"
+
+    def __init__(self, path, max_pending=1024):
+        super().__init__(max_pending)
+        self.path = os.path.expanduser(path)
+        if not os.path.exists(self.path):
+            os.mkfifo(self.path, 0o600)
+
+    def deliver(self, events):
+        try:
+            fd = os.open(self.path, os.O_WRONLY | os.O_NONBLOCK)
+        except OSError:
+            return # ENXIO: nobody is reading
+        try:
+            os.write(fd, "".join(json.dumps(e) + "\n" for e in events).encode("utf-8"))
+        except BlockingIOError:
+            pass # Reader isn't keeping up; these events are lost to it
+        finally:
+            os.close(fd)
+
+class WebhookSink(Sink):
+    """POSTs {"events": [...]} as JSON to a webhook on this machine."""
+    name = "webhook"
+
+    def __init__(self, url, timeout=2.0, max_pending=1024):
+        super().__init__(max_pending)
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https") or parsed.hostname not in LOOPBACK_HOSTS:
+            raise ValueError(f"Webhook must be an http(s) URL on {', '.join(LOOPBACK_HOSTS)}: {url}")
+        self.url = url
+        self.timeout = timeout
+
+    def deliver(self, events):
+        from urllib.request import Request, urlopen
+        body = json.dumps({"events": events}).encode("utf-8")
+        request = Request(self.url, data=body, headers={"Content-Type": "application/json"}, method="POST")
+        with urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+SINK_TYPES = {cls.name: cls for cls in (SoundSink, BellSink, CommandSink, FifoSink, WebhookSink)}
+
+def build_sinks(specs) -> List[Sink]:
+    """Sinks from the "notifications" config list, e.g. [{"type": "command", "command": "..."}]."""
+    sinks = []
+    for spec in specs:
+        options = dict(spec)
+        cls = SINK_TYPES.get(options.pop("type", None))
+        if cls is None:
+            raise ValueError(f"Unknown notification sink: {spec}")
+        try:
+            sinks.append(cls(**options))
+        except TypeError as e:
+            raise ValueError(f"Bad options for {cls.name} sink: {e}")
+    return sinks
+
+def build_notifier(config) -> "Notifier":
+    """The Notifier described by the config; sinks that can't be set up are logged and skipped."""
+    sinks = []
+    for spec in config["notifications"]:
+        try:
+            sinks.extend(build_sinks([spec]))
+        except (ValueError, OSError) as e:
+            log_action("System", "Notify", f"Ignored sink: {e}")
+    return Notifier(sinks, workers=config["notify_workers"], debounce=config["notify_debounce"])
+
+class _Lane:
+    """Per-sink queue; at most one delivery for a sink is in flight at a time."""
+    __slots__ = ("sink", "label", "pending", "dropped", "busy", "stats")
+
+    def __init__(self, sink, label):
+        self.sink = sink
+        self.label = label
+        self.pending = deque(maxlen=sink.max_pending)
+        self.dropped = 0
+        self.busy = False
+        self.stats = {"delivered": 0, "dropped": 0, "failed": 0}
+
+class Notifier:
+    """
+    Fans finished-timer events out to sinks through a bounded thread pool.
+
+    notify() only appends to each sink's bounded queue, so the main loop
+    never waits on a sink. The first event for an idle sink schedules one
+    delivery, which waits `debounce` seconds so events arriving together are
+    delivered as one batch. Each sink has at most one delivery in flight: a
+    slow sink backs up (dropping its oldest events) without holding more
+    than one worker or slowing down the others.
+
+    `stats` counts each sink's events, keyed by sink name; a second sink of
+    the same kind is "command#2" and so on. summary() formats them for the
+    performance overlay.
+    """
+    def __init__(self, sinks, workers=4, debounce=0.05):
+        self.debounce = debounce
+        self._lanes = []
+        seen: Dict[str, int] = {}
+        for sink in sinks:
+            seen[sink.name] = seen.get(sink.name, 0) + 1
+            label = sink.name if seen[sink.name] == 1 else f"{sink.name}#{seen[sink.name]}"
+            self._lanes.append(_Lane(sink, label))
+        self._lock = threading.Lock()
+        self._pool = None
+        if self._lanes:
+            self._pool = ThreadPoolExecutor(max_workers=max(1, min(workers, len(self._lanes))),
+                                            thread_name_prefix="notify")
+        self.stats: Dict[str, Dict[str, int]] = {lane.label: lane.stats for lane in self._lanes}
+
+    def notify(self, event: dict):
+        if self._pool is None:
+            return
+        with self._lock:
+            for lane in self._lanes:
+                if len(lane.pending) == lane.pending.maxlen:
+                    lane.dropped += 1
+                lane.pending.append(event)
+                if not lane.busy:
+                    lane.busy = True
+                    self._pool.submit(self._drain, lane)
+
+    def _drain(self, lane):
+        while True:
+            if self.debounce:
+                time.sleep(self.debounce)
+            with self._lock:
+                events = list(lane.pending)
+                lane.pending.clear()
+                dropped, lane.dropped = lane.dropped, 0
+                if not events:
+                    lane.busy = False
+                    return
+            stats = lane.stats
+            stats["dropped"] += dropped
+            try:
+                lane.sink.deliver(events)
+                stats["delivered"] += len(events)
+            except Exception:
+                stats["failed"] += len(events) # A broken sink must not take the pool down
+
+    def summary(self) -> List[str]:
+        """One line per sink: events delivered, dropped from a full queue, and failed."""
+        return [f"notify {label:<10} ok {s['delivered']}  dropped {s['dropped']}  failed {s['failed']}"
+                for label, s in self.stats.items()]
+
+    def close(self):
+        """Lets in-flight deliveries finish; events still queued are delivered first."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+            for lane in self._lanes:
+                lane.sink.close()
@@ -0,0 +1,15 @@
+import os
+
+def get_log_path(log_filename="timer_cli.log"):
+    """Returns the absolute path to the log file in the user's home directory."""
+    home_dir = os.path.expanduser("~")
+    log_dir = os.path.join(home_dir, ".timer_cli")
+    os.makedirs(log_dir, exist_ok=True)
+
+    return os.path.join(log_dir, log_filename)
+
+def get_lap_spill_dir():
+    """Directory for stopwatch laps spilled out of memory (~/.timer_cli/laps)."""
+    path = get_log_path("laps")
+    os.makedirs(path, exist_ok=True)
+    return path
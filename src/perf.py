@@ -0,0 +1,137 @@
+import time
+from collections import deque
+from typing import List, Optional
+
+# A frame whose work (input + update + render) takes longer than this, or
+# that wakes this much later than its change was due, counts as dropped
+FRAME_BUDGET = 1 / 30
+PHASES = ("input", "update", "render", "sleep")
+# Frame-time histogram bucket upper bounds in milliseconds; the last is open
+BUCKETS_MS = (1, 2, 4, 8, 16, 33, 66, 133)
+
+class Histogram:
+    """Counts of values (in ms) per BUCKETS_MS bucket."""
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, ms: float):
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms < bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def labels(self) -> List[str]:
+        return [f"<{b}" for b in BUCKETS_MS] + [f">={BUCKETS_MS[-1]}"]
+
+class CountingWindow:
+    """Passes everything through to a curses window, counting the calls."""
+    def __init__(self, window):
+        self._window = window
+        self.calls = 0
+
+    def __getattr__(self, name):
+        attr = getattr(self._window, name)
+        if not callable(attr):
+            return attr
+        def counted(*args):
+            self.calls += 1
+            return attr(*args)
+        return counted
+
+class FrameStats:
+    """
+    Per-frame instrumentation of the dashboard loop. The loop only touches it
+    when it exists: App.perf is None until the overlay is first shown (or
+    --profile is given), so an uninstrumented session pays one `is None`
+    check per phase and nothing else.
+
+    Each frame calls begin(), then mark() after every phase and end() last.
+    Averages cover the last `window` frames.
+    """
+    def __init__(self, window: int = 120):
+        self.visible = False
+        self.frames = 0
+        self.dropped = 0
+        self.histogram = Histogram()
+        self.recent = {phase: deque(maxlen=window) for phase in PHASES}
+        self.curses_calls = deque(maxlen=window)
+        self.log_latency = deque(maxlen=window) # Seconds from log_action to the record being on disk
+        self._window = None
+        self._mark = 0.0
+        self._phases = {}
+        self._delay = None
+
+    def wrap(self, stdscr):
+        """The window to draw through, counting curses calls per frame."""
+        if self._window is None or self._window._window is not stdscr:
+            self._window = CountingWindow(stdscr)
+        return self._window
+
+    def observe_log_writes(self, latencies):
+        """Called from the log writer thread with each batch's latencies."""
+        self.log_latency.extend(latencies)
+
+    def begin(self):
+        self._phases = {}
+        self._mark = time.perf_counter()
+        if self._window is not None:
+            self._window.calls = 0
+
+    def mark(self, phase, delay: Optional[float] = None):
+        """Ends `phase`; for "sleep", delay is how long the loop meant to wait."""
+        now = time.perf_counter()
+        self._phases[phase] = now - self._mark
+        self._mark = now
+        if phase == "sleep":
+            self._delay = delay
+
+    def end(self):
+        self.mark("input")
+        phases = self._phases
+        for phase in PHASES:
+            self.recent[phase].append(phases.get(phase, 0.0))
+        work = phases.get("update", 0.0) + phases.get("render", 0.0) + phases["input"]
+        late = 0.0
+        if self._delay is not None:
+            late = phases.get("sleep", 0.0) - self._delay
+        self.frames += 1
+        if work > FRAME_BUDGET or late > FRAME_BUDGET:
+            self.dropped += 1
+        self.histogram.add(work * 1000)
+        self.curses_calls.append(self._window.calls if self._window is not None else 0)
+
+    @staticmethod
+    def _mean(values) -> float:
+        return sum(values) / len(values) if values else 0.0
+
+    def summary(self) -> List[str]:
+        lines = [f"frames {self.frames}  dropped {self.dropped}"]
+        for phase in PHASES:
+            values = self.recent[phase]
+            lines.append(f"{phase:<7}{self._mean(values) * 1000:8.2f} ms  max {max(values, default=0) * 1000:8.2f}")
+        lines.append(f"curses calls/frame {self._mean(self.curses_calls):6.1f}")
+        latency = list(self.log_latency)
+        lines.append(f"log write {self._mean(latency) * 1000:6.1f} ms  max {max(latency, default=0) * 1000:6.1f}")
+        lines.append("frame ms " + " ".join(f"{label}:{count}" for label, count
+                                            in zip(self.histogram.labels(), self.histogram.counts) if count))
+        return lines
+
+def start_profiler():
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+def write_profile(profiler, path, frame_stats: Optional[FrameStats] = None, top: int = 25) -> str:
+    """Stops the profiler, saves its stats to `path` and returns a text report."""
+    import io
+    import pstats
+    profiler.disable()
+    profiler.dump_stats(path)
+    out = io.StringIO()
+    if frame_stats is not None:
+        out.write("\n".join(frame_stats.summary()) + "\n\n")
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(top)
+    out.write(f"Full profile saved to {path} (open with python -m pstats)\n")
+    return out.getvalue()
@@ -0,0 +1,226 @@
+import json
+import os
+import queue
+import threading
+import time
+from typing import Dict, List, Tuple
+from .laps import fold_lap
+try:
+    import fcntl
+except ImportError: # Windows: no advisory locks, sessions aren't arbitrated
+    fcntl = None
+
+SNAPSHOT_VERSION = 2
+
+def apply_change(states: Dict[str, dict], entry: dict):
+    """
+    Folds one change entry into a dict of item states (id -> to_state()).
+    Shared by the journal replay and by anything mirroring a manager remotely.
+    """
+    op = entry["op"]
+    if op == "put":
+        states[entry["state"]["id"]] = entry["state"] # A reset keeps its list position
+    elif op == "update":
+        state = states.get(entry["id"])
+        if state is not None:
+            state.update(entry["fields"])
+    elif op == "lap":
+        state = states.get(entry["id"])
+        if state is not None:
+            fold_lap(state, entry["t"])
+    elif op == "del":
+        states.pop(entry["id"], None)
+
+class SessionJournal:
+    """
+    Crash-safe persistence of every timer and stopwatch.
+
+    Changes are queued by the manager and written by a background thread as
+    one JSON line each to an append-only journal (`session.journal`). Every
+    compact_every entries the thread folds its view of the state into a
+    snapshot (`session.snapshot`) and truncates the journal. Each entry has
+    a sequence number and the snapshot records the last one it includes, so
+    replaying a journal left behind by a crash mid-compaction is harmless.
+    """
+    _STOP = object()
+
+    def __init__(self, directory, compact_every=1000, flush_interval=0.2):
+        self.snapshot_path = os.path.join(directory, "session.snapshot")
+        self.journal_path = os.path.join(directory, "session.journal")
+        self.lock_path = os.path.join(directory, "session.lock")
+        self._lock_file = None
+        self.compact_every = compact_every
+        self.flush_interval = flush_interval
+        self.queue = queue.SimpleQueue()
+        self._states: Dict[str, dict] = {} # Owned by the writer thread once started
+        self._counts = {"timers": 0, "stopwatches": 0}
+        self._seq = 0
+        self._since_snapshot = 0
+        self._thread = None
+
+    def acquire(self) -> bool:
+        """
+        Takes the session lock so only one process restores and journals the
+        saved items. Returns False if another session already holds it.
+        """
+        if fcntl is None:
+            return True
+        self._lock_file = open(self.lock_path, "a")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._lock_file.close()
+            self._lock_file = None
+            return False
+        return True
+
+    # --- Restore (called once, before start) ---
+
+    def load(self) -> Tuple[List[dict], dict]:
+        """Returns (item states in list order, counters) from snapshot plus journal."""
+        snapshot_seq = 0
+        try:
+            with open(self.snapshot_path, "r") as f:
+                snapshot = json.load(f)
+            if snapshot.get("version") == SNAPSHOT_VERSION:
+                snapshot_seq = snapshot["seq"]
+                self._counts = snapshot["counts"]
+                self._states = {s["id"]: s for s in snapshot["items"]}
+        except (OSError, ValueError, KeyError):
+            pass
+        self._seq = snapshot_seq
+
+        try:
+            with open(self.journal_path, "r") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break # Torn final line from a crash
+                    if entry["seq"] <= snapshot_seq:
+                        continue
+                    self._apply(entry)
+                    self._seq = entry["seq"]
+                    self._since_snapshot += 1
+        except OSError:
+            pass
+        return list(self._states.values()), dict(self._counts)
+
+    def _apply(self, entry):
+        if entry["op"] == "counts":
+            self._counts = entry["counts"]
+        else:
+            apply_change(self._states, entry)
+
+    # --- Recording (called from the UI thread; never touches the disk) ---
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="session-journal", daemon=True)
+        self._thread.start()
+
+    def put(self, item):
+        """Records an item's full state (creation, reset)."""
+        # Captured now: laps taken before the writer runs arrive as their own entries
+        self.queue.put(("put", item.to_state()))
+
+    def touch(self, item):
+        """Records an item's timing fields and state (pause, resume, finish)."""
+        self.queue.put(("update", (item.id, item.timing_state())))
+
+    def lap(self, item, value):
+        self.queue.put(("lap", (item.id, value)))
+
+    def delete(self, item_id):
+        self.queue.put(("del", item_id))
+
+    def record_many(self, puts=(), touches=(), deletes=()):
+        """Records a bulk operation as one queue entry; the journal still gets one line per item."""
+        ops = [("put", item.to_state()) for item in puts]
+        ops.extend(("update", (item.id, item.timing_state())) for item in touches)
+        ops.extend(("del", item_id) for item_id in deletes)
+        if ops:
+            self.queue.put(("many", ops))
+
+    def counts(self, timers, stopwatches):
+        self.queue.put(("counts", {"timers": timers, "stopwatches": stopwatches}))
+
+    def close(self):
+        """Writes everything still queued, compacts, and stops the writer."""
+        if self._thread is not None and self._thread.is_alive():
+            self.queue.put(self._STOP)
+            self._thread.join()
+        if self._lock_file is not None:
+            self._lock_file.close() # Releases the lock
+            self._lock_file = None
+
+    # --- Writer thread ---
+
+    def _entry(self, op, payload):
+        if op == "put":
+            return {"op": "put", "state": payload}
+        if op == "update":
+            return {"op": "update", "id": payload[0], "fields": payload[1]}
+        if op == "lap":
+            return {"op": "lap", "id": payload[0], "t": payload[1]}
+        if op == "del":
+            return {"op": "del", "id": payload}
+        return {"op": "counts", "counts": payload}
+
+    def _run(self):
+        journal = open(self.journal_path, "a", encoding="utf-8")
+        stopping = False
+        while not stopping:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while batch[-1] is not self._STOP:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            if batch[-1] is self._STOP:
+                batch.pop()
+                stopping = True
+
+            ops = []
+            for op, payload in batch:
+                if op == "many":
+                    ops.extend(payload)
+                else:
+                    ops.append((op, payload))
+            lines = []
+            for op, payload in ops:
+                entry = self._entry(op, payload)
+                self._seq += 1
+                entry["seq"] = self._seq
+                lines.append(json.dumps(entry, separators=(",", ":")) + "\n")
+                self._apply(entry)
+            try:
+                journal.write("".join(lines))
+                journal.flush()
+            except OSError:
+                pass
+            self._since_snapshot += len(lines)
+
+            if stopping or self._since_snapshot >= max(self.compact_every, len(self._states)):
+                journal = self._compact(journal)
+        journal.close()
+
+    def _compact(self, journal):
+        snapshot = {
+            "version": SNAPSHOT_VERSION, "seq": self._seq, "counts": self._counts,
+            "items": list(self._states.values()),
+        }
+        try:
+            tmp_path = self.snapshot_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, separators=(",", ":"))
+            os.replace(tmp_path, self.snapshot_path)
+            journal.close()
+            journal = open(self.journal_path, "w", encoding="utf-8")
+            self._since_snapshot = 0
+        except OSError:
+            pass # Keep appending to the journal; try again later
+        return journal
@@ -0,0 +1,149 @@
+import heapq
+from typing import Dict, List, Optional
+from .models import Timer, Stopwatch, State
+from .clock import Clock, SYSTEM_CLOCK
+from .persistence import apply_change
+from .client import DaemonClient, DaemonError
+
+class RemoteManager:
+    """
+    TimeManager stand-in for a UI attached to the daemon.
+
+    It subscribes once and keeps local Timer/Stopwatch copies rebuilt from
+    the change entries the daemon pushes, so rendering and frame scheduling
+    run on local objects exactly as with a local manager and nothing is
+    polled. Every action is a request; its effect arrives as a change
+    before the reply returns.
+    """
+    def __init__(self, client: DaemonClient, clock: Clock = SYSTEM_CLOCK):
+        self.client = client
+        self.clock = clock
+        self.journal = None
+        self._states: Dict[str, dict] = {}
+        self._items: Dict[str, object] = {}
+        self._timer_list: Optional[List[Timer]] = None
+        self._stopwatch_list: Optional[List[Stopwatch]] = None
+        self._deadlines: Optional[List[int]] = None
+        client.on_change = self._apply
+        snapshot = client.request("subscribe")
+        self._set_counts(snapshot["counts"])
+        for state in snapshot["items"]:
+            self._states[state["id"]] = state
+            self._items[state["id"]] = self._build(state)
+
+    def fileno(self) -> int:
+        return self.client.fileno()
+
+    def close(self):
+        self.client.close()
+
+    def _set_counts(self, counts):
+        self.timer_count = counts["timers"]
+        self.stopwatch_count = counts["stopwatches"]
+
+    def _build(self, state):
+        if state["kind"] == "timer":
+            return Timer.from_state(state, self.clock)
+        return Stopwatch.from_state(state, self.clock)
+
+    def _apply(self, entry):
+        if entry["op"] == "counts":
+            self._set_counts(entry["counts"])
+            return
+        apply_change(self._states, entry)
+        if entry["op"] == "lap":
+            sw = self._items.get(entry["id"])
+            if sw is not None:
+                sw.laps.append(entry["t"]) # Cheaper than rebuilding a stopwatch with many laps
+            return
+        item_id = entry["state"]["id"] if entry["op"] == "put" else entry["id"]
+        state = self._states.get(item_id)
+        if state is None:
+            self._items.pop(item_id, None)
+        elif state["kind"] != "schedule": # Schedules run in the daemon; their timers arrive like any other
+            self._items[item_id] = self._build(state)
+        self._timer_list = self._stopwatch_list = self._deadlines = None
+
+    # --- Read side, same as TimeManager ---
+
+    @property
+    def timers(self) -> List[Timer]:
+        if self._timer_list is None:
+            self._timer_list = [i for i in self._items.values() if isinstance(i, Timer)]
+        return self._timer_list
+
+    @property
+    def stopwatches(self) -> List[Stopwatch]:
+        if self._stopwatch_list is None:
+            self._stopwatch_list = [i for i in self._items.values() if isinstance(i, Stopwatch)]
+        return self._stopwatch_list
+
+    def get(self, item_id: str):
+        return self._items.get(item_id)
+
+    def item_count(self) -> int:
+        return len(self._items)
+
+    def item_at(self, index: int):
+        n_timers = len(self.timers)
+        if index < n_timers:
+            return self.timers[index]
+        return self.stopwatches[index - n_timers]
+
+    def next_deadline(self):
+        """Earliest deadline still ahead; expiry itself is reported by the daemon."""
+        if self._deadlines is None:
+            self._deadlines = [t.deadline for t in self.timers if t.deadline is not None]
+            heapq.heapify(self._deadlines)
+        now = self.clock.monotonic_ns()
+        while self._deadlines and self._deadlines[0] <= now:
+            heapq.heappop(self._deadlines)
+        return self._deadlines[0] if self._deadlines else None
+
+    def update(self):
+        """Applies changes pushed by the daemon since the last frame."""
+        self.client.poll()
+
+    # --- Actions, forwarded to the daemon ---
+
+    def add_timer(self, duration: int, name: str = "", tags=()):
+        reply = self.client.request("create", kind="timer", duration=duration, name=name, tags=list(tags))
+        return self._items.get(reply["item"]["id"])
+
+    def add_stopwatch(self, name: str = "", tags=()):
+        reply = self.client.request("create", kind="stopwatch", name=name, tags=list(tags))
+        return self._items.get(reply["item"]["id"])
+
+    def remove_timer(self, timer: Timer):
+        self.client.request("delete", id=timer.id)
+
+    def remove_stopwatch(self, sw: Stopwatch):
+        self.client.request("delete", id=sw.id)
+
+    def pause(self, item):
+        self.client.request("pause", id=item.id)
+
+    def resume(self, item):
+        self.client.request("resume", id=item.id)
+
+    def reset(self, item):
+        self.client.request("reset", id=item.id)
+
+    def toggle_all_pause(self):
+        self.client.request("toggle_all")
+
+    def lap(self, sw: Stopwatch) -> bool:
+        try:
+            self.client.request("lap", id=sw.id)
+        except DaemonError:
+            return False # Paused on the daemon's side
+        return True
+
+    def lap_active(self):
+        for sw in reversed(self.stopwatches):
+            if sw.state == State.RUNNING:
+                return self.lap(sw)
+        return False
+
+    def bulk(self, action: str, seconds: float = 0, **selector) -> int:
+        return self.client.request("bulk", action=action, seconds=seconds, **selector)["count"]
@@ -0,0 +1,338 @@
+import csv
+import json
+import os
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from .segments import segment_paths, read_header, read_segment, overlaps
+
+# Live-file chunk size per worker task; each archived segment is one task
+CHUNK_BYTES = 8 * 1024 * 1024
+# Split histogram bounds (seconds) for the per-day lap distribution; the last bucket is open
+LAP_BUCKETS = (1, 5, 10, 30, 60, 300, 900, 3600)
+# Whether an item runs after each lifecycle action
+RUNNING = {"Started": True, "Resume": True, "Reset": True, "Pause": False, "Finished": False, "Removed": False}
+# Bulk records ({"op", "ids"}) expand to one of the actions above per item
+BULK_ACTIONS = {"pause": "Pause", "resume": "Resume", "reset": "Reset", "delete": "Removed"}
+
+NAME_COLUMNS = ("type", "name", "items", "timed_seconds", "timers", "avg_duration", "pauses", "laps", "running")
+DAY_COLUMNS = (("day", "laps", "mean_split", "min_split", "max_split")
+               + tuple(f"le_{b}s" for b in LAP_BUCKETS) + (f"gt_{LAP_BUCKETS[-1]}s",))
+TABLES = {"names": NAME_COLUMNS, "days": DAY_COLUMNS}
+FORMATS = ("text", "csv", "json", "columnar", "parquet")
+
+@lru_cache(maxsize=4096)
+def _day(quarter_hour: int) -> str:
+    # Every UTC offset is a whole number of quarter hours, so one lookup serves each
+    return time.strftime("%Y-%m-%d", time.localtime(quarter_hour * 900))
+
+def day_of(wall: float) -> str:
+    return _day(int(wall // 900))
+
+class DayLaps:
+    """Distribution of the lap splits taken on one day; merges by addition."""
+    __slots__ = ("count", "total", "min", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.buckets = [0] * (len(LAP_BUCKETS) + 1)
+
+    def add(self, split: float):
+        self.count += 1
+        self.total += split
+        if self.min is None or split < self.min: self.min = split
+        if self.max is None or split > self.max: self.max = split
+        for i, bound in enumerate(LAP_BUCKETS):
+            if split <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def merge(self, other: "DayLaps"):
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min): self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max): self.max = other.max
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+
+class ObjectSummary:
+    """
+    What one chunk of the log says about one Timer/Stopwatch, in a form that
+    can be merged with the next chunk's. A chunk doesn't know whether the
+    item was running when it began, so running time is only summed between
+    the chunk's own state changes; merge() adds the gap across the boundary
+    once the earlier chunk's final state is known. Laps are cumulative, so a
+    chunk's first lap without a Started/Reset before it is held open
+    (`lap_open`) until the previous lap is known.
+    """
+    __slots__ = ("kind", "name", "timers", "duration_total", "pauses", "laps",
+                 "first_wall", "last_wall", "running", "busy", "lap_open", "lap_last")
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.name: Optional[str] = None
+        self.timers = 0 # Started events carrying a duration
+        self.duration_total = 0
+        self.pauses = 0
+        self.laps = 0
+        self.first_wall: Optional[float] = None # First state change in the chunk
+        self.last_wall: Optional[float] = None # Latest state change
+        self.running = False # State after last_wall
+        self.busy = 0.0 # Running seconds between first_wall and last_wall
+        self.lap_open: Optional[Tuple[float, str]] = None # (cumulative, day) of a lap awaiting its predecessor
+        self.lap_last: Optional[float] = None # Cumulative time the next lap's split starts from
+
+    def transition(self, action: str, wall: float):
+        if self.first_wall is None:
+            self.first_wall = wall
+        elif self.running:
+            self.busy += wall - self.last_wall
+        self.last_wall = wall
+        self.running = RUNNING[action]
+        if action == "Pause":
+            self.pauses += 1
+        elif action in ("Started", "Reset"):
+            self.lap_last = 0.0
+
+    def lap(self, cumulative: float, day: str, days: Dict[str, DayLaps]):
+        self.laps += 1
+        if self.lap_last is None:
+            self.lap_open = (cumulative, day)
+        else:
+            _day_laps(days, day).add(cumulative - self.lap_last)
+        self.lap_last = cumulative
+
+    def merge(self, later: "ObjectSummary", days: Dict[str, DayLaps]):
+        """Folds in the summary of the chunk that follows this one."""
+        if later.name is not None:
+            self.name = later.name
+        self.timers += later.timers
+        self.duration_total += later.duration_total
+        self.pauses += later.pauses
+        self.laps += later.laps
+        if later.first_wall is not None:
+            if self.first_wall is None:
+                self.first_wall = later.first_wall
+            elif self.running:
+                self.busy += later.first_wall - self.last_wall
+            self.busy += later.busy
+            self.last_wall = later.last_wall
+            self.running = later.running
+        if later.lap_open is not None:
+            if self.lap_last is None:
+                self.lap_open = later.lap_open
+            else:
+                value, day = later.lap_open
+                _day_laps(days, day).add(value - self.lap_last)
+        if later.lap_last is not None:
+            self.lap_last = later.lap_last
+
+def _day_laps(days, day) -> DayLaps:
+    laps = days.get(day)
+    if laps is None:
+        laps = days[day] = DayLaps()
+    return laps
+
+class Report:
+    """Aggregates over a run of consecutive log chunks; merge() appends the next run."""
+    def __init__(self):
+        self.objects: Dict[str, ObjectSummary] = {}
+        self.days: Dict[str, DayLaps] = {}
+        self.events = 0
+        self.chunks = 0
+
+    def _object(self, key, kind) -> ObjectSummary:
+        summary = self.objects.get(key)
+        if summary is None:
+            summary = self.objects[key] = ObjectSummary(kind)
+        return summary
+
+    def add(self, record: dict):
+        cat, action, wall = record["cat"], record["action"], record["wall"]
+        self.events += 1
+        if cat == "System":
+            if action == "Bulk" and record.get("op") in BULK_ACTIONS:
+                for obj_id in record.get("ids", ()):
+                    summary = self.objects.get(obj_id)
+                    # Bulk records don't say which kind each item is; one seen earlier in the chunk does
+                    self._object(obj_id, summary.kind if summary else None).transition(
+                        BULK_ACTIONS[record["op"]], wall)
+            return
+        key = record.get("id")
+        if not key:
+            if action != "Started" or not record.get("name"):
+                return # Legacy line that can't be attributed
+            key = f"legacy_{record['name']}"
+        summary = self._object(key, cat)
+        if summary.kind is None:
+            summary.kind = cat
+        if record.get("name"):
+            summary.name = record["name"]
+        if action == "Lap":
+            if record.get("lap") is not None:
+                summary.lap(float(record["lap"]), day_of(wall), self.days)
+            return
+        if action in RUNNING:
+            summary.transition(action, wall)
+        if action == "Started" and record.get("duration") is not None:
+            summary.timers += 1
+            summary.duration_total += record["duration"]
+
+    def merge(self, later: "Report"):
+        for day, laps in later.days.items():
+            _day_laps(self.days, day).merge(laps)
+        for key, summary in later.objects.items():
+            mine = self.objects.get(key)
+            if mine is None:
+                self.objects[key] = summary
+            else:
+                if mine.kind is None:
+                    mine.kind = summary.kind
+                mine.merge(summary, self.days)
+        self.events += later.events
+        self.chunks += later.chunks
+
+    def finish(self):
+        """Closes laps whose predecessor never appeared: they count from zero, as after a start."""
+        for summary in self.objects.values():
+            if summary.lap_open is not None:
+                value, day = summary.lap_open
+                _day_laps(self.days, day).add(value)
+                summary.lap_open = None
+
+    def name_rows(self) -> List[dict]:
+        rows = {}
+        for summary in self.objects.values():
+            key = (summary.kind or "Unknown", summary.name or "Unknown")
+            row = rows.get(key)
+            if row is None:
+                row = rows[key] = dict.fromkeys(NAME_COLUMNS, 0)
+                row["type"], row["name"] = key
+            row["items"] += 1
+            row["timed_seconds"] += summary.busy
+            row["timers"] += summary.timers
+            row["avg_duration"] += summary.duration_total # Divided below
+            row["pauses"] += summary.pauses
+            row["laps"] += summary.laps
+            row["running"] += summary.running
+        for row in rows.values():
+            row["timed_seconds"] = round(row["timed_seconds"], 3)
+            row["avg_duration"] = round(row["avg_duration"] / row["timers"], 1) if row["timers"] else None
+        return sorted(rows.values(), key=lambda r: (-r["timed_seconds"], r["type"], r["name"]))
+
+    def day_rows(self) -> List[dict]:
+        rows = []
+        for day in sorted(self.days):
+            laps = self.days[day]
+            row = {"day": day, "laps": laps.count, "mean_split": round(laps.total / laps.count, 3),
+                   "min_split": round(laps.min, 3), "max_split": round(laps.max, 3)}
+            row.update(zip(DAY_COLUMNS[5:], laps.buckets))
+            rows.append(row)
+        return rows
+
+    def table(self, name) -> List[dict]:
+        return self.name_rows() if name == "names" else self.day_rows()
+
+# --- Splitting and parallel parsing ---
+
+def plan(path, since: Optional[float] = None, until: Optional[float] = None,
+         chunk_bytes: int = CHUNK_BYTES) -> List[tuple]:
+    """
+    Tasks covering the log oldest first: one per archived segment in the time
+    window, then the live file cut into ranges that start and end on line
+    boundaries. A partial last line (still being written) is left out.
+    """
+    tasks = [(segment, None, None, since, until) for segment in segment_paths(path)
+             if overlaps(read_header(segment), since, until)]
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return tasks
+    with f:
+        size = os.fstat(f.fileno()).st_size
+        start = 0
+        while start < size:
+            end = min(start + chunk_bytes, size)
+            f.seek(end - 1)
+            tail = f.readline()
+            if not tail.endswith(b"\n"):
+                # Ran into the unfinished last line: end the file at the previous newline
+                f.seek(start)
+                data = f.read(end - start)
+                end = start + data.rfind(b"\n") + 1
+                if end == start:
+                    break
+            else:
+                end = end - 1 + len(tail)
+            tasks.append((path, start, end, since, until))
+            start = end
+    return tasks
+
+def parse_chunk(task) -> Report:
+    """Worker: aggregates one task's lines. Top level so a process pool can pickle it."""
+    path, start, end, since, until = task
+    report = Report()
+    report.chunks = 1
+    if start is None:
+        try:
+            data = read_segment(path)
+        except (OSError, EOFError):
+            return report
+    else:
+        with open(path, "rb") as f:
+            f.seek(start)
+            data = f.read(end - start)
+    loads = json.loads
+    for line in data.split(b"\n"):
+        if not line.startswith(b"{"):
+            continue
+        try:
+            record = loads(line)
+            wall = record["wall"]
+            if (since is not None and wall < since) or (until is not None and wall > until):
+                continue
+            report.add(record)
+        except (ValueError, KeyError, TypeError):
+            continue
+    return report
+
+def build_report(path, since: Optional[float] = None, until: Optional[float] = None,
+                 jobs: Optional[int] = None, chunk_bytes: int = CHUNK_BYTES) -> Report:
+    """
+    Aggregates the event stream and its archives. Chunks are parsed by a pool
+    of `jobs` processes (default: one per CPU) and merged in log order, so
+    items whose events span chunks come out the same as a single pass.
+    """
+    tasks = plan(path, since, until, chunk_bytes)
+    jobs = min(jobs or os.cpu_count() or 1, len(tasks))
+    report = Report()
+    if jobs <= 1:
+        for task in tasks:
+            report.merge(parse_chunk(task))
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            for part in pool.map(parse_chunk, tasks):
+                report.merge(part)
+    report.finish()
+    return report
+
+# --- Export ---
+
+def to_columns(rows, columns) -> dict:
+    """Column-major form of a table: {"rows": n, "columns": {name: [values]}}."""
+    return {"rows": len(rows), "columns": {c: [row[c] for row in rows] for c in columns}}
+
+def write_csv(rows, columns, out):
+    writer = csv.DictWriter(out, fieldnames=columns, lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(rows)
+
+def write_parquet(rows, columns, path):
+    """Writes a Parquet file; needs the optional pyarrow package."""
+    import pyarrow
+    import pyarrow.parquet
+    pyarrow.parquet.write_table(pyarrow.table(to_columns(rows, columns)["columns"]), path)
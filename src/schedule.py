@@ -0,0 +1,360 @@
+import heapq
+import math
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+from .clock import NS_PER_SEC
+from .models import new_id
+from .utils import format_time
+
+RULES = ("every", "cron", "chain")
+# Minute, hour, day of month, month, day of week (0 = Sunday; 7 is accepted too)
+CRON_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+CRON_ALIASES = {
+    "@hourly": "0 * * * *", "@daily": "0 0 * * *", "@midnight": "0 0 * * *",
+    "@weekly": "0 0 * * 0", "@monthly": "0 0 1 * *", "@yearly": "0 0 1 1 *", "@annually": "0 0 1 1 *",
+}
+# Candidate days a cron search looks at before deciding the expression never fires (Feb 29 needs ~4 years)
+CRON_SEARCH_DAYS = 366 * 8
+# Shortest interval schedule, in seconds: a fire per frame would start timers faster than they can be shown
+MIN_INTERVAL = 1
+
+def _cron_field(text: str, lo: int, hi: int) -> List[int]:
+    values = set()
+    for part in text.split(","):
+        spec, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if spec == "*":
+            start, end = lo, hi
+        elif "-" in spec:
+            start, end = (int(v) for v in spec.split("-", 1))
+        else:
+            start = end = int(spec)
+            if step > 1:
+                end = hi # "5/15" means every 15 starting at 5
+        if hi == 6 and end == 7: # Sunday as 7
+            values.add(0)
+            if start == 7:
+                continue
+            end = 6
+        if not (lo <= start <= end <= hi) or step < 1:
+            raise ValueError
+        values.update(range(start, end + 1, step))
+    return sorted(values)
+
+class CronSpec:
+    """
+    Five-field cron expression (minute hour day-of-month month day-of-week)
+    in local time, with *, lists, ranges and /steps, plus the @daily style
+    aliases. As in cron, when both day fields are restricted a day matching
+    either one fires, and in the hour repeated when DST ends only
+    expressions that fire every hour run again; the rest fire once.
+    """
+    def __init__(self, text: str):
+        self.text = " ".join(text.split())
+        fields = CRON_ALIASES.get(self.text, self.text).split()
+        if len(fields) != 5:
+            raise ValueError(f"A cron schedule needs 5 fields, not {len(fields)}: {text!r}")
+        try:
+            self.minutes, self.hours, days, months, weekdays = (
+                _cron_field(f, lo, hi) for f, (lo, hi) in zip(fields, CRON_FIELDS))
+        except ValueError:
+            raise ValueError(f"Can't read cron schedule {text!r}")
+        self.days, self.months, self.weekdays = set(days), set(months), set(weekdays)
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+        self.every_hour = len(self.hours) == 24
+
+    def _day_matches(self, t: datetime) -> bool:
+        in_month = t.day in self.days
+        in_week = (t.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return in_month and in_week
+        return in_month or in_week
+
+    def _epoch_after(self, t: datetime, wall_ns: int) -> Optional[int]:
+        """
+        Epoch ns of local time t if that is after wall_ns. Date arithmetic
+        drops `fold`, so in the hour repeated when DST ends t always means
+        its first occurrence; every-hour expressions also try the second.
+        """
+        for fold in ((0, 1) if self.every_hour else (0,)):
+            epoch = int(t.replace(fold=fold).timestamp()) * NS_PER_SEC
+            if epoch > wall_ns:
+                return epoch
+        return None
+
+    def _matches(self, t: datetime) -> bool:
+        return (t.month in self.months and self._day_matches(t) and t.hour in self.hours
+                and t.minute in self.minutes)
+
+    def _repeated_hour(self, wall_ns: int, found_ns: int) -> Optional[int]:
+        """
+        A match inside an hour repeated between wall_ns and found_ns, which
+        a search over local times steps past: once DST ends the clock reads
+        01:00 again after 01:59.
+        """
+        lo, hi = wall_ns // NS_PER_SEC, found_ns // NS_PER_SEC
+        before = time.localtime(lo).tm_gmtoff
+        if time.localtime(hi).tm_gmtoff >= before:
+            return None
+        while hi - lo > 1: # hi ends up as the first second after the clock went back
+            mid = (lo + hi) // 2
+            if time.localtime(mid).tm_gmtoff == before:
+                lo = mid
+            else:
+                hi = mid
+        repeated_end = hi + before - time.localtime(hi).tm_gmtoff
+        start = max(hi, wall_ns // NS_PER_SEC + 1)
+        for second in range(-(-start // 60) * 60, min(repeated_end, found_ns // NS_PER_SEC), 60):
+            if self._matches(datetime.fromtimestamp(second)):
+                return second * NS_PER_SEC
+        return None
+
+    def next_after(self, wall_ns: int) -> int:
+        """Wall-clock ns of the first matching minute strictly after wall_ns."""
+        t = datetime.fromtimestamp(wall_ns // NS_PER_SEC).replace(second=0, microsecond=0)
+        t += timedelta(minutes=1)
+        limit = t + timedelta(days=CRON_SEARCH_DAYS)
+        while t < limit:
+            if t.month not in self.months:
+                t = datetime(t.year + t.month // 12, t.month % 12 + 1, 1)
+            elif not self._day_matches(t):
+                t = datetime(t.year, t.month, t.day) + timedelta(days=1)
+            else:
+                i = bisect_left(self.hours, t.hour)
+                if i == len(self.hours):
+                    t = datetime(t.year, t.month, t.day) + timedelta(days=1)
+                    continue
+                if self.hours[i] != t.hour:
+                    t = t.replace(hour=self.hours[i], minute=0)
+                j = bisect_left(self.minutes, t.minute)
+                if j == len(self.minutes):
+                    t = t.replace(minute=0) + timedelta(hours=1)
+                    continue
+                t = t.replace(minute=self.minutes[j])
+                epoch = self._epoch_after(t, wall_ns)
+                if epoch is None:
+                    t += timedelta(minutes=1) # Already passed: the clock went back over it
+                    continue
+                if self.every_hour:
+                    epoch = self._repeated_hour(wall_ns, epoch) or epoch
+                return epoch
+        raise ValueError(f"Cron schedule {self.text!r} never fires")
+
+class Schedule:
+    """
+    A rule that starts timers by itself.
+
+    every: a timer of `duration` at anchor + k * interval, for every k.
+    cron:  a timer of `duration` at each minute a CronSpec matches.
+    chain: the timers in `steps`, each started when the previous one
+           finishes, `repeat` times over (0 = forever).
+
+    Fire times always come from the rule, never from when the previous fire
+    was handled, so a late tick or a slow callback doesn't push later fires
+    back. A duration of 0 makes each fire a plain alarm. Each fire (or
+    step) removes the timers of earlier ones that have finished, so a
+    schedule leaves at most one finished timer behind.
+    """
+    __slots__ = ("id", "rule", "name", "tags", "duration", "every", "anchor_ns", "cron", "steps", "repeat",
+                 "step", "cycle", "timer_id", "timer_ids", "next_ns", "fired")
+
+    def __init__(self, rule: str, name: str = "", tags=(), duration: float = 0):
+        if rule not in RULES:
+            raise ValueError(f"Unknown schedule rule: {rule}")
+        self.id = new_id()
+        self.rule = rule
+        self.name = name
+        self.tags = frozenset(tags)
+        self.duration = duration
+        self.every: float = 0
+        self.anchor_ns = 0
+        self.cron: Optional[CronSpec] = None
+        self.steps: List[float] = []
+        self.repeat = 0
+        self.step = 0
+        self.cycle = 0
+        self.timer_id: Optional[str] = None # Chain step currently running
+        self.timer_ids: List[str] = [] # Interval/cron timers started and not yet pruned
+        self.next_ns: Optional[int] = None # Next wall-clock fire; None for chains
+        self.fired = 0
+
+    @classmethod
+    def interval(cls, every: float, anchor_ns: int, duration: float = 0, name: str = "", tags=()) -> "Schedule":
+        if not isinstance(every, (int, float)) or not math.isfinite(every) or every < MIN_INTERVAL:
+            raise ValueError(f"A schedule interval must be at least {MIN_INTERVAL} s")
+        schedule = cls("every", name, tags, duration)
+        schedule.every = every
+        schedule.anchor_ns = anchor_ns
+        return schedule
+
+    @classmethod
+    def crontab(cls, text: str, duration: float = 0, name: str = "", tags=()) -> "Schedule":
+        schedule = cls("cron", name, tags, duration)
+        schedule.cron = CronSpec(text)
+        return schedule
+
+    @classmethod
+    def chain(cls, steps, repeat: int = 1, name: str = "", tags=()) -> "Schedule":
+        steps = list(steps)
+        if not steps or any(s <= 0 for s in steps):
+            raise ValueError("A chain needs one or more positive durations")
+        if repeat < 0:
+            raise ValueError("A chain can't repeat a negative number of times")
+        schedule = cls("chain", name, tags)
+        schedule.steps = steps
+        schedule.repeat = repeat
+        return schedule
+
+    def next_after(self, wall_ns: int) -> Optional[int]:
+        """The rule's first fire time strictly after wall_ns; None for chains."""
+        if self.rule == "every":
+            every_ns = round(self.every * NS_PER_SEC)
+            k = (wall_ns - self.anchor_ns) // every_ns + 1 if wall_ns >= self.anchor_ns else 0
+            return self.anchor_ns + k * every_ns
+        if self.rule == "cron":
+            return self.cron.next_after(wall_ns)
+        return None
+
+    def advance(self) -> bool:
+        """Moves a chain to its next step; False once the last cycle is done."""
+        self.step += 1
+        if self.step == len(self.steps):
+            self.step = 0
+            self.cycle += 1
+        return not self.repeat or self.cycle < self.repeat
+
+    def timer_name(self) -> str:
+        if self.rule != "chain":
+            return self.name
+        return f"{self.name or 'Chain'} {self.step + 1}/{len(self.steps)}"
+
+    def describe(self) -> str:
+        if self.rule == "every":
+            text = f"every {format_time(self.every)}"
+        elif self.rule == "cron":
+            text = f"cron {self.cron.text}"
+        else:
+            times = "repeating" if not self.repeat else f"x{self.repeat}"
+            return f"chain {' > '.join(format_time(s) for s in self.steps)} {times}"
+        return text + (f" for {format_time(self.duration)}" if self.duration else "")
+
+    def to_state(self) -> dict:
+        state = {"kind": "schedule", "id": self.id, "rule": self.rule, "name": self.name,
+                 "fired": self.fired}
+        if self.tags:
+            state["tags"] = sorted(self.tags)
+        if self.rule == "chain":
+            state.update(steps=self.steps, repeat=self.repeat, step=self.step, cycle=self.cycle,
+                         timer_id=self.timer_id)
+        else:
+            state.update(duration=self.duration, next_ns=self.next_ns, timer_ids=self.timer_ids)
+            if self.rule == "every":
+                state.update(every=self.every, anchor_ns=self.anchor_ns)
+            else:
+                state["cron"] = self.cron.text
+        return state
+
+    @classmethod
+    def from_state(cls, state: dict) -> "Schedule":
+        rule = state["rule"]
+        if rule == "every":
+            schedule = cls.interval(state["every"], state["anchor_ns"], state["duration"])
+        elif rule == "cron":
+            schedule = cls.crontab(state["cron"], state["duration"])
+        else:
+            schedule = cls.chain(state["steps"], state["repeat"])
+            schedule.step = state["step"]
+            schedule.cycle = state["cycle"]
+            schedule.timer_id = state["timer_id"]
+        schedule.id = state["id"]
+        schedule.name = state["name"]
+        schedule.tags = frozenset(state.get("tags", ()))
+        schedule.next_ns = state.get("next_ns")
+        schedule.timer_ids = list(state.get("timer_ids", ()))
+        schedule.fired = state["fired"]
+        return schedule
+
+class Scheduler:
+    """
+    The schedules of one manager. Interval and cron schedules wait in a
+    min-heap of (wall ns, id), so finding what is due costs a look at the
+    top however many schedules exist; like the deadline heap, entries are
+    never removed in place and stale ones are skipped when they surface.
+    Chains don't wait on the clock: they are found by the id of the timer
+    whose finish moves them on.
+    """
+    def __init__(self):
+        self._by_id: Dict[str, Schedule] = {}
+        self._heap: List[Tuple[int, str]] = []
+        self._chains: Dict[str, str] = {} # Running step's timer id -> chain id
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self) -> Iterator[Schedule]:
+        return iter(list(self._by_id.values()))
+
+    def __contains__(self, schedule_id):
+        return schedule_id in self._by_id
+
+    def get(self, schedule_id: str) -> Optional[Schedule]:
+        return self._by_id.get(schedule_id)
+
+    def add(self, schedule: Schedule):
+        self._by_id[schedule.id] = schedule
+        self.push(schedule)
+        if schedule.timer_id is not None:
+            self._chains[schedule.timer_id] = schedule.id
+
+    def remove(self, schedule_id: str) -> Optional[Schedule]:
+        schedule = self._by_id.pop(schedule_id, None)
+        if schedule is not None and schedule.timer_id is not None:
+            self._chains.pop(schedule.timer_id, None)
+        return schedule
+
+    def push(self, schedule: Schedule):
+        """Queues a schedule at its (new) next_ns."""
+        if schedule.next_ns is None:
+            return
+        heapq.heappush(self._heap, (schedule.next_ns, schedule.id))
+        if len(self._heap) > 2 * len(self._by_id) + 64:
+            self._heap = [(s.next_ns, s.id) for s in self._by_id.values() if s.next_ns is not None]
+            heapq.heapify(self._heap)
+
+    def link(self, schedule: Schedule, timer_id: Optional[str]):
+        """Records the timer running a chain's current step."""
+        if schedule.timer_id is not None:
+            self._chains.pop(schedule.timer_id, None)
+        schedule.timer_id = timer_id
+        if timer_id is not None:
+            self._chains[timer_id] = schedule.id
+
+    def chain_for(self, timer_id: str) -> Optional[Schedule]:
+        schedule_id = self._chains.get(timer_id)
+        return None if schedule_id is None else self._by_id.get(schedule_id)
+
+    def next_fire(self) -> Optional[int]:
+        """Earliest pending fire (wall ns), discarding stale heap entries on the way."""
+        heap = self._heap
+        while heap:
+            fire_ns, schedule_id = heap[0]
+            schedule = self._by_id.get(schedule_id)
+            if schedule is not None and schedule.next_ns == fire_ns:
+                return fire_ns
+            heapq.heappop(heap)
+        return None
+
+    def pop_due(self, wall_ns: int) -> List[Schedule]:
+        """Takes every schedule due by wall_ns off the heap; the caller pushes them back once advanced."""
+        due = []
+        heap = self._heap
+        while heap and heap[0][0] <= wall_ns:
+            fire_ns, schedule_id = heapq.heappop(heap)
+            schedule = self._by_id.get(schedule_id)
+            # Equal entries surface together; a schedule pushed twice still fires once
+            if schedule is not None and schedule.next_ns == fire_ns and not (due and due[-1] is schedule):
+                due.append(schedule)
+        return due
@@ -0,0 +1,144 @@
+import glob
+import gzip
+import json
+import os
+import shutil
+import time
+from typing import List, Optional
+
+# Archived segments are `<log>.<YYYYmmddTHHMMSS>-<n>.gz`, so names sort oldest first.
+# Their first line is a header with the time range of the lines that follow.
+SEGMENT_HEADER = "#segment "
+STAMP_FORMAT = "%Y%m%dT%H%M%S"
+TEXT_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+HEAD_BYTES = 64 * 1024
+
+def line_time(line) -> Optional[float]:
+    """Wall-clock time of a log line: "wall" for event JSON, the leading timestamp for text."""
+    if isinstance(line, bytes):
+        line = line.decode("utf-8", errors="replace")
+    try:
+        if line.startswith("{"):
+            return float(json.loads(line)["wall"])
+        return time.mktime(time.strptime(line[:19], TEXT_DATE_FORMAT))
+    except (ValueError, KeyError, TypeError):
+        return None
+
+def segment_paths(path) -> List[str]:
+    """Archived segments of a log, oldest first."""
+    return sorted(glob.glob(glob.escape(path) + ".*.gz"))
+
+def read_header(segment_path) -> dict:
+    """
+    The segment's {"first", "last", "lines"} header; only the first few KB
+    are decompressed. Missing fields mean the range is unknown.
+    """
+    try:
+        with gzip.open(segment_path, "rt", encoding="utf-8", errors="replace") as f:
+            line = f.readline()
+        if line.startswith(SEGMENT_HEADER):
+            return json.loads(line[len(SEGMENT_HEADER):])
+    except (OSError, EOFError, ValueError):
+        pass
+    return {}
+
+def overlaps(header: dict, since: Optional[float], until: Optional[float]) -> bool:
+    """Whether a segment may hold lines in [since, until]; unknown ranges always may."""
+    first, last = header.get("first"), header.get("last")
+    if since is not None and last is not None and last < since:
+        return False
+    if until is not None and first is not None and first > until:
+        return False
+    return True
+
+def read_segment(segment_path) -> bytes:
+    """The segment's lines, decompressed, without the header."""
+    with gzip.open(segment_path, "rb") as f:
+        data = f.read()
+    if data.startswith(SEGMENT_HEADER.encode()):
+        data = data[data.find(b"\n") + 1:]
+    return data
+
+def first_line_time(path) -> Optional[float]:
+    """Time of a log's first line, or None if empty or unreadable."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read(HEAD_BYTES)
+    except OSError:
+        return None
+    cut = data.find(b"\n")
+    return line_time(data[:cut]) if cut != -1 else None
+
+def _last_line_time(f, size) -> Optional[float]:
+    pos = size
+    tail = b""
+    while pos > 0:
+        start = max(0, pos - HEAD_BYTES)
+        f.seek(start)
+        tail = f.read(pos - start) + tail
+        lines = tail.rstrip(b"\n").split(b"\n")
+        for raw in reversed(lines[1:] if start > 0 else lines):
+            value = line_time(raw)
+            if value is not None:
+                return value
+        pos = start
+        tail = lines[0] if start > 0 else b""
+    return None
+
+def rotate(path) -> Optional[str]:
+    """
+    Moves a log into a new compressed segment and returns the segment's path
+    (None if there was nothing to rotate). The caller must have closed its
+    handle; the next write creates a fresh file.
+    """
+    try:
+        if os.path.getsize(path) == 0:
+            return None
+    except OSError:
+        return None
+    pending = path + ".rotating"
+    if os.path.exists(pending):
+        _compress(pending, path) # Left by a rotation that was interrupted
+    os.replace(path, pending)
+    return _compress(pending, path)
+
+def recover(path) -> Optional[str]:
+    """Finishes a rotation that was interrupted after the log was moved aside."""
+    pending = path + ".rotating"
+    return _compress(pending, path) if os.path.exists(pending) else None
+
+def _compress(pending, path) -> str:
+    with open(pending, "rb") as src:
+        size = os.fstat(src.fileno()).st_size
+        lines = 0
+        first = None
+        partial = b"" # A line cut by the block boundary, while the first timestamp is still sought
+        while True:
+            block = src.read(1024 * 1024)
+            if not block:
+                break
+            if first is None:
+                # Unparseable or partial lines can run past the first block; keep looking
+                raws = (partial + block).split(b"\n")
+                partial = raws.pop()
+                for raw in raws:
+                    first = line_time(raw)
+                    if first is not None:
+                        partial = b""
+                        break
+            lines += block.count(b"\n")
+        last = _last_line_time(src, size)
+        header = {"first": first, "last": last, "lines": lines}
+        stamp = time.strftime(STAMP_FORMAT, time.localtime(last if last is not None else time.time()))
+        n = 1
+        segment = f"{path}.{stamp}-{n:03}.gz"
+        while os.path.exists(segment):
+            n += 1
+            segment = f"{path}.{stamp}-{n:03}.gz"
+        src.seek(0)
+        with gzip.open(segment + ".tmp", "wb") as out:
+            out.write((SEGMENT_HEADER + json.dumps(header) + "\n").encode("utf-8"))
+            shutil.copyfileobj(src, out, 1024 * 1024)
+    os.replace(segment + ".tmp", segment)
+    os.remove(pending)
+    return segment
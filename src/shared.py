@@ -0,0 +1,434 @@
+import heapq
+import math
+import mmap
+import os
+import struct
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+from .managers import TimeManager
+from .models import Timer, Stopwatch, State
+from .clock import Clock, SYSTEM_CLOCK
+from .laps import P2Quantile, QUANTILES
+try:
+    import fcntl
+except ImportError: # Windows: no flock, so no shared table
+    fcntl = None
+
+SHARED_TABLE_FILENAME = "shared.tbl"
+MAGIC = b"TMRTABLE"
+TABLE_VERSION = 1
+TABLE_CAPACITY = 4096
+# magic, version, capacity, change counter, slots in use (high-water mark), timer count, stopwatch count
+HEADER = struct.Struct("<8sIIQQQQ")
+HEADER_SIZE = 64
+CHANGES_AT = 16
+# seq, kind, state, notified, id, name, tags, duration, elapsed_ns, wall_ns, lap count,
+# newest laps (oldest first, NaN-padded), split min, max, mean (NaN if none)
+RECENT_LAPS = 3
+RECORD = struct.Struct(f"<QBBBx8s64s32sdqqQ{RECENT_LAPS}dddd")
+RECORD_SIZE = 256
+SEQ = struct.Struct("<Q")
+COUNTER = struct.Struct("<Q")
+FREE, KIND_TIMER, KIND_STOPWATCH = 0, 1, 2
+STATES = [State.RUNNING, State.PAUSED, State.FINISHED, State.IDLE]
+# Reads that keep finding a record mid-write give up spinning and take the lock
+SPIN_LIMIT = 1000
+# How often a dashboard in shared mode looks for changes made by other sessions
+SHARED_POLL = 0.25
+
+class SharedStateUnavailable(Exception):
+    pass
+
+class SharedTableFull(Exception):
+    pass
+
+def _text(raw: bytes) -> str:
+    return raw.rstrip(b"\0").decode("utf-8", errors="ignore")
+
+def _nan(value) -> float:
+    return math.nan if value is None else value
+
+def _value(value: float):
+    return None if math.isnan(value) else value
+
+def pack(item) -> tuple:
+    """Record fields (without seq) for a Timer or Stopwatch."""
+    timing = item.timing_state()
+    name = item.name.encode("utf-8")[:64]
+    tags = ",".join(sorted(item.tags)).encode("utf-8")[:32]
+    if isinstance(item, Timer):
+        return (KIND_TIMER, STATES.index(item.state), timing["notified"], item.id.encode(), name, tags,
+                item.duration, timing["elapsed_ns"], timing["wall_ns"], 0) + (math.nan,) * (RECENT_LAPS + 3)
+    laps = item.laps
+    recent = [value for _, value in laps.tail(RECENT_LAPS)]
+    recent = [math.nan] * (RECENT_LAPS - len(recent)) + recent
+    stats = laps.stats
+    return (KIND_STOPWATCH, STATES.index(item.state), False, item.id.encode(), name, tags,
+            0.0, timing["elapsed_ns"], timing["wall_ns"], len(laps), *recent,
+            _nan(stats.min), _nan(stats.max), _nan(stats.mean if stats.count else None))
+
+def unpack(fields) -> Optional[dict]:
+    """A to_state()-style dict from a record's fields, or None for a free slot."""
+    (seq, kind, state, notified, item_id, name, tags, duration, elapsed_ns, wall_ns, lap_count,
+     *rest) = fields
+    if kind == FREE:
+        return None
+    result = {"id": item_id.decode(), "name": _text(name), "state": STATES[state].value,
+              "elapsed_ns": elapsed_ns, "wall_ns": wall_ns}
+    tags = _text(tags)
+    if tags:
+        result["tags"] = tags.split(",")
+    if kind == KIND_TIMER:
+        result.update(kind="timer", duration=duration, notified=bool(notified))
+        return result
+    recent = [v for v in rest[:RECENT_LAPS] if not math.isnan(v)]
+    split_min, split_max, split_mean = rest[RECENT_LAPS:]
+    result.update(kind="stopwatch", laps=recent, laps_offset=lap_count - len(recent))
+    if lap_count:
+        # Only what fits in the record: the quantile sketches start over
+        result["lap_stats"] = {"count": lap_count, "last": recent[-1] if recent else 0.0,
+                               "min": _value(split_min), "max": _value(split_max),
+                               "mean": _value(split_mean) or 0.0,
+                               "quantiles": [P2Quantile(p).to_state() for p in QUANTILES]}
+    return result
+
+class SharedTable:
+    """
+    Timers and stopwatches in a memory-mapped file that several dashboards
+    map at once (`~/.timer_cli/shared.tbl`).
+
+    The file is a 64-byte header followed by `capacity` fixed-size records.
+    Writers serialize on an flock of the file and bump the header's change
+    counter after every write, so a reader learns that nothing changed from
+    one 8-byte read. Each record starts with a sequence number used as a
+    seqlock: odd while it is being written, so readers never take the lock;
+    they copy the record and retry if the number moved meanwhile.
+
+    It also stands in for the session journal on a TimeManager (put, touch,
+    lap, delete, record_many, counts): every change is written straight to
+    the table.
+    """
+    def __init__(self, path, capacity: int = TABLE_CAPACITY):
+        if fcntl is None:
+            raise SharedStateUnavailable("Shared state needs POSIX file locks (Linux/macOS)")
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._depth = 0
+        self.seen: Dict[int, int] = {} # slot -> seq this process wrote or last applied
+        self.slots_by_id: Dict[str, int] = {}
+        try:
+            with self.locked():
+                if os.fstat(self._fd).st_size == 0:
+                    os.ftruncate(self._fd, HEADER_SIZE + capacity * RECORD_SIZE)
+                    self._map = mmap.mmap(self._fd, 0)
+                    HEADER.pack_into(self._map, 0, MAGIC, TABLE_VERSION, capacity, 0, 0, 0, 0)
+                else:
+                    self._map = mmap.mmap(self._fd, 0)
+            magic, version, self.capacity = HEADER.unpack_from(self._map, 0)[:3]
+        except (OSError, ValueError) as e:
+            os.close(self._fd)
+            raise SharedStateUnavailable(f"Can't map {path}: {e}")
+        if magic != MAGIC or version != TABLE_VERSION:
+            self.close()
+            raise SharedStateUnavailable(f"{path} is not a timer table this version can read")
+
+    @contextmanager
+    def locked(self):
+        """Holds the writer lock; re-entrant within this process."""
+        if self._depth == 0:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    # --- Header ---
+
+    def _header(self, index) -> int:
+        return COUNTER.unpack_from(self._map, CHANGES_AT + 8 * index)[0]
+
+    def _set_header(self, index, value):
+        COUNTER.pack_into(self._map, CHANGES_AT + 8 * index, value)
+
+    @property
+    def changes(self) -> int:
+        """Bumped after every write by any process."""
+        return self._header(0)
+
+    @property
+    def slots(self) -> int:
+        """Slots ever used; records past this are all free."""
+        return self._header(1)
+
+    def read_counts(self):
+        return self._header(2), self._header(3)
+
+    # --- Records ---
+
+    def seq(self, slot) -> int:
+        return SEQ.unpack_from(self._map, HEADER_SIZE + slot * RECORD_SIZE)[0]
+
+    def read(self, slot) -> tuple:
+        """The record's fields, as written by one complete write."""
+        offset = HEADER_SIZE + slot * RECORD_SIZE
+        for _ in range(SPIN_LIMIT):
+            seq = SEQ.unpack_from(self._map, offset)[0]
+            if seq & 1:
+                time.sleep(0)
+                continue
+            fields = RECORD.unpack_from(self._map, offset)
+            if fields[0] == seq and SEQ.unpack_from(self._map, offset)[0] == seq:
+                return fields
+        with self.locked(): # A writer died mid-record, or is very slow: wait it out
+            return RECORD.unpack_from(self._map, offset)
+
+    def _write(self, slot, fields):
+        offset = HEADER_SIZE + slot * RECORD_SIZE
+        seq = SEQ.unpack_from(self._map, offset)[0]
+        writing = seq + 2 if seq & 1 else seq + 1 # Already odd: left by a writer that died mid-record
+        SEQ.pack_into(self._map, offset, writing)
+        RECORD.pack_into(self._map, offset, writing, *fields)
+        SEQ.pack_into(self._map, offset, writing + 1)
+        self.seen[slot] = writing + 1
+        self._set_header(0, self.changes + 1)
+
+    def _find(self, item_id) -> Optional[int]:
+        slot = self.slots_by_id.get(item_id)
+        raw = item_id.encode()
+        if slot is not None and self.read(slot)[4] == raw:
+            return slot
+        for slot in range(self.slots):
+            fields = self.read(slot)
+            if fields[1] != FREE and fields[4] == raw:
+                self.slots_by_id[item_id] = slot
+                return slot
+        self.slots_by_id.pop(item_id, None)
+        return None
+
+    def _allocate(self) -> int:
+        used = self.slots
+        for slot in range(used):
+            if self.read(slot)[1] == FREE:
+                return slot
+        if used >= self.capacity:
+            raise SharedTableFull(f"{self.path} holds at most {self.capacity} timers and stopwatches")
+        self._set_header(1, used + 1)
+        return used
+
+    def record(self, item_id) -> Optional[dict]:
+        """The item's current state in the table, or None if it isn't there."""
+        with self.locked():
+            slot = self._find(item_id)
+            return None if slot is None else unpack(self.read(slot))
+
+    # --- Journal interface ---
+
+    def put(self, item):
+        with self.locked():
+            slot = self._find(item.id)
+            if slot is None:
+                slot = self._allocate()
+                self.slots_by_id[item.id] = slot
+            self._write(slot, pack(item))
+
+    def touch(self, item):
+        self.put(item)
+
+    def lap(self, item, value):
+        self.put(item)
+
+    def delete(self, item_id):
+        with self.locked():
+            slot = self._find(item_id)
+            if slot is not None:
+                self._write(slot, (FREE, 0, False, b"", b"", b"", 0.0, 0, 0, 0) + (math.nan,) * (RECENT_LAPS + 3))
+                self.slots_by_id.pop(item_id, None)
+
+    def record_many(self, puts=(), touches=(), deletes=()):
+        with self.locked():
+            for item in puts: self.put(item)
+            for item in touches: self.put(item)
+            for item_id in deletes: self.delete(item_id)
+
+    def counts(self, timers, stopwatches):
+        with self.locked():
+            # Never move backwards: another session may have numbered past this one
+            self._set_header(2, max(timers, self._header(2)))
+            self._set_header(3, max(stopwatches, self._header(3)))
+            self._set_header(0, self.changes + 1)
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
+
+class SharedManager(TimeManager):
+    """
+    TimeManager whose items live in a SharedTable, so every dashboard that
+    maps the table shows and controls the same timers.
+
+    Each session keeps local Timer/Stopwatch objects, rebuilt only from the
+    records that changed since it last looked; a frame where nothing changed
+    costs one read of the change counter. Actions run under the table lock
+    against a freshly synced copy of the item, so concurrent pause/delete
+    from different sessions apply one after the other. A finished timer is
+    claimed under the lock, so only one session reports it. Schedules are
+    not in the table: each session runs the ones made in it, until it closes.
+    """
+    def __init__(self, table: SharedTable, clock: Clock = SYSTEM_CLOCK, notifier=None):
+        super().__init__(journal=table, clock=clock, notifier=notifier)
+        self.table = table
+        self._ids: Dict[int, str] = {} # slot -> id of the local copy built from it
+        self._changes = None
+        self.sync()
+
+    def _drop(self, item_id):
+        if self._timers_by_id.pop(item_id, None) is not None:
+            self._timer_list = None
+            self._unchain(item_id)
+        elif self._stopwatches_by_id.pop(item_id, None) is not None:
+            self._stopwatch_list = None
+
+    def _insert(self, item):
+        if isinstance(item, Timer):
+            self._timers_by_id[item.id] = item
+            self._timer_list = None
+        else:
+            self._stopwatches_by_id[item.id] = item
+            self._stopwatch_list = None
+
+    def sync(self) -> int:
+        """Rebuilds the items other sessions changed since the last call; returns how many."""
+        table = self.table
+        changes = table.changes
+        if changes == self._changes:
+            return 0
+        self._changes = changes
+        self.timer_count, self.stopwatch_count = table.read_counts()
+        changed = 0
+        rescheduled = False
+        for slot in range(table.slots):
+            seq = table.seq(slot)
+            if table.seen.get(slot) == seq:
+                continue
+            fields = table.read(slot)
+            table.seen[slot] = fields[0]
+            state = unpack(fields)
+            old_id = self._ids.pop(slot, None)
+            if old_id is not None and (state is None or state["id"] != old_id):
+                self._drop(old_id)
+                table.slots_by_id.pop(old_id, None)
+            changed += 1
+            if state is None:
+                continue
+            item = (Timer if state["kind"] == "timer" else Stopwatch).from_state(state, self.clock)
+            self._insert(item)
+            self._ids[slot] = item.id
+            table.slots_by_id[item.id] = slot
+            rescheduled = True
+        if rescheduled:
+            self._rebuild_deadlines()
+            # Timers that ran out with no session open are reported on the next update
+            for timer in list(self._timers_by_id.values()):
+                if timer.state != State.FINISHED:
+                    continue
+                if not timer.notified:
+                    heapq.heappush(self._deadlines, (timer.start_ns, timer.id))
+                    continue
+                chain = self.scheduler.chain_for(timer.id)
+                if chain is not None: # Another session reported this step; the chain still moves on here
+                    self._next_step(chain, timer.start_ns + timer.paused_ns + timer.duration_ns)
+        return changed
+
+    def _fresh(self, item):
+        """The current local copy of an item, synced under the lock; None if deleted."""
+        self.sync()
+        return self.get(item.id)
+
+    def _finish(self, timer) -> bool:
+        with self.table.locked():
+            fresh = self._fresh(timer)
+            if fresh is None or fresh.notified:
+                return False # Removed, or already reported by another session
+            if fresh.state != State.FINISHED:
+                deadline = fresh.deadline
+                if deadline is None or deadline > self.clock.monotonic_ns():
+                    self._schedule(fresh) # Paused, reset or extended by another session meanwhile
+                    return False
+            return super()._finish(fresh)
+
+    def update(self):
+        self.sync()
+        super().update()
+
+    def add_timer(self, duration: int, name: str = "", tags=()):
+        with self.table.locked():
+            self.sync()
+            item = super().add_timer(duration, name, tags)
+            self._own(item)
+            return item
+
+    def add_stopwatch(self, name: str = "", tags=()):
+        with self.table.locked():
+            self.sync()
+            item = super().add_stopwatch(name, tags)
+            self._own(item)
+            return item
+
+    def _record_schedule(self, schedule, deleted=False):
+        pass # Schedules stay with the session that made them; the table only holds items
+
+    def _own(self, item):
+        slot = self.table.slots_by_id[item.id]
+        self._ids[slot] = item.id
+
+    def remove_timer(self, timer: Timer):
+        with self.table.locked():
+            timer = self._fresh(timer)
+            if timer is not None:
+                super().remove_timer(timer)
+
+    def remove_stopwatch(self, sw: Stopwatch):
+        with self.table.locked():
+            sw = self._fresh(sw)
+            if sw is not None:
+                super().remove_stopwatch(sw)
+
+    def pause(self, item):
+        with self.table.locked():
+            item = self._fresh(item)
+            if item is not None:
+                super().pause(item)
+
+    def resume(self, item):
+        with self.table.locked():
+            item = self._fresh(item)
+            if item is not None:
+                super().resume(item)
+
+    def reset(self, item):
+        with self.table.locked():
+            item = self._fresh(item)
+            if item is not None:
+                super().reset(item)
+
+    def lap(self, sw: Stopwatch) -> bool:
+        with self.table.locked():
+            sw = self._fresh(sw)
+            return sw is not None and super().lap(sw)
+
+    def toggle_all_pause(self):
+        with self.table.locked():
+            self.sync()
+            super().toggle_all_pause()
+
+    def bulk(self, action: str, seconds: float = 0, **selector) -> int:
+        with self.table.locked():
+            self.sync()
+            return super().bulk(action, seconds, **selector)
+
+    def close(self):
+        self.table.close()
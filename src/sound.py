@@ -1,24 +1,259 @@
+import array
+import math
+import os
+import queue
+import shutil
+import subprocess
 import sys
 import threading
-import subprocess
+import time
+import wave
+from typing import Optional
+from .logging_setup import log_action
+
+MAC_ALERT = "/System/Library/Sounds/Glass.aiff"
+# Built-in alert when no WAV is configured: a short 880 Hz tone
+TONE_RATE = 22050
+TONE_SECONDS = 0.25
+TONE_HZ = 880
+# aplay sample formats by bytes per sample
+APLAY_FORMATS = {1: "U8", 2: "S16_LE", 3: "S24_3LE", 4: "S32_LE"}
+
+class Sample:
+    """An alert decoded into memory once: raw PCM frames plus their format."""
+    def __init__(self, frames: bytes, rate: int, channels: int, width: int, wav_bytes: Optional[bytes] = None):
+        self.frames = frames
+        self.rate = rate
+        self.channels = channels
+        self.width = width
+        self.wav_bytes = wav_bytes # The file as-is, for APIs that play whole WAVs from memory
+
+    @property
+    def seconds(self) -> float:
+        return len(self.frames) / (self.rate * self.channels * self.width)
+
+    @classmethod
+    def from_wav(cls, path) -> "Sample":
+        path = os.path.expanduser(path)
+        with wave.open(path, "rb") as w:
+            frames = w.readframes(w.getnframes())
+            sample = cls(frames, w.getframerate(), w.getnchannels(), w.getsampwidth())
+        with open(path, "rb") as f:
+            sample.wav_bytes = f.read()
+        return sample
+
+    @classmethod
+    def tone(cls) -> "Sample":
+        count = int(TONE_RATE * TONE_SECONDS)
+        fade = count // 10 # Short fade in/out so the tone doesn't click
+        pcm = array.array("h", (
+            int(12000 * min(1.0, i / fade, (count - i) / fade) * math.sin(2 * math.pi * TONE_HZ * i / TONE_RATE))
+            for i in range(count)
+        ))
+        if sys.byteorder == "big":
+            pcm.byteswap()
+        return cls(pcm.tobytes(), TONE_RATE, 1, 2)
+
+class TerminalBell:
+    """
+    Bell rings requested from any thread and performed by the UI thread with
+    curses beep()/flash(), so nothing else ever writes to the terminal
+    underneath curses. request() also makes fileno() readable, which lets a
+    select()-based main loop wake up for it.
+    """
+    def __init__(self, visual=False):
+        self.visual = visual
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._r = self._w = None
+        if sys.platform != "win32": # Pipes can't be select()ed on Windows; the loop polls instead
+            self._r, self._w = os.pipe()
+            os.set_blocking(self._r, False)
+            os.set_blocking(self._w, False)
+
+    def fileno(self) -> int:
+        return self._r
+
+    def request(self):
+        with self._lock:
+            self._pending += 1
+        if self._w is not None:
+            try:
+                os.write(self._w, b"!")
+            except BlockingIOError:
+                pass # Already plenty of wakeups queued
+
+    def ring(self) -> int:
+        """Call on the UI thread: rings once for any number of pending requests."""
+        with self._lock:
+            pending, self._pending = self._pending, 0
+        if self._r is not None:
+            try:
+                while os.read(self._r, 4096):
+                    pass
+            except BlockingIOError:
+                pass
+        if pending:
+            import curses
+            try:
+                if self.visual:
+                    curses.flash()
+                else:
+                    curses.beep()
+            except curses.error:
+                pass
+        return pending
+
+    def close(self):
+        for fd in (self._r, self._w):
+            if fd is not None:
+                os.close(fd)
+        self._r = self._w = None
+
+_ui_bell: Optional[TerminalBell] = None
+
+def set_ui_bell(bell: Optional[TerminalBell]):
+    """Registers the dashboard's bell; without one (e.g. the daemon) bell requests are dropped."""
+    global _ui_bell
+    _ui_bell = bell
+
+def request_bell() -> bool:
+    if _ui_bell is None:
+        return False
+    _ui_bell.request()
+    return True
+
+class AudioWorker(threading.Thread):
+    """
+    The one thread that plays alerts. The sample is loaded (or synthesized)
+    once when the worker starts and alerts are played from a queue, so an
+    alert never imports modules or decodes files. On Linux one long-lived
+    `aplay` reading raw PCM from a pipe plays every alert; Windows plays
+    the WAV from memory. macOS is the exception: afplay only plays files
+    and the standard library has no audio output there, so each alert
+    still starts one afplay, with its path and the file looked up once.
+    Without any backend the alert becomes a terminal bell on the UI thread.
+
+    Each alert's duration (request to end of playback) is kept in
+    last_duration; only failures are logged, so alerts don't fill the
+    event history.
+    """
+    _STOP = object()
+
+    def __init__(self, sample_path=None):
+        super().__init__(name="audio", daemon=True)
+        self.sample_path = sample_path
+        self.sample: Optional[Sample] = None
+        self.queue = queue.SimpleQueue()
+        self.last_duration: Optional[float] = None
+        self._player = None
+        self._afplay = None # macOS: the afplay command line, resolved once
+
+    def run(self):
+        self._load()
+        while True:
+            item = self.queue.get()
+            if item is self._STOP:
+                break
+            requested, done = item
+            if self._play() != "none":
+                self.last_duration = time.monotonic() - requested
+            if done is not None:
+                done.set()
+        if self._player is not None:
+            self._player.stdin.close()
+            self._player.wait()
+
+    def _load(self):
+        if sys.platform == "darwin":
+            afplay = shutil.which("afplay")
+            alert = os.path.expanduser(self.sample_path or MAC_ALERT)
+            if afplay is not None and os.path.exists(alert):
+                self._afplay = [afplay, alert]
+            elif self.sample_path:
+                log_action("System", "Sound", f"Can't play {self.sample_path} with afplay; using the terminal bell")
+            return
+        if self.sample_path:
+            try:
+                self.sample = Sample.from_wav(self.sample_path)
+                return
+            except (OSError, EOFError, wave.Error) as e:
+                log_action("System", "Sound", f"Can't load {self.sample_path}: {e}; using the built-in tone")
+        self.sample = Sample.tone()
+
+    def _play(self) -> str:
+        """Plays one alert and returns the backend used; "none" if nothing could sound it."""
+        try:
+            if sys.platform == "win32":
+                import winsound
+                if self.sample.wav_bytes is not None:
+                    winsound.PlaySound(self.sample.wav_bytes, winsound.SND_MEMORY)
+                else:
+                    winsound.MessageBeep(winsound.MB_ICONEXCLAMATION)
+                return "winsound"
+            if sys.platform == "darwin":
+                if self._afplay is not None:
+                    subprocess.run(self._afplay, check=False)
+                    return "afplay"
+            elif self._write_pcm():
+                return "aplay"
+        except (OSError, RuntimeError, subprocess.SubprocessError) as e:
+            # RuntimeError is how winsound reports a device it can't play on
+            log_action("System", "Sound", f"Alert playback failed: {e!r}; using the terminal bell")
+        return "bell" if request_bell() else "none"
+
+    def _write_pcm(self) -> bool:
+        """Streams the sample into the long-lived aplay; False if there is no player."""
+        sample = self.sample
+        for attempt in range(2):
+            if self._player is None or self._player.poll() is not None:
+                fmt = APLAY_FORMATS.get(sample.width)
+                if fmt is None or shutil.which("aplay") is None:
+                    return False
+                self._player = subprocess.Popen(
+                    ["aplay", "-q", "-t", "raw", "-f", fmt, "-r", str(sample.rate), "-c", str(sample.channels)],
+                    stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                )
+            try:
+                self._player.stdin.write(sample.frames)
+                self._player.stdin.flush()
+            except OSError:
+                self._player = None # Died (e.g. device busy); start a fresh one once
+                continue
+            time.sleep(sample.seconds) # The pipe returns before the device is done
+            return True
+        return False
+
+    def play(self, wait=False):
+        """Queues one alert; with wait=True blocks until it has played."""
+        done = threading.Event() if wait else None
+        self.queue.put((time.monotonic(), done))
+        if done is not None:
+            done.wait()
+
+    def stop(self):
+        if self.is_alive():
+            self.queue.put(self._STOP)
+            self.join()
+
+_default_worker: Optional[AudioWorker] = None
+_default_lock = threading.Lock()
+
+def get_audio_worker() -> AudioWorker:
+    """The shared worker with the built-in alert, started on first use."""
+    global _default_worker
+    with _default_lock:
+        if _default_worker is None:
+            _default_worker = AudioWorker()
+            _default_worker.start()
+        return _default_worker
 
 def play_sound():
     """
-    Plays a system alert sound in a non-blocking way (using threads).
+    Plays a system alert sound in a non-blocking way.
     """
-    threading.Thread(target=_beep, daemon=True).start()
-
-def _beep():
-    try:
-        if sys.platform == "win32":
-            import winsound
-            # Plays the standard Windows "Exclamation" system sound
-            winsound.MessageBeep(winsound.MB_ICONEXCLAMATION)
-        elif sys.platform == "darwin":
-            # macOS
-            subprocess.run(["afplay", "/System/Library/Sounds/Glass.aiff"], check=False)
-        else:
-            # Linux / other - try terminal bell or generic beep
-            print('\a')
-    except Exception:
-        pass 
+    get_audio_worker().play()
+
+def beep():
+    """Plays the alert sound, returning once it has played."""
+    get_audio_worker().play(wait=True)
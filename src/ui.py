@@ -1,127 +1,354 @@
 import curses
-from .models import State
+from functools import lru_cache
+from .models import State, Stopwatch
 from .utils import format_time
 
-def draw_progress_bar(stdscr, y, x, width, percent, color_pair):
+class Screen:
+    """
+    Retained-mode wrapper around a curses window.
+
+    A frame is described with put() and committed with flush(), which diffs it
+    against what is already on the terminal: rows whose spans keep the same
+    layout only get the changed characters rewritten, other changed rows are
+    cleared and redrawn, and untouched rows cost no curses calls at all.
+    """
+    def __init__(self, stdscr):
+        self.stdscr = stdscr
+        self._drawn = {}  # row -> tuple of (x, text, attr) currently on screen
+        self._frame = {}  # row -> list of (x, text, attr) for the frame being built
+        self._size = None
+        self._chrome_key = None
+        self._chrome = []
+
+    def invalidate(self):
+        """Forgets what is on screen, e.g. after something else drew over it."""
+        self._size = None
+
+    def begin(self, width, height):
+        self._frame = {}
+        if self._size != (width, height):
+            self._size = (width, height)
+            self._drawn = {}
+            self._chrome_key = None
+            self.stdscr.erase()
+
+    def put(self, y, x, text, attr=0):
+        self._frame.setdefault(y, []).append((x, text, attr))
+
+    def chrome(self, key, build):
+        """Puts static spans, rebuilding them only when key changes."""
+        if key != self._chrome_key:
+            self._chrome_key = key
+            self._chrome = build()
+        for y, x, text, attr in self._chrome:
+            self.put(y, x, text, attr)
+
+    def _addstr(self, y, x, text, attr):
+        try:
+            self.stdscr.addstr(y, x, text, attr)
+        except curses.error:
+            pass # Ignore drawing errors if window is too small
+
+    def flush(self):
+        frame = {y: tuple(spans) for y, spans in self._frame.items()}
+        changed = False
+        for y in set(frame) | set(self._drawn):
+            new = frame.get(y, ())
+            old = self._drawn.get(y, ())
+            if new == old:
+                continue
+            changed = True
+            if len(new) == len(old) and all(
+                    n[0] == o[0] and n[2] == o[2] and len(n[1]) == len(o[1])
+                    for n, o in zip(new, old)):
+                # Same layout: rewrite only the characters that differ
+                dirty = [] # (start, end) columns rewritten so far on this row
+                for (x, text, attr), (_, prev, _) in zip(new, old):
+                    end = x + len(text)
+                    if dirty and any(x < d_end and d_start < end for d_start, d_end in dirty):
+                        # An earlier span was rewritten underneath this overlay
+                        self._addstr(y, x, text, attr)
+                        dirty.append((x, end))
+                        continue
+                    if text == prev:
+                        continue
+                    first = 0
+                    while text[first] == prev[first]:
+                        first += 1
+                    last = len(text) - 1
+                    while text[last] == prev[last]:
+                        last -= 1
+                    self._addstr(y, x + first, text[first:last + 1], attr)
+                    dirty.append((x + first, x + last + 1))
+            else:
+                try:
+                    self.stdscr.move(y, 0)
+                    self.stdscr.clrtoeol()
+                except curses.error:
+                    pass
+                for x, text, attr in new:
+                    self._addstr(y, x, text, attr)
+        self._drawn = frame
+        self._frame = {}
+        if changed:
+            self.stdscr.refresh()
+
+class RenderCache:
+    """
+    Strings the dashboard would otherwise rebuild for every row on every
+    frame. Progress bars are kept per (width, filled) and dropped when the
+    terminal width changes; row labels are kept per item and rebuilt only
+    when what they show (name, state, duration) changes.
+    """
+    def __init__(self, max_labels=4096):
+        self.max_labels = max_labels
+        self.width = None
+        self.bars = {}
+        self.labels = {} # item id -> (key, label)
+
+    def resize(self, width):
+        if width != self.width:
+            self.width = width
+            self.bars.clear()
+
+    def bar(self, width, filled):
+        key = (width, filled)
+        bar = self.bars.get(key)
+        if bar is None:
+            bar = self.bars[key] = "█" * filled + "-" * (width - filled)
+        return bar
+
+    def label(self, item, key, build):
+        entry = self.labels.get(item.id)
+        if entry is not None and entry[0] == key:
+            return entry[1]
+        if len(self.labels) >= self.max_labels:
+            self.labels.clear() # Mostly removed items; the visible ones come right back
+        label = build(item)
+        self.labels[item.id] = (key, label)
+        return label
+
+RENDER_CACHE = RenderCache()
+
+@lru_cache(maxsize=4096)
+def _padded(text):
+    return f" {text} "
+
+def padded_time(seconds: float) -> str:
+    """format_time() with a space either side, as the time column shows it."""
+    return _padded(format_time(seconds))
+
+def draw_progress_bar(screen, y, x, width, percent, color_pair):
     """Draws a progress bar at (y, x) with total width."""
     # Ensure percent is between 0 and 1
     percent = max(0.0, min(1.0, percent))
-    
-    filled_len = int(width * percent)
-    bar = "█" * filled_len + "-" * (width - filled_len)
-    
-    try:
-        stdscr.addstr(y, x, bar, color_pair)
-    except curses.error:
-        pass # Ignore drawing errors if window is too small
-
-def render_app(stdscr, manager, menu, width, height, focused_index=-1):
-    stdscr.erase()
-    
+    screen.put(y, x, RENDER_CACHE.bar(width, int(width * percent)), color_pair)
+
+def _build_timer_label(t):
+    status_icon = "[||]" if t.state == State.PAUSED else "[>] "
+    if t.state == State.FINISHED: status_icon = "[V] "
+    # Layout: [Icon] Name (Orig) [Progress] Rem
+    return f" {status_icon} {t.name:<15} ({t.original_duration_str})"
+
+def timer_label(t):
+    """The left-hand label of a timer row."""
+    return RENDER_CACHE.label(t, (t.name, t.state, t.original_duration_str), _build_timer_label)
+
+def _build_stopwatch_label(s):
+    status_icon = "[||]" if s.state == State.PAUSED else "[>] "
+    return f" {status_icon} {s.name:<15} "
+
+def stopwatch_label(s):
+    """A stopwatch row up to its time."""
+    return RENDER_CACHE.label(s, (s.name, s.state), _build_stopwatch_label)
+
+def progress_bar_width(label, rem_str, width):
+    """Width left for the progress bar between a row's label and its time column."""
+    bar_start = 2 + len(label) + 2
+    return width - bar_start - len(rem_str) - 4
+
+MAX_VISIBLE_LAPS = 3 # Show last 3 laps to keep it tidy
+
+def _item_rows(item) -> int:
+    """Screen rows an item occupies: its own line plus any visible laps."""
+    if isinstance(item, Stopwatch):
+        return 1 + min(MAX_VISIBLE_LAPS, len(item.laps))
+    return 1
+
+def _header_rows(n_timers, start, end) -> int:
+    """Section header rows needed to show items start..end from the top."""
+    rows = 0
+    if start < n_timers:
+        rows += 1 # TIMERS
+        if end >= n_timers:
+            rows += 2 # Gap + STOPWATCHES
+    elif start == 0:
+        rows += 3 # No timers: STOPWATCHES keeps its usual spot
+    else:
+        rows += 1 # STOPWATCHES (sticky)
+    return rows
+
+class ListViewport:
+    """
+    Scroll state for the item list. Only the rows that fit on screen are
+    visited, so drawing and scrolling cost depends on the viewport height
+    rather than on how many timers and stopwatches exist.
+    """
+    def __init__(self):
+        self.offset = 0 # First visible item position
+        self.visible = (0, 0) # [start, end) item positions drawn last frame
+
+    def follow(self, manager, focus, avail):
+        """Scrolls the minimum amount needed to keep the focused item visible."""
+        total = manager.item_count()
+        self.offset = max(0, min(self.offset, total - 1))
+        if focus < 0 or focus >= total:
+            return
+        if focus < self.offset:
+            self.offset = focus
+            return
+
+        n_timers = len(manager.timers)
+        if focus - self.offset < avail:
+            used = _header_rows(n_timers, self.offset, focus)
+            for i in range(self.offset, focus + 1):
+                used += _item_rows(manager.item_at(i))
+            if used <= avail:
+                return
+
+        # Focus is below the viewport: pack items upwards from it
+        start = focus
+        items_rows = _item_rows(manager.item_at(focus))
+        while start > 0:
+            more = items_rows + _item_rows(manager.item_at(start - 1))
+            if more + _header_rows(n_timers, start - 1, focus) > avail:
+                break
+            items_rows = more
+            start -= 1
+        self.offset = start
+
+def _build_chrome(manager, menu, width, height, focused_index):
+    """Header, menu and footer spans; they only change on resize or state change."""
+    spans = []
+
     # Header
     header = " TIMER CLI | Timers: {} | Stopwatches: {} ".format(
         len(manager.timers), len(manager.stopwatches)
     )
-    stdscr.attron(curses.color_pair(1) | curses.A_BOLD)
-    stdscr.addstr(0, 0, header.center(width))
-    stdscr.attroff(curses.color_pair(1) | curses.A_BOLD)
+    spans.append((0, 0, header.center(width), curses.color_pair(1) | curses.A_BOLD))
+
+    # 3. Menu (Bottom)
+    menu_y = height - 3
+    menu_total_width = sum(len(item) + 4 for item in menu.items)
+    current_x = max(0, (width - menu_total_width) // 2)
+
+    for idx, item in enumerate(menu.items):
+        label = f" {item} "
+        is_menu_focused = (focused_index == -1)
+
+        if idx == menu.selected_index and is_menu_focused:
+            spans.append((menu_y, current_x, label, curses.color_pair(3) | curses.A_BOLD))
+        else:
+            spans.append((menu_y, current_x, label, curses.A_NORMAL))
+        current_x += len(label) + 2
+
+    # 4. Instructions/Status
+    footer = " [^/v] Nav List  [</>] Nav Menu  [enter/return] Pause/Res  [s] Split  [r] Reset  [d] Delete "
+    spans.append((height - 1, 0, footer.center(width)[:width-1], curses.color_pair(5) | curses.A_BOLD))
+    return spans
+
+def render_app(screen, manager, menu, width, height, focused_index=-1, prompt=None, viewport=None,
+               overlay=None):
+    screen.begin(width, height)
+    RENDER_CACHE.resize(width)
+
+    chrome_key = (width, height, len(manager.timers), len(manager.stopwatches),
+                  menu.selected_index, focused_index == -1)
+    screen.chrome(chrome_key, lambda: _build_chrome(manager, menu, width, height, focused_index))
 
     content_height = height - 5
+    if viewport is None:
+        viewport = ListViewport()
+    viewport.follow(manager, focused_index, content_height - 2)
+
+    n_timers = len(manager.timers)
+    total = manager.item_count()
     row = 2
-    global_idx = 0 # To track against focused_index
+    global_idx = viewport.offset # To track against focused_index
 
     # --- Timers ---
-    if manager.timers:
-        stdscr.addstr(row, 2, "TIMERS", curses.A_UNDERLINE)
+    if global_idx < n_timers:
+        screen.put(row, 2, "TIMERS", curses.A_UNDERLINE)
         row += 1
-        for t in manager.timers:
-            if row >= content_height: break
+        timers = manager.timers
+        bar_attr = curses.color_pair(2)
+        while global_idx < n_timers and row < content_height:
+            t = timers[global_idx]
             
             is_focused = (global_idx == focused_index)
             attr = curses.A_REVERSE if is_focused else curses.A_NORMAL
             
-            status_icon = "[||]" if t.state == State.PAUSED else "[>] "
-            if t.state == State.FINISHED: status_icon = "[V] "
-            
-            time_rem = format_time(t.remaining_time)
-            # Layout: [Icon] Name (Orig) [Progress] Rem
-            label = f" {status_icon} {t.name:<15} ({t.original_duration_str})"
-            stdscr.addstr(row, 2, label, attr)
+            label = timer_label(t)
+            screen.put(row, 2, label, attr)
             
-            # Progress Bar (centered-ish)
-            rem_str = f" {time_rem} "
+            # Progress Bar (centered-ish); the clock is read once per row
+            rem = t.remaining_time
+            rem_str = padded_time(rem)
             bar_start = 2 + len(label) + 2
-            bar_width = width - bar_start - len(rem_str) - 4
+            bar_width = progress_bar_width(label, rem_str, width)
             
             if bar_width > 5:
-                draw_progress_bar(stdscr, row, bar_start, bar_width, t.progress, curses.color_pair(2))
+                progress = 1.0 - rem / t.duration if t.duration else 1.0
+                draw_progress_bar(screen, row, bar_start, bar_width, progress, bar_attr)
             
             # Remaining time on the right
-            stdscr.addstr(row, width - len(rem_str) - 2, rem_str, attr)
+            screen.put(row, width - len(rem_str) - 2, rem_str, attr)
             
             row += 1
             global_idx += 1
-    else:
         row += 1
-
-    row += 1
+    elif viewport.offset == 0:
+        row += 2
 
     # --- Stopwatches ---
-    if manager.stopwatches:
-        stdscr.addstr(row, 2, "STOPWATCHES", curses.A_UNDERLINE)
+    if n_timers <= global_idx < total and row < content_height:
+        screen.put(row, 2, "STOPWATCHES", curses.A_UNDERLINE)
         row += 1
-        for s in manager.stopwatches:
-            if row >= content_height: break
+        while global_idx < total and row < content_height:
+            s = manager.stopwatches[global_idx - n_timers]
             
             is_focused = (global_idx == focused_index)
             attr = curses.A_REVERSE if is_focused else curses.A_NORMAL
             
-            status_icon = "[||]" if s.state == State.PAUSED else "[>] "
-            time_str = format_time(s.elapsed_time)
-            
-            stdscr.addstr(row, 2, f" {status_icon} {s.name:<15} {time_str} ", attr)
+            screen.put(row, 2, stopwatch_label(s) + padded_time(s.elapsed_time)[1:], attr)
             row += 1
             
             # Draw Laps (Indented)
             if s.laps:
-                # Show last 3 laps to keep it tidy
-                display_laps = s.laps[-3:]
-                for i, lap_time in enumerate(display_laps):
+                for lap_num, lap_time in s.laps.tail(MAX_VISIBLE_LAPS):
                     if row >= content_height: break
-                    lap_num = len(s.laps) - len(display_laps) + i + 1
                     lap_str = f"    ╚ Lap {lap_num}: {format_time(lap_time)}"
-                    stdscr.addstr(row, 2, lap_str, curses.color_pair(4))
+                    screen.put(row, 2, lap_str, curses.color_pair(4))
                     row += 1
             
             global_idx += 1
 
-    # 3. Menu (Bottom)
-    menu_y = height - 3
-    current_x = max(0, (width - (len(menu.items) * 15)) // 2) # Crude centering
-    
-    # Centering logic improvement
-    menu_total_width = sum(len(item) + 4 for item in menu.items)
-    current_x = max(0, (width - menu_total_width) // 2)
+    # Scroll indicators
+    viewport.visible = (viewport.offset, global_idx)
+    if viewport.offset > 0:
+        screen.put(2, width - 1, "▲", curses.A_BOLD)
+    if global_idx < total:
+        screen.put(content_height - 1, width - 1, "▼", curses.A_BOLD)
 
-    for idx, item in enumerate(menu.items):
-        label = f" {item} "
-        is_menu_focused = (focused_index == -1)
-        
-        if idx == menu.selected_index and is_menu_focused:
-            stdscr.attron(curses.color_pair(3) | curses.A_BOLD)
-            stdscr.addstr(menu_y, current_x, label)
-            stdscr.attroff(curses.color_pair(3) | curses.A_BOLD)
-        else:
-            stdscr.addstr(menu_y, current_x, label)
-        current_x += len(label) + 2
+    # Modal prompt overlay, positioned roughly in the middle
+    if prompt is not None:
+        screen.put(10, 5, prompt, curses.color_pair(3))
 
-    # 4. Instructions/Status
-    footer = " [^/v] Nav List  [</>] Nav Menu  [enter/return] Pause/Res  [s] Split  [r] Reset  [d] Delete "
-    stdscr.attron(curses.color_pair(5) | curses.A_BOLD)
-    try:
-        stdscr.addstr(height-1, 0, footer.center(width)[:width-1])
-    except curses.error:
-        pass
-    stdscr.attroff(curses.color_pair(5) | curses.A_BOLD)
-
-    stdscr.refresh()
+    # Performance overlay, boxed in the top-right corner
+    if overlay:
+        box_width = min(width - 2, max(len(line) for line in overlay) + 2)
+        x = max(0, width - box_width - 1)
+        for i, line in enumerate(overlay[:max(0, height - 2)]):
+            screen.put(1 + i, x, f" {line} ".ljust(box_width)[:box_width], curses.color_pair(1))
+
+    screen.flush()
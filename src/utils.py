@@ -1,8 +1,15 @@
+from functools import lru_cache
+
 def format_time(seconds: float) -> str:
     """
     Formats seconds into HH:MM:SS string.
     Example: 3661 -> "01:01:01"
     """
-    m, s = divmod(int(seconds), 60)
+    return _format_whole(int(seconds))
+
+@lru_cache(maxsize=4096)
+def _format_whole(seconds: int) -> str:
+    # Memoized per whole second: every row shows one of a few distinct values per frame
+    m, s = divmod(seconds, 60)
     h, m = divmod(m, 60)
     return f"{h:02}:{m:02}:{s:02}"